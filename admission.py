@@ -0,0 +1,222 @@
+# admission.py (과부하 시 입장 제어 + 단계적 응답 저하)
+#
+#   KAU_MAX_INFLIGHT=8          워커 프로세스당 동시에 전체 RAG(Gemini)까지 가는 요청 수
+#   KAU_QUEUE_SIZE=16           자리가 없을 때 기다릴 수 있는 요청 수 (넘치면 바로 저하 응답)
+#   KAU_QUEUE_TIMEOUT_SEC=2     대기 최대 시간
+#   KAU_SESSION_RATE=0.2        세션(브라우저 탭)당 초당 질문 수, KAU_SESSION_BURST=3 연속 허용 수
+#   KAU_FAQ_ANSWERS=faq.jsonl   batch.py 결과로 답변 캐시를 미리 채움 (선택)
+#
+# 전체 RAG를 못 쓰면 아래 순서로 답한다.
+#   1) cache       같은 질문(검색 질의 기준)에 지금 서비스 중인 인덱스 세대로 만든 답변
+#                  (이전 대화를 참고한 후속 질문 답변은 다른 세션에 보여주지 않도록 캐시하지 않음)
+#   2) extractive  Gemini 없이 검색 결과에서 관련 문장만 뽑아 보여줌 (동시 실행 수 별도 제한)
+#   3) busy        잠시 후 다시 시도해 달라는 안내
+# 세션 속도 제한에 걸린 요청은 cache → busy 만 사용한다.
+import os
+import re
+import json
+import threading
+from collections import OrderedDict
+
+import metrics
+import rag_core
+from ratelimit import TokenBucket
+from rewrite import content_tokens, rewrite_query
+
+MAX_INFLIGHT = int(os.environ.get("KAU_MAX_INFLIGHT", "8"))
+QUEUE_SIZE = int(os.environ.get("KAU_QUEUE_SIZE", "16"))
+QUEUE_TIMEOUT_SEC = float(os.environ.get("KAU_QUEUE_TIMEOUT_SEC", "2"))
+MAX_EXTRACTIVE = int(os.environ.get("KAU_MAX_EXTRACTIVE", "4"))
+SESSION_RATE = float(os.environ.get("KAU_SESSION_RATE", "0.2"))
+SESSION_BURST = int(os.environ.get("KAU_SESSION_BURST", "3"))
+FAQ_ANSWERS = os.environ.get("KAU_FAQ_ANSWERS")
+ANSWER_CACHE_SIZE = 1024
+SESSION_LIMIT = 10000  # 속도 제한 버킷을 기억할 세션 수
+
+BUSY_MESSAGE = "지금 질문이 많아 답변을 만들 수 없어요. 잠시 후 다시 시도해 주세요. 🙏"
+EXTRACTIVE_NOTICE = "⚠️ 지금 질문이 많아 AI 요약 없이 관련 공지에서 찾은 내용을 보여드려요."
+
+sentence_regex = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+def cache_key(query):
+    return " ".join(query.split()).rstrip("?!. ")
+
+
+class AnswerCache:
+    # (인덱스 세대, 질의) → 답변. 세대가 바뀌면 예전 세대 답변은 다시 쓰이지 않고 LRU로 밀려남
+    def __init__(self, size=ANSWER_CACHE_SIZE):
+        self.size = size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, query, generation=None):
+        key = (generation, cache_key(query))
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key]
+        return None
+
+    def put(self, query, answer, generation=None):
+        key = (generation, cache_key(query))
+        with self.lock:
+            self.entries[key] = {"content": answer["content"], "citations": answer["citations"]}
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def load(self, path, generation=None):
+        # batch.py 출력 (question, answer, citations, generation) 중 오류 없는 답변만
+        # generation이 없는 줄은 지금 세대(generation 인자)로 만든 것으로 봄
+        count = 0
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                if item.get("answer") and not item.get("error"):
+                    answer = {"content": item["answer"], "citations": item.get("citations", [])}
+                    self.put(item["question"], answer, item.get("generation", generation))
+                    count += 1
+        print(f"답변 캐시 {count}개 로드: {path}")
+        return count
+
+
+def extractive_answer(query, unique_docs, max_docs=3, max_chars=200):
+    # Gemini 없이: 문서마다 질의 단어가 가장 많이 들어간 문장 하나
+    tokens = content_tokens(query)
+    docs = unique_docs[:max_docs]
+    if not docs:
+        return None
+
+    parts = [EXTRACTIVE_NOTICE]
+    for doc in docs:
+        text = doc.metadata.get("raw_content", doc.page_content)
+        sentences = [s.strip() for s in sentence_regex.split(text) if s.strip()]
+        best = max(sentences, key=lambda s: sum(t in s for t in tokens)) if sentences else ""
+        snippet = best if len(best) <= max_chars else best[:max_chars] + "…"
+        parts.append(f"**{doc.metadata.get('title', '제목 없음')}**\n> {snippet}")
+
+    return {
+        "content": "\n\n".join(parts),
+        "citations": [rag_core.doc_citation(doc) for doc in docs],
+        "query": query,
+    }
+
+
+class Admission:
+    def __init__(self, max_inflight=MAX_INFLIGHT, queue_size=QUEUE_SIZE, queue_timeout=QUEUE_TIMEOUT_SEC,
+                 max_extractive=MAX_EXTRACTIVE, session_rate=SESSION_RATE, session_burst=SESSION_BURST):
+        self.slots = threading.BoundedSemaphore(max_inflight)
+        self.extractive_slots = threading.BoundedSemaphore(max_extractive)
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.session_rate = session_rate
+        self.session_burst = session_burst
+        self.lock = threading.Lock()
+        self.inflight = 0
+        self.waiting = 0
+        self.buckets = OrderedDict()  # 세션 id → TokenBucket
+        self.cache = AnswerCache()
+        self.stats = {"full": 0, "cache": 0, "extractive": 0, "busy": 0}
+
+    def _allow_session(self, session_id):
+        if not session_id or not self.session_rate:
+            return True
+        with self.lock:
+            bucket = self.buckets.get(session_id)
+            if bucket is None:
+                bucket = self.buckets[session_id] = TokenBucket(self.session_rate, capacity=self.session_burst)
+                while len(self.buckets) > SESSION_LIMIT:
+                    self.buckets.popitem(last=False)
+            self.buckets.move_to_end(session_id)
+        return bucket.try_acquire()
+
+    def _update_gauges(self):
+        metrics.set_admission(self.inflight, self.waiting)
+
+    def enter(self):
+        # 자리를 얻으면 None, 못 얻으면 거절 사유
+        if not self.slots.acquire(blocking=False):
+            with self.lock:
+                if self.waiting >= self.queue_size:
+                    return "queue_full"
+                self.waiting += 1
+                self._update_gauges()
+            try:
+                admitted = self.slots.acquire(timeout=self.queue_timeout)
+            finally:
+                with self.lock:
+                    self.waiting -= 1
+                    self._update_gauges()
+            if not admitted:
+                return "queue_timeout"
+
+        with self.lock:
+            self.inflight += 1
+            self._update_gauges()
+        return None
+
+    def leave(self):
+        with self.lock:
+            self.inflight -= 1
+            self._update_gauges()
+        self.slots.release()
+
+    def _served(self, answer, tier):
+        with self.lock:
+            self.stats[tier] += 1
+        if tier != "full":
+            metrics.degraded(tier)
+        return dict(answer, tier=tier)
+
+    def answer(self, user_input, session_id=None, history=None):
+        # rag_core.answer_question과 같은 형식 + "tier"
+        if not self._allow_session(session_id):
+            reason = "rate_limited"
+        else:
+            reason = self.enter()
+
+        if reason is None:
+            generation = rag_core.active.name  # answer_question이 쓰는 세대 (호출 시점의 active)
+            try:
+                answer = rag_core.answer_question(user_input, history=history)
+            finally:
+                self.leave()
+            # 질의를 다시 쓴 후속 질문은 이전 대화를 프롬프트에 넣어 만든 답변이라 캐시하지 않음
+            if not answer.get("error") and answer.get("query", user_input) == user_input:
+                self.cache.put(user_input, answer, generation)
+            return self._served(answer, "full")
+
+        metrics.reject(reason)
+        return self.degrade(user_input, history, extractive=reason != "rate_limited")
+
+    def degrade(self, user_input, history=None, extractive=True):
+        query, _, _ = rewrite_query(user_input, history)
+        cached = self.cache.get(query, rag_core.active.name)
+        if cached is not None:
+            return self._served(dict(cached, query=query), "cache")
+
+        if extractive and self.extractive_slots.acquire(blocking=False):
+            try:
+                _, unique_docs = rag_core.retrieve_in_context(user_input, history)
+                answer = extractive_answer(query, unique_docs)
+            except Exception:
+                metrics.inc("extractive_error")
+                answer = None
+            finally:
+                self.extractive_slots.release()
+            if answer is not None:
+                return self._served(answer, "extractive")
+
+        return self._served({"content": BUSY_MESSAGE, "citations": [], "query": query}, "busy")
+
+
+admission = Admission()
+if FAQ_ANSWERS and os.path.exists(FAQ_ANSWERS):
+    admission.cache.load(FAQ_ANSWERS, rag_core.active.name)
+
+
+def answer(user_input, session_id=None, history=None):
+    return admission.answer(user_input, session_id, history)
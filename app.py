@@ -1,485 +1,613 @@
-import dash
-from dash import html, dcc, Input, Output, State, callback_context, ALL
-import dash_bootstrap_components as dbc
-from datetime import datetime
-import requests
-import urllib3
-
-# 💡 rag_core 모듈 더미 처리
-try:
-    import rag_core
-except ImportError:
-    class MockRag:
-        def get_ai_response(self, text):
-            return f"**{text}**에 대한 답변입니다. (rag_core 모듈 필요)"
-    rag_core = MockRag()
-
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-
-app = dash.Dash(
-    __name__,
-    external_stylesheets=[dbc.themes.BOOTSTRAP],
-    meta_tags=[{"name": "viewport", "content": "width=device-width, initial-scale=1"}]
-)
-server = app.server
-
-# ---------------------------------------------------
-# 데이터
-# ---------------------------------------------------
-SUBWAY_UP = [
-    "09:04","09:18","09:34","09:53","10:08","10:28","10:45","11:03","11:20",
-    "11:39","11:55","12:13","12:35","12:52","13:12","13:28","13:49","14:07",
-    "14:25","14:43","15:02","15:22","15:38","15:56","16:13","16:28","16:46",
-    "17:03","17:19","17:36","17:53","18:10","18:23","18:41","18:59","19:13",
-    "19:29","19:50","20:04","20:21","20:38","20:57"
-]
-
-SUBWAY_DOWN = [
-    "09:10","09:25","09:42","09:58","10:15","10:32","10:52","11:10","11:29",
-    "11:47","12:05","12:25","12:42","13:00","13:18","13:36","13:55","14:15",
-    "14:35","14:55","15:15","15:35","15:55","16:15","16:32","16:50","17:08",
-    "17:25","17:42","17:58","18:15","18:32","18:50","19:08","19:25","19:45",
-    "20:05","20:25","20:45"
-]
-
-ACADEMIC_CALENDAR = {
-    "11": [("11.03(일)", "수업일수 2/3선")],
-    "12": [("12.08(월) ~ 12(금)", "기말고사"),
-           ("12.15(월)~19(금)", "보강기간"),
-           ("12.22(월)", "동계 계절학기"),
-           ("12.25(목)", "성탄절")],
-    "1":  [("01.01(목)", "신정"),
-           ("01.02(금) ~ 08(목)", "복학 집중신청")],
-    "2":  [("02.03(화) ~ 04(수)", "장바구니 신청"),
-           ("02.10(화) ~ 11(수)", "본 수강신청"),
-           ("02.12(목)", "학위수여식")]
-}
-
-def get_kau_menu():
-    try:
-        requests.get("https://kau.ac.kr/kaulife/foodmenu.php", verify=False, timeout=2)
-        return True
-    except:
-        return False
-
-# ---------------------------------------------------
-# 버튼용 카드 UI 함수들
-# ---------------------------------------------------
-
-def card_food():
-    return html.Div(
-        className="ai-card",
-        children=[
-            html.Div("🍱 오늘의 학생식당 메뉴", className="card-title"),
-            html.Div("학교 홈페이지에서 실시간 식단표를 가져왔습니다.", className="card-desc"),
-            dbc.Button(
-                "이번 주 전체 메뉴 보기",
-                href="https://kau.ac.kr/kaulife/foodmenu.php",
-                target="_blank",
-                className="card-btn-yellow"
-            ),
-        ]
-    )
-
-def card_subway(now, up, down):
-    return html.Div(
-        className="ai-card",
-        children=[
-            html.Div(f"🚇 한국항공대역 실시간 기준 시간표 ({now})", className="card-title"),
-
-            html.Div([
-                html.Div("서울/용산행 (UP)", className="small-title"),
-                html.Div(", ".join(up) if up else "운행 종료", className="time-text"),
-            ], className="mt-2"),
-
-            html.Div([
-                html.Div("일산/문산행 (DOWN)", className="small-title"),
-                html.Div(", ".join(down) if down else "운행 종료", className="time-text"),
-            ], className="mt-2"),
-        ]
-    )
-
-def card_academic():
-    return html.Div(
-        className="ai-card",
-        children=[
-            html.Div("📅 다가오는 주요 학사일정", className="card-title"),
-
-            html.Div([
-                html.Div("12월", className="month-label"),
-                html.Ul([
-                    html.Li("12.08(월) ~ 12(금) : 2학기 기말고사"),
-                    html.Li("12.15(월) ~ 19(금) : 보강 기간"),
-                    html.Li("12.22(월) : 동계 계절학기 개강"),
-                    html.Li("12.25(목) : 성탄절"),
-                ]),
-            ], className="mt-2"),
-
-            html.Div([
-                html.Div("1월 (2026)", className="month-label"),
-                html.Ul([
-                    html.Li("01.01(목) : 신정"),
-                    html.Li("01.02(금) ~ 08(목) : 복학 집중신청"),
-                ]),
-            ], className="mt-2"),
-        ]
-    )
-
-def card_library():
-    return html.Div(
-        className="ai-card",
-        children=[
-            html.Div("📚 실시간 좌석 정보는 아래 링크에서 확인해주세요!", className="card-title"),
-            dbc.Button(
-                "좌석 현황 실시간 보기",
-                href="http://210.119.25.31/Webseat/domian5.asp",
-                target="_blank",
-                className="card-btn-green"
-            ),
-        ]
-    )
-
-# AI 말풍선 하나를 그리는 공통 함수
-def render_ai_message(msg):
-    t = msg.get("type")
-    if t == "food":
-        body = card_food()
-        bubble_child = html.Div(body, className="ai-bubble")
-    elif t == "subway":
-        body = card_subway(msg.get("time", ""), msg.get("up", []), msg.get("down", []))
-        bubble_child = html.Div(body, className="ai-bubble")
-    elif t == "academic":
-        body = card_academic()
-        bubble_child = html.Div(body, className="ai-bubble")
-    elif t == "library":
-        body = card_library()
-        bubble_child = html.Div(body, className="ai-bubble")
-    else:
-        # 기본 텍스트 응답
-        bubble_child = dcc.Markdown(str(msg.get("content", "")), className="ai-bubble")
-
-    return html.Div([
-        html.Img(src="/assets/mascot.png", className="profile-img"),
-        html.Div([
-            html.Div("마하", className="ai-name"),
-            bubble_child
-        ])
-    ], className="message-row ai-row")
-
-# ---------------------------------------------------
-# PC / 모바일 사이드바
-# ---------------------------------------------------
-
-sidebar_tabs = html.Div([
-    html.H4("KAU 챗봇", className="text-primary fw-bold mb-4"),
-
-    dbc.Tabs([
-        dbc.Tab(label="사용법", tab_id="tab-usage", children=[
-            html.P("👋 안녕하세요! 한국항공대 AI 도우미입니다.")
-        ]),
-
-        dbc.Tab(label="지난 기록", tab_id="tab-history", children=[
-            html.Div(
-                id="history-list",
-                className="mt-3",
-                style={"cursor": "pointer", "fontSize": "0.9rem"}
-            ),
-        ]),
-    ], id="tabs-pc", active_tab="tab-usage"),
-
-    html.Div(
-        dbc.Button("🗑 기록 전체 삭제", id="clear-history",
-                   color="danger", className="w-100 mt-3"),
-        id="clear-btn-wrapper-pc",
-        style={"display": "none"}
-    )
-], className="sidebar")
-
-sidebar_tabs_mobile = html.Div([
-    html.H4("KAU 챗봇", className="text-primary fw-bold mb-4"),
-
-    dbc.Tabs([
-        dbc.Tab(label="사용법", tab_id="tab-usage", children=[
-            html.P("👋 안녕하세요! 한국항공대 AI 도우미입니다.")
-        ]),
-
-        dbc.Tab(label="지난 기록", tab_id="tab-history", children=[
-            html.P("기록은 오른쪽 화면에서 선택하세요.",
-                   className="text-muted small mt-3")
-        ]),
-    ], id="tabs-mobile", active_tab="tab-usage"),
-
-    html.Div(
-        dbc.Button("🗑 기록 전체 삭제", id="clear-history-mobile",
-                   color="danger", className="w-100 mt-3"),
-        id="clear-btn-wrapper-mobile",
-        style={"display": "none"}
-    )
-])
-
-# ---------------------------------------------------
-# 레이아웃
-# ---------------------------------------------------
-
-app.layout = dbc.Container([
-    dcc.Store(id='chat-history-store', data=[], storage_type="local"),
-
-    dbc.Offcanvas(
-        [sidebar_tabs_mobile],
-        id="offcanvas",
-        title="메뉴",
-        is_open=False
-    ),
-
-    dbc.Row([
-        dbc.Col([sidebar_tabs], width=3, className="d-none d-md-block p-0"),
-
-        dbc.Col([
-            dbc.Row([
-                dbc.Col([
-                    dbc.Button("☰", id="open-offcanvas", n_clicks=0,
-                               color="link", className="d-md-none",
-                               style={"fontSize": "1.5rem"}),
-                    html.H2("KAU 챗봇 Service",
-                            className="d-inline-block mt-4 mb-4 fw-bold",
-                            style={"color": "#002d62"})
-                ], className="d-flex align-items-center justify-content-center")
-            ]),
-
-            dcc.Loading(
-                id="loading-chat",
-                type="circle",
-                color="#002d62",
-                fullscreen=False,
-                children=html.Div(
-                    id="chat-display",
-                    className="chat-container mb-3"
-                )
-            ),
-
-            html.Div([
-                dbc.Button("🍱 오늘 학식", id="btn-food", size="sm", className="m-1 rounded-pill"),
-                dbc.Button("🚇 지하철시간", id="btn-subway", size="sm", className="m-1 rounded-pill"),
-                dbc.Button("📅 학사일정", id="btn-calendar", size="sm", className="m-1 rounded-pill"),
-                dbc.Button("📚 도서관자리", id="btn-library", size="sm", className="m-1 rounded-pill"),
-            ], className="mb-2 d-flex justify-content-center flex-wrap"),
-
-            dbc.Row([
-                dbc.Col(
-                    dbc.Input(id="user-input", placeholder="질문을 입력하세요...",
-                              type="text", style={"borderRadius": "25px"}),
-                    width=10, xs=9),
-                dbc.Col(
-                    dbc.Button("전송", id="send-btn", color="primary",
-                               className="w-100", style={"borderRadius": "25px"}),
-                    width=2, xs=3),
-            ], className="g-2"),
-
-            html.Div(
-                "※ AI 답변은 부정확할 수 있습니다.",
-                className="text-center text-muted mt-3 mb-4",
-                style={"fontSize": "0.75rem"}
-            )
-        ], width=12, md=9, className="px-4")
-    ])
-], fluid=True)
-
-# ---------------------------------------------------
-# 콜백
-# ---------------------------------------------------
-
-# 1) 모바일 메뉴 토글
-@app.callback(
-    Output("offcanvas", "is_open"),
-    Input("open-offcanvas", "n_clicks"),
-    State("offcanvas", "is_open")
-)
-def toggle_menu(n, is_open):
-    if n:
-        return not is_open
-    return is_open
-
-# 2) 탭에 따라 삭제 버튼 표시 (PC)
-@app.callback(
-    Output("clear-btn-wrapper-pc", "style"),
-    Input("tabs-pc", "active_tab")
-)
-def toggle_clear_btn_pc(active_tab):
-    if active_tab == "tab-history":
-        return {"display": "block"}
-    return {"display": "none"}
-
-# 3) 탭에 따라 삭제 버튼 표시 (모바일)
-@app.callback(
-    Output("clear-btn-wrapper-mobile", "style"),
-    Input("tabs-mobile", "active_tab")
-)
-def toggle_clear_btn_mobile(active_tab):
-    if active_tab == "tab-history":
-        return {"display": "block"}
-    return {"display": "none"}
-
-# 4) 기록 전체 삭제
-@app.callback(
-    Output("chat-history-store", "data", allow_duplicate=True),
-    [Input("clear-history", "n_clicks"),
-     Input("clear-history-mobile", "n_clicks")],
-    prevent_initial_call=True
-)
-def clear_history(pc, mobile):
-    return []
-
-# 5) 지난 기록 목록 생성 (왼쪽 탭 리스트)
-@app.callback(
-    Output("history-list", "children"),
-    Input("chat-history-store", "data")
-)
-def update_history_list(history):
-    if not history:
-        return []
-    return [
-        html.Div(
-            f"• {msg['content']}",
-            className="text-primary mb-2",
-            id={"type": "history-item", "index": i},
-            n_clicks=0
-        )
-        for i, msg in enumerate(history)
-        if msg.get("speaker") == "user"
-    ]
-
-# 6) 지난 기록 클릭 → 대화 한 쌍만 표시
-@app.callback(
-    Output("chat-display", "children", allow_duplicate=True),
-    Input({"type": "history-item", "index": ALL}, "n_clicks"),
-    State("chat-history-store", "data"),
-    prevent_initial_call=True
-)
-def load_history(clicks, history):
-    if not clicks or all(c == 0 for c in clicks):
-        return dash.no_update
-
-    ctx = callback_context
-    if not ctx.triggered:
-        return dash.no_update
-
-    clicked_id = ctx.triggered_id
-    if not clicked_id:
-        return dash.no_update
-
-    idx = clicked_id["index"]
-    if idx >= len(history):
-        return dash.no_update
-
-    user_msg = history[idx]
-    ai_msg = history[idx + 1] if idx + 1 < len(history) else None
-
-    ui = [
-        html.Div(
-            [html.Div(user_msg["content"], className="user-bubble")],
-            className="message-row user-row"
-        )
-    ]
-
-    if ai_msg:
-        ui.append(render_ai_message(ai_msg))
-
-    return ui
-
-# 7) 질문 → 응답 생성 및 전체 채팅 렌더링
-@app.callback(
-    [Output("chat-display", "children", allow_duplicate=True),
-     Output("user-input", "value"),
-     Output("chat-history-store", "data", allow_duplicate=True)],
-    [Input("send-btn", "n_clicks"),
-     Input("user-input", "n_submit"),
-     Input("btn-food", "n_clicks"),
-     Input("btn-subway", "n_clicks"),
-     Input("btn-calendar", "n_clicks"),
-     Input("btn-library", "n_clicks")],
-    [State("user-input", "value"),
-     State("chat-history-store", "data")],
-    prevent_initial_call=True
-)
-def update_chat(send, enter, food, subway, cal, lib, user_input, history):
-    ctx = callback_context
-    if not ctx.triggered:
-        return dash.no_update, "", dash.no_update
-
-    if history is None:
-        history = []
-
-    trigger = ctx.triggered[0]["prop_id"].split(".")[0]
-    user_text = ""
-
-    if trigger in ["send-btn", "user-input"]:
-        user_text = user_input
-    elif trigger == "btn-food":
-        user_text = "오늘 학식 뭐야?"
-    elif trigger == "btn-subway":
-        user_text = "지하철 시간표 알려줘"
-    elif trigger == "btn-calendar":
-        user_text = "학사일정 알려줘"
-    elif trigger == "btn-library":
-        user_text = "도서관 자리 있어?"
-
-    if not user_text:
-        return dash.no_update, "", dash.no_update
-
-    # 사용자 메시지 저장
-    history.append({"speaker": "user", "content": user_text})
-
-    # AI 응답 생성 (type 기반)
-    ai_entry = {"speaker": "ai"}
-
-    if "학식" in user_text:
-        get_kau_menu()
-        ai_entry["type"] = "food"
-
-    elif "지하철" in user_text:
-        now = datetime.now().strftime("%H:%M")
-        up = [t for t in SUBWAY_UP if t > now][:3]
-        down = [t for t in SUBWAY_DOWN if t > now][:3]
-        ai_entry.update({
-            "type": "subway",
-            "time": now,
-            "up": up,
-            "down": down
-        })
-
-    elif "도서관" in user_text:
-        ai_entry["type"] = "library"
-
-    elif "학사" in user_text or "일정" in user_text:
-        ai_entry["type"] = "academic"
-
-    else:
-        try:
-            text = rag_core.get_ai_response(user_text)
-        except Exception:
-            text = "오류가 발생했습니다."
-        ai_entry.update({
-            "type": "text",
-            "content": text
-        })
-
-    history.append(ai_entry)
-
-    # 화면 다시 그리기
-    chat_view = []
-    for msg in history:
-        if msg.get("speaker") == "user":
-            chat_view.append(
-                html.Div(
-                    [html.Div(msg["content"], className="user-bubble")],
-                    className="message-row user-row"
-                )
-            )
-        else:
-            chat_view.append(render_ai_message(msg))
-
-    return chat_view, "", history
-
-
-if __name__ == "__main__":
-    app.run(debug=True)
+import os
+import json
+import hmac
+import uuid
+import dash
+from dash import html, dcc, Input, Output, State, callback_context, ALL, ClientsideFunction
+from flask import request, jsonify, Response
+import dash_bootstrap_components as dbc
+from datetime import datetime
+from functools import lru_cache
+import requests
+import urllib3
+from plotly.utils import PlotlyJSONEncoder
+
+import metrics
+
+# 💡 rag_core 모듈 더미 처리
+try:
+    import rag_core
+    import admission  # 과부하 시 입장 제어 (캐시 → 검색 발췌 → 안내 메시지 순으로 저하)
+except ImportError:
+    admission = None
+
+    class MockRag:
+        def get_ai_response(self, text):
+            return f"**{text}**에 대한 답변입니다. (rag_core 모듈 필요)"
+
+        def answer_question(self, text, history=None):
+            return {"content": self.get_ai_response(text), "citations": []}
+    rag_core = MockRag()
+
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+app = dash.Dash(
+    __name__,
+    external_stylesheets=[dbc.themes.BOOTSTRAP],
+    meta_tags=[{"name": "viewport", "content": "width=device-width, initial-scale=1"}]
+)
+server = app.server
+
+# ---------------------------------------------------
+# 모니터링: Prometheus 지표 (KAU_METRICS=1일 때만)
+# ---------------------------------------------------
+@server.route("/metrics")
+def prometheus_metrics():
+    if not metrics.METRICS_ENABLED:
+        return Response("metrics disabled\n", status=404, mimetype="text/plain")
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+# ---------------------------------------------------
+# 관리자: 인덱스 세대 무중단 교체
+# ---------------------------------------------------
+ADMIN_TOKEN = os.environ.get("KAU_ADMIN_TOKEN")
+
+# gunicorn preload 모드에서는 fork 이후 각 워커에서 시작 (gunicorn.conf.py의 post_fork)
+if hasattr(rag_core, "start_index_watcher") and os.environ.get("KAU_INDEX_WATCHER", "1") == "1":
+    rag_core.start_index_watcher()
+
+
+@server.route("/admin/reload-index", methods=["POST"])
+def admin_reload_index():
+    # KAU_ADMIN_TOKEN이 없으면 항상 거부 (리버스 프록시 뒤에서는 모든 요청이 127.0.0.1에서 온 것으로 보임)
+    if not ADMIN_TOKEN:
+        return jsonify({"error": "KAU_ADMIN_TOKEN not configured"}), 403
+    if not hmac.compare_digest(request.headers.get("X-Admin-Token", ""), ADMIN_TOKEN):
+        return jsonify({"error": "forbidden"}), 403
+
+    if not hasattr(rag_core, "start_reload"):
+        return jsonify({"error": "rag_core not loaded"}), 503
+
+    # 로드는 백그라운드에서 진행, 끝나면 원자적으로 교체됨. 이미 진행 중이면 새로 시작하지 않음
+    force = request.args.get("force") == "1"
+    if not rag_core.start_reload(force):
+        return jsonify({"status": "already_reloading", "active": rag_core.active.name}), 409
+    return jsonify({"status": "reloading", "active": rag_core.active.name}), 202
+
+
+# ---------------------------------------------------
+# 데이터
+# ---------------------------------------------------
+SUBWAY_UP = [
+    "09:04","09:18","09:34","09:53","10:08","10:28","10:45","11:03","11:20",
+    "11:39","11:55","12:13","12:35","12:52","13:12","13:28","13:49","14:07",
+    "14:25","14:43","15:02","15:22","15:38","15:56","16:13","16:28","16:46",
+    "17:03","17:19","17:36","17:53","18:10","18:23","18:41","18:59","19:13",
+    "19:29","19:50","20:04","20:21","20:38","20:57"
+]
+
+SUBWAY_DOWN = [
+    "09:10","09:25","09:42","09:58","10:15","10:32","10:52","11:10","11:29",
+    "11:47","12:05","12:25","12:42","13:00","13:18","13:36","13:55","14:15",
+    "14:35","14:55","15:15","15:35","15:55","16:15","16:32","16:50","17:08",
+    "17:25","17:42","17:58","18:15","18:32","18:50","19:08","19:25","19:45",
+    "20:05","20:25","20:45"
+]
+
+ACADEMIC_CALENDAR = {
+    "11": [("11.03(일)", "수업일수 2/3선")],
+    "12": [("12.08(월) ~ 12(금)", "기말고사"),
+           ("12.15(월)~19(금)", "보강기간"),
+           ("12.22(월)", "동계 계절학기"),
+           ("12.25(목)", "성탄절")],
+    "1":  [("01.01(목)", "신정"),
+           ("01.02(금) ~ 08(목)", "복학 집중신청")],
+    "2":  [("02.03(화) ~ 04(수)", "장바구니 신청"),
+           ("02.10(화) ~ 11(수)", "본 수강신청"),
+           ("02.12(목)", "학위수여식")]
+}
+
+def get_kau_menu():
+    try:
+        requests.get("https://kau.ac.kr/kaulife/foodmenu.php", verify=False, timeout=2)
+        return True
+    except:
+        return False
+
+# ---------------------------------------------------
+# 버튼용 카드 UI 함수들
+# ---------------------------------------------------
+
+def card_food():
+    return html.Div(
+        className="ai-card",
+        children=[
+            html.Div("🍱 오늘의 학생식당 메뉴", className="card-title"),
+            html.Div("학교 홈페이지에서 실시간 식단표를 가져왔습니다.", className="card-desc"),
+            dbc.Button(
+                "이번 주 전체 메뉴 보기",
+                href="https://kau.ac.kr/kaulife/foodmenu.php",
+                target="_blank",
+                className="card-btn-yellow"
+            ),
+        ]
+    )
+
+def card_subway(now, up, down):
+    return html.Div(
+        className="ai-card",
+        children=[
+            html.Div(f"🚇 한국항공대역 실시간 기준 시간표 ({now})", className="card-title"),
+
+            html.Div([
+                html.Div("서울/용산행 (UP)", className="small-title"),
+                html.Div(", ".join(up) if up else "운행 종료", className="time-text"),
+            ], className="mt-2"),
+
+            html.Div([
+                html.Div("일산/문산행 (DOWN)", className="small-title"),
+                html.Div(", ".join(down) if down else "운행 종료", className="time-text"),
+            ], className="mt-2"),
+        ]
+    )
+
+def card_academic():
+    return html.Div(
+        className="ai-card",
+        children=[
+            html.Div("📅 다가오는 주요 학사일정", className="card-title"),
+
+            html.Div([
+                html.Div("12월", className="month-label"),
+                html.Ul([
+                    html.Li("12.08(월) ~ 12(금) : 2학기 기말고사"),
+                    html.Li("12.15(월) ~ 19(금) : 보강 기간"),
+                    html.Li("12.22(월) : 동계 계절학기 개강"),
+                    html.Li("12.25(목) : 성탄절"),
+                ]),
+            ], className="mt-2"),
+
+            html.Div([
+                html.Div("1월 (2026)", className="month-label"),
+                html.Ul([
+                    html.Li("01.01(목) : 신정"),
+                    html.Li("01.02(금) ~ 08(목) : 복학 집중신청"),
+                ]),
+            ], className="mt-2"),
+        ]
+    )
+
+def card_library():
+    return html.Div(
+        className="ai-card",
+        children=[
+            html.Div("📚 실시간 좌석 정보는 아래 링크에서 확인해주세요!", className="card-title"),
+            dbc.Button(
+                "좌석 현황 실시간 보기",
+                href="http://210.119.25.31/Webseat/domian5.asp",
+                target="_blank",
+                className="card-btn-green"
+            ),
+        ]
+    )
+
+# 답변 출처 꼬리말: 같은 출처 묶음은 한 번 만든 컴포넌트를 재사용
+def citation_key(citations):
+    return tuple(
+        (c.get("title", ""), c.get("url", ""), tuple(tuple(a) for a in c.get("attachments", [])))
+        for c in citations or []
+    )
+
+@lru_cache(maxsize=1024)
+def source_footer(key):
+    items = []
+    for title, url, attachments in key:
+        if url:
+            items.append(html.Li(html.A(title, href=url, target="_blank")))
+        for fname, furl in attachments:
+            items.append(html.Li(html.A(f"📁 {fname}", href=furl, target="_blank")))
+    if not items:
+        return None
+    return html.Div([html.Hr(), html.Strong("참고한 출처:"), html.Ul(items)], className="source-footer")
+
+@lru_cache(maxsize=1024)
+def text_bubble(content, key):
+    footer = source_footer(key)
+    if footer is None:
+        return dcc.Markdown(content, className="ai-bubble")
+    return html.Div([dcc.Markdown(content), footer], className="ai-bubble")
+
+# 사용자 말풍선
+def render_user_message(content):
+    return html.Div(
+        [html.Div(content, className="user-bubble")],
+        className="message-row user-row"
+    )
+
+# AI 말풍선 하나를 그리는 공통 함수
+def render_ai_message(msg):
+    t = msg.get("type")
+    if t == "food":
+        body = card_food()
+        bubble_child = html.Div(body, className="ai-bubble")
+    elif t == "subway":
+        body = card_subway(msg.get("time", ""), msg.get("up", []), msg.get("down", []))
+        bubble_child = html.Div(body, className="ai-bubble")
+    elif t == "academic":
+        body = card_academic()
+        bubble_child = html.Div(body, className="ai-bubble")
+    elif t == "library":
+        body = card_library()
+        bubble_child = html.Div(body, className="ai-bubble")
+    else:
+        # 기본 텍스트 응답 (예전 기록은 출처가 content 안에 Markdown으로 들어 있음)
+        bubble_child = text_bubble(str(msg.get("content", "")), citation_key(msg.get("citations")))
+
+    return html.Div([
+        html.Img(src="/assets/mascot.png", className="profile-img"),
+        html.Div([
+            html.Div("마하", className="ai-name"),
+            bubble_child
+        ])
+    ], className="message-row ai-row")
+
+# ---------------------------------------------------
+# 빠른 버튼 카드 (브라우저에서 바로 그림, assets/quick_cards.js)
+# ---------------------------------------------------
+QUICK_BUTTONS = {
+    "btn-food": ("오늘 학식 뭐야?", {"type": "food"}),
+    "btn-subway": ("지하철 시간표 알려줘", {"type": "subway"}),
+    "btn-calendar": ("학사일정 알려줘", {"type": "academic"}),
+    "btn-library": ("도서관 자리 있어?", {"type": "library"}),
+}
+
+def component_json(component):
+    return json.loads(json.dumps(component, cls=PlotlyJSONEncoder))
+
+def quick_card_data():
+    # 버튼별 질문 + 미리 그려 둔 말풍선 JSON. 지하철 카드는 시각/열차 자리를 비워 둔 틀
+    buttons = {}
+    for button_id, (question, entry) in QUICK_BUTTONS.items():
+        preview = entry
+        if entry["type"] == "subway":
+            preview = dict(entry, time="__NOW__", up=["__UP__"], down=["__DOWN__"])
+        buttons[button_id] = {
+            "question": question,
+            "entry": entry,
+            "user_row": component_json(render_user_message(question)),
+            "ai_row": component_json(render_ai_message(preview)),
+        }
+    return {"buttons": buttons, "timetable": {"up": SUBWAY_UP, "down": SUBWAY_DOWN}}
+
+# ---------------------------------------------------
+# PC / 모바일 사이드바
+# ---------------------------------------------------
+
+sidebar_tabs = html.Div([
+    html.H4("KAU 챗봇", className="text-primary fw-bold mb-4"),
+
+    dbc.Tabs([
+        dbc.Tab(label="사용법", tab_id="tab-usage", children=[
+            html.P("👋 안녕하세요! 한국항공대 AI 도우미입니다.")
+        ]),
+
+        dbc.Tab(label="지난 기록", tab_id="tab-history", children=[
+            html.Div(
+                id="history-list",
+                className="mt-3",
+                style={"cursor": "pointer", "fontSize": "0.9rem"}
+            ),
+        ]),
+    ], id="tabs-pc", active_tab="tab-usage"),
+
+    html.Div(
+        dbc.Button("🗑 기록 전체 삭제", id="clear-history",
+                   color="danger", className="w-100 mt-3"),
+        id="clear-btn-wrapper-pc",
+        style={"display": "none"}
+    )
+], className="sidebar")
+
+sidebar_tabs_mobile = html.Div([
+    html.H4("KAU 챗봇", className="text-primary fw-bold mb-4"),
+
+    dbc.Tabs([
+        dbc.Tab(label="사용법", tab_id="tab-usage", children=[
+            html.P("👋 안녕하세요! 한국항공대 AI 도우미입니다.")
+        ]),
+
+        dbc.Tab(label="지난 기록", tab_id="tab-history", children=[
+            html.P("기록은 오른쪽 화면에서 선택하세요.",
+                   className="text-muted small mt-3")
+        ]),
+    ], id="tabs-mobile", active_tab="tab-usage"),
+
+    html.Div(
+        dbc.Button("🗑 기록 전체 삭제", id="clear-history-mobile",
+                   color="danger", className="w-100 mt-3"),
+        id="clear-btn-wrapper-mobile",
+        style={"display": "none"}
+    )
+])
+
+# ---------------------------------------------------
+# 레이아웃
+# ---------------------------------------------------
+
+app.layout = dbc.Container([
+    dcc.Store(id='chat-history-store', data=[], storage_type="local"),
+    dcc.Store(id='quick-cards', data=quick_card_data()),
+    dcc.Store(id='session-id', storage_type="session"),  # 세션별 질문 속도 제한용
+
+    dbc.Offcanvas(
+        [sidebar_tabs_mobile],
+        id="offcanvas",
+        title="메뉴",
+        is_open=False
+    ),
+
+    dbc.Row([
+        dbc.Col([sidebar_tabs], width=3, className="d-none d-md-block p-0"),
+
+        dbc.Col([
+            dbc.Row([
+                dbc.Col([
+                    dbc.Button("☰", id="open-offcanvas", n_clicks=0,
+                               color="link", className="d-md-none",
+                               style={"fontSize": "1.5rem"}),
+                    html.H2("KAU 챗봇 Service",
+                            className="d-inline-block mt-4 mb-4 fw-bold",
+                            style={"color": "#002d62"})
+                ], className="d-flex align-items-center justify-content-center")
+            ]),
+
+            dcc.Loading(
+                id="loading-chat",
+                type="circle",
+                color="#002d62",
+                fullscreen=False,
+                children=html.Div(
+                    id="chat-display",
+                    className="chat-container mb-3"
+                )
+            ),
+
+            html.Div([
+                dbc.Button("🍱 오늘 학식", id="btn-food", size="sm", className="m-1 rounded-pill"),
+                dbc.Button("🚇 지하철시간", id="btn-subway", size="sm", className="m-1 rounded-pill"),
+                dbc.Button("📅 학사일정", id="btn-calendar", size="sm", className="m-1 rounded-pill"),
+                dbc.Button("📚 도서관자리", id="btn-library", size="sm", className="m-1 rounded-pill"),
+            ], className="mb-2 d-flex justify-content-center flex-wrap"),
+
+            dbc.Row([
+                dbc.Col(
+                    dbc.Input(id="user-input", placeholder="질문을 입력하세요...",
+                              type="text", style={"borderRadius": "25px"}),
+                    width=10, xs=9),
+                dbc.Col(
+                    dbc.Button("전송", id="send-btn", color="primary",
+                               className="w-100", style={"borderRadius": "25px"}),
+                    width=2, xs=3),
+            ], className="g-2"),
+
+            html.Div(
+                "※ AI 답변은 부정확할 수 있습니다.",
+                className="text-center text-muted mt-3 mb-4",
+                style={"fontSize": "0.75rem"}
+            )
+        ], width=12, md=9, className="px-4")
+    ])
+], fluid=True)
+
+# ---------------------------------------------------
+# 콜백
+# ---------------------------------------------------
+
+# 1) 모바일 메뉴 토글
+@app.callback(
+    Output("offcanvas", "is_open"),
+    Input("open-offcanvas", "n_clicks"),
+    State("offcanvas", "is_open")
+)
+def toggle_menu(n, is_open):
+    if n:
+        return not is_open
+    return is_open
+
+# 2) 탭에 따라 삭제 버튼 표시 (PC)
+@app.callback(
+    Output("clear-btn-wrapper-pc", "style"),
+    Input("tabs-pc", "active_tab")
+)
+def toggle_clear_btn_pc(active_tab):
+    if active_tab == "tab-history":
+        return {"display": "block"}
+    return {"display": "none"}
+
+# 3) 탭에 따라 삭제 버튼 표시 (모바일)
+@app.callback(
+    Output("clear-btn-wrapper-mobile", "style"),
+    Input("tabs-mobile", "active_tab")
+)
+def toggle_clear_btn_mobile(active_tab):
+    if active_tab == "tab-history":
+        return {"display": "block"}
+    return {"display": "none"}
+
+# 4) 기록 전체 삭제
+@app.callback(
+    Output("chat-history-store", "data", allow_duplicate=True),
+    [Input("clear-history", "n_clicks"),
+     Input("clear-history-mobile", "n_clicks")],
+    prevent_initial_call=True
+)
+def clear_history(pc, mobile):
+    return []
+
+# 5) 지난 기록 목록 생성 (왼쪽 탭 리스트)
+@app.callback(
+    Output("history-list", "children"),
+    Input("chat-history-store", "data")
+)
+def update_history_list(history):
+    if not history:
+        return []
+    return [
+        html.Div(
+            f"• {msg['content']}",
+            className="text-primary mb-2",
+            id={"type": "history-item", "index": i},
+            n_clicks=0
+        )
+        for i, msg in enumerate(history)
+        if msg.get("speaker") == "user"
+    ]
+
+# 6) 지난 기록 클릭 → 대화 한 쌍만 표시
+@app.callback(
+    Output("chat-display", "children", allow_duplicate=True),
+    Input({"type": "history-item", "index": ALL}, "n_clicks"),
+    State("chat-history-store", "data"),
+    prevent_initial_call=True
+)
+def load_history(clicks, history):
+    metrics.inc("history_click")
+    if not clicks or all(c == 0 for c in clicks):
+        return dash.no_update
+
+    ctx = callback_context
+    if not ctx.triggered:
+        return dash.no_update
+
+    clicked_id = ctx.triggered_id
+    if not clicked_id:
+        return dash.no_update
+
+    idx = clicked_id["index"]
+    if idx >= len(history):
+        return dash.no_update
+
+    user_msg = history[idx]
+    ai_msg = history[idx + 1] if idx + 1 < len(history) else None
+
+    ui = [render_user_message(user_msg["content"])]
+
+    if ai_msg:
+        ui.append(render_ai_message(ai_msg))
+
+    return ui
+
+# 7) 빠른 버튼 → 카드 (clientside, 서버 요청 없음)
+app.clientside_callback(
+    ClientsideFunction(namespace="cards", function_name="quick"),
+    [Output("chat-display", "children", allow_duplicate=True),
+     Output("chat-history-store", "data", allow_duplicate=True)],
+    [Input("btn-food", "n_clicks"),
+     Input("btn-subway", "n_clicks"),
+     Input("btn-calendar", "n_clicks"),
+     Input("btn-library", "n_clicks")],
+    [State("quick-cards", "data"),
+     State("chat-display", "children"),
+     State("chat-history-store", "data")],
+    prevent_initial_call=True
+)
+
+# 8) 질문 → 응답 생성 및 전체 채팅 렌더링
+@app.callback(
+    [Output("chat-display", "children", allow_duplicate=True),
+     Output("user-input", "value"),
+     Output("chat-history-store", "data", allow_duplicate=True),
+     Output("session-id", "data")],
+    [Input("send-btn", "n_clicks"),
+     Input("user-input", "n_submit")],
+    [State("user-input", "value"),
+     State("chat-history-store", "data"),
+     State("session-id", "data")],
+    prevent_initial_call=True
+)
+def update_chat(send, enter, user_input, history, session_id):
+    new_session = None
+    if not session_id:
+        session_id = new_session = uuid.uuid4().hex
+    with metrics.request("update_chat"):
+        chat_view, value, history = _update_chat(user_input, history, session_id)
+    return chat_view, value, history, new_session or dash.no_update
+
+
+def _update_chat(user_input, history, session_id=None):
+    ctx = callback_context
+    if not ctx.triggered:
+        return dash.no_update, "", dash.no_update
+
+    if history is None:
+        history = []
+
+    user_text = user_input
+
+    if not user_text:
+        return dash.no_update, "", dash.no_update
+
+    # 사용자 메시지 저장
+    history.append({"speaker": "user", "content": user_text})
+
+    # AI 응답 생성 (type 기반, 직접 입력한 질문에 키워드가 있으면 카드로 답함)
+    ai_entry = {"speaker": "ai"}
+
+    if "학식" in user_text:
+        get_kau_menu()
+        ai_entry["type"] = "food"
+
+    elif "지하철" in user_text:
+        now = datetime.now().strftime("%H:%M")
+        up = [t for t in SUBWAY_UP if t > now][:3]
+        down = [t for t in SUBWAY_DOWN if t > now][:3]
+        ai_entry.update({
+            "type": "subway",
+            "time": now,
+            "up": up,
+            "down": down
+        })
+
+    elif "도서관" in user_text:
+        ai_entry["type"] = "library"
+
+    elif "학사" in user_text or "일정" in user_text:
+        ai_entry["type"] = "academic"
+
+    else:
+        try:
+            # 이전 대화를 같이 넘겨 "그럼 그거 신청은?" 같은 후속 질문도 검색되도록 함
+            if admission:
+                answer = admission.answer(user_text, session_id, history=history[:-1])
+            else:
+                answer = rag_core.answer_question(user_text, history=history[:-1])
+        except Exception:
+            metrics.inc("chat_error")
+            answer = {"content": "오류가 발생했습니다.", "citations": []}
+        if answer.get("query", user_text) != user_text:
+            history[-1]["query"] = answer["query"]  # 다음 후속 질문이 이 검색 결과를 재사용할 때의 키
+        ai_entry.update({
+            "type": "text",
+            "content": answer["content"],
+            "citations": answer["citations"]
+        })
+        if answer.get("tier", "full") != "full":
+            ai_entry["tier"] = answer["tier"]  # 과부하로 저하된 응답 (cache / extractive / busy)
+
+    history.append(ai_entry)
+
+    # 화면 다시 그리기
+    with metrics.stage("render"):
+        chat_view = []
+        for msg in history:
+            if msg.get("speaker") == "user":
+                chat_view.append(render_user_message(msg["content"]))
+            else:
+                chat_view.append(render_ai_message(msg))
+
+    return chat_view, "", history
+
+
+if __name__ == "__main__":
+    app.run(debug=True)
@@ -0,0 +1,133 @@
+# articles.py (크롤러 → 인덱서 공용 게시글 레코드 포맷)
+#
+# 게시글 하나 = JSONL 한 줄
+#   {"seq": "9897", "board": "s1201", "posted_at": "2025-11-03", "url": "...", "title": "...", "content": "...",
+#    "attachments": [{"filename": "...", "url": "..."}], "image_urls": [...], "crawled_at": "..."}
+import os
+import re
+import json
+import glob
+import time
+import threading
+from datetime import datetime
+
+ARTICLES_PATH = "articles.jsonl"
+
+_append_lock = threading.Lock()
+seq_regex = re.compile(r"seq=(\d+)")
+board_regex = re.compile(r"code=(\w+)")
+
+
+def make_article(url, title, content, attachments=None, image_urls=None, posted_at=None):
+    seq_match = seq_regex.search(url)
+    board_match = board_regex.search(url)
+    return {
+        "seq": seq_match.group(1) if seq_match else None,
+        "board": board_match.group(1) if board_match else None,
+        "posted_at": posted_at,  # "YYYY-MM-DD" (게시일, 알 수 없으면 None)
+        "url": url,
+        "title": title,
+        "content": content,
+        "attachments": attachments or [],
+        "image_urls": image_urls or [],
+        "crawled_at": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def citation_entry(title, url, attachments=()):
+    # 답변 하단 "참고한 출처" 항목. 인덱싱 때 게시글마다 한 번 만들어 chunk metadata에 저장
+    # attachments: (파일명, URL) 목록
+    return {
+        "title": title or "제목 없음",
+        "url": url or "",
+        "attachments": [[name, file_url] for name, file_url in attachments],
+    }
+
+
+def append_article(article, path=ARTICLES_PATH):
+    # 한 줄을 한 번에 쓰고 flush → 인덱서가 반쯤 쓰인 줄을 읽지 않도록 함
+    line = json.dumps(article, ensure_ascii=False) + "\n"
+    with _append_lock:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def read_articles(path=ARTICLES_PATH, offset=0):
+    # (레코드, 다음 오프셋)을 순서대로 돌려줌. 끝에 개행 없는 미완성 줄은 다음에 다시 읽음
+    if not os.path.exists(path):
+        return
+    with open(path, "rb") as f:
+        f.seek(offset)
+        for raw in iter(f.readline, b""):
+            if not raw.endswith(b"\n"):
+                break
+            offset += len(raw)
+            raw = raw.strip()
+            if not raw:
+                continue
+            try:
+                yield json.loads(raw.decode("utf-8")), offset
+            except ValueError as e:
+                print(f"    -> ⚠️ 손상된 레코드 건너뜀 (offset {offset}): {e}")
+
+
+def follow_articles(path=ARTICLES_PATH, offset=0, poll_interval=10):
+    # tail -f 처럼 새로 추가되는 레코드를 계속 돌려줌
+    while True:
+        got_any = False
+        for article, offset in read_articles(path, offset):
+            got_any = True
+            yield article, offset
+        if not got_any:
+            yield None, offset
+            time.sleep(poll_interval)
+
+
+# ----------------------------
+# 예전 cleaned_texts/*.txt 포맷 변환
+# ----------------------------
+url_regex = re.compile(r"^출처 URL: (https?://[^\s]+)")
+title_regex = re.compile(r"^제목: (.+)")
+image_url_regex = re.compile(r"^이미지 URL: (.+)")
+attachment_regex = re.compile(r"^첨부파일: (.+)")
+separator = "=" * 40
+
+
+def parse_legacy_text(content):
+    parts = content.split(separator, 1)
+    if len(parts) > 1:
+        metadata_part, page_content = parts[0], parts[1].strip()
+    else:
+        metadata_part, page_content = "", content
+
+    source_url, title, image_urls, attachments = "출처 없음", "제목 없음", [], []
+
+    for line in metadata_part.split("\n"):
+        if url_match := url_regex.search(line):
+            source_url = url_match.group(1)
+        if title_match := title_regex.search(line):
+            title = title_match.group(1)
+        if image_match := image_url_regex.search(line):
+            image_urls = image_match.group(1).split(";")
+        if attachment_match := attachment_regex.search(line):
+            for item in attachment_match.group(1).split(";"):
+                item_parts = item.split("|")
+                if len(item_parts) == 2:
+                    attachments.append({"filename": item_parts[0], "url": item_parts[1]})
+
+    return make_article(source_url, title, page_content, attachments, image_urls)
+
+
+def import_legacy_texts(folder="cleaned_texts", path=ARTICLES_PATH):
+    txt_files = sorted(glob.glob(os.path.join(folder, "*.txt")))
+    count = 0
+    for file_path in txt_files:
+        with open(file_path, "r", encoding="utf-8") as f:
+            article = parse_legacy_text(f.read())
+        if article["content"]:
+            append_article(article, path)
+            count += 1
+    print(f"'{folder}'의 .txt {count}개를 '{path}'로 변환했습니다.")
+    return count
@@ -1,278 +1,454 @@
-import requests
-from bs4 import BeautifulSoup
-import os
-import re
-import time
-from collections import deque
-from urllib.parse import urljoin, urlparse
-import base64
-import google.generativeai as genai
-from dotenv import load_dotenv
-from PIL import Image, ImageFile
-import io
-
-ImageFile.LOAD_TRUNCATED_IMAGES = True
-
-# ----------------------------
-# 1. API 키 및 모델 로드
-# ----------------------------
-load_dotenv()
-API_KEY = os.environ.get("GOOGLE_API_KEY")
-if not API_KEY:
-    print("오류: .env 파일에 GOOGLE_API_KEY가 없습니다.")
-    exit()
-
-genai.configure(api_key=API_KEY)
-
-OCR_MODEL = genai.GenerativeModel('gemini-2.5-pro')
-OCR_PROMPT = """
-이 이미지는 공지사항 문서입니다.
-이미지 상단부터 하단까지, 눈에 보이는 모든 텍스트를 순서대로 빠짐없이 추출해주세요.
-배경색이 다르더라도 모든 영역의 텍스트를 포함해야 합니다.
-설명이나 요약 없이, 추출된 텍스트 원본만 제공해주세요.
-"""
-
-
-# ----------------------------
-# 2. 텍스트 클린 함수
-# ----------------------------
-def clean_text(text):
-    text = re.sub(r'\n\s*\n', '\n', text)
-    lines = [line.strip() for line in text.split('\n')]
-    cleaned_lines = [line for line in lines if len(line) > 5]
-    return "\n".join(cleaned_lines)
-
-
-# ----------------------------
-# 3. Gemini OCR 함수
-# ----------------------------
-def ocr_with_gemini(image_url, headers):
-    try:
-        image_content = None
-
-        if image_url.startswith('data:image'):
-            print(f"    -> 🖼️ 데이터 URL 처리 시도...")
-            header, encoded = image_url.split(',', 1)
-            image_content = base64.b64decode(encoded)
-        else:
-            print(f"    -> 🖼️ 웹 이미지 처리 시도: {image_url[:70]}...")
-            response = requests.get(image_url, headers=headers, stream=True, timeout=15)
-            response.raise_for_status()
-            image_content = response.content
-
-        if not image_content:
-            return None
-
-        img = Image.open(io.BytesIO(image_content))
-
-        # 이미지 모드 처리
-        if img.mode in ('RGBA', 'LA'):
-            print("    -> 💡 투명도(PNG) 감지. 흰색 배경으로 병합합니다.")
-            background = Image.new("RGB", img.size, (255, 255, 255))
-            background.paste(img, (0, 0), img)
-            img = background
-        elif img.mode != 'RGB':
-            print(f"    -> 💡 이미지 모드({img.mode})를 RGB로 변환합니다.")
-            img = img.convert('RGB')
-
-        print(f"    -> 🤖 Gemini OCR 시도...")
-        response = OCR_MODEL.generate_content([OCR_PROMPT, img])
-        time.sleep(1)
-
-        extracted_text = response.text.strip()
-        if extracted_text and len(extracted_text) > 5:
-            print("    -> ✅ Gemini OCR 성공")
-            return extracted_text
-        else:
-            print("    -> ℹ️ Gemini OCR 결과 텍스트 없음")
-            return None
-
-    except Exception as e:
-        print(f"    -> ❌ Gemini OCR 처리 실패! 오류 타입: {e.__class__.__name__}, 메시지: {e}")
-        return None
-
-
-# ----------------------------
-# 4. 본문 + 이미지 + 첨부파일 추출 함수
-# ----------------------------
-def extract_content_from_soup(soup, url):
-    try:
-        title = soup.select_one('div.view_header h4').get_text(strip=True)
-
-        content_area = soup.select_one('div.view_conts')
-        main_text, image_urls = "", []
-
-        if content_area:
-
-            # 이미지 수집
-            for img_tag in content_area.select('img[src]'):
-                image_urls.append(urljoin(url, img_tag['src']))
-
-            # script/style 제거
-            for tag in content_area.find_all(['script', 'style']):
-                tag.decompose()
-
-            # ----------------------------
-            # ⚡ 새 로직: 본문 + 테이블을 원래 순서대로 조합
-            # ----------------------------
-            result_lines = []
-
-            for elem in content_area.children:
-                # 텍스트 요소일 경우
-                if elem.name is None:
-                    text = elem.strip()
-                    if text:
-                        result_lines.append(text)
-
-                # 테이블일 경우 → 테이블 파싱해서 삽입
-                elif elem.name == "table":
-                    table_rows = []
-                    for tr in elem.find_all("tr"):
-                        cols = []
-                        for td in tr.find_all(["td", "th"]):
-                            cell = td.get_text(separator=" ", strip=True)
-                            cell = re.sub(r'\s+', ' ', cell)
-                            cols.append(cell)
-                        if cols:
-                            table_rows.append(" | ".join(cols))
-                    if table_rows:
-                        result_lines.append("\n".join(table_rows))
-
-                # p, div 등 다른 태그의 텍스트 처리
-                else:
-                    text = elem.get_text(separator="\n", strip=True)
-                    if text:
-                        result_lines.append(text)
-
-            # 최종 main_text 구성
-            main_text = "\n".join(result_lines)
-
-        # 첨부파일
-        attachments = []
-
-        attachment_li = soup.select_one('li.attatch a[href]')
-        if attachment_li:
-            attachments.append({
-                'filename': attachment_li.get_text(strip=True),
-                'url': urljoin(url, attachment_li['href'])
-            })
-
-        file_list_area = soup.select_one('div.view_file')
-        if file_list_area:
-            for link_tag in file_list_area.select('a[href]'):
-                attachments.append({
-                    'filename': link_tag.get_text(strip=True),
-                    'url': urljoin(url, link_tag['href'])
-                })
-
-        return title, main_text or '본문 없음', image_urls, attachments
-
-    except Exception as e:
-        print(f"       -> ❌ 웹 페이지 파싱 오류: {e}")
-        return "제목 없음", "본문 없음", [], []
-
-   
-
-# ----------------------------
-# 5. 크롤링 함수
-# ----------------------------
-def start_crawling(start_url, headers, output_folder="cleaned_texts", max_pages=100):
-    os.makedirs(output_folder, exist_ok=True)
-    queue = deque([start_url])
-    visited_urls = {start_url}
-    page_count = 0
-
-    base_netloc = urlparse(start_url).netloc
-    allowed_patterns = ['acdnoti.php', 'notice.php']
-
-    while queue and page_count < max_pages:
-        current_url = queue.popleft()
-
-        print(f"\n➡️  페이지 방문/수집: {current_url}")
-        try:
-            response = requests.get(current_url, headers=headers, timeout=10)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-        except Exception as e:
-            print(f"    -> ❌ 페이지 방문 오류: {e}")
-            continue
-
-        # ----------------------------
-        # 게시글 읽기 모드일 때 처리
-        # ----------------------------
-        if 'mode=read' in current_url:
-            title, main_text, image_urls, attachments = extract_content_from_soup(soup, current_url)
-            print(f"    -> ✅ [{page_count + 1}/{max_pages}] 게시물 처리: {title[:30]}...")
-
-            ocr_texts = []
-            for img_url in image_urls:
-                if img_url and urlparse(img_url).scheme in ['http', 'https', 'data']:
-                    ocr_result = ocr_with_gemini(img_url, headers)
-                    if ocr_result:
-                        ocr_texts.append(ocr_result)
-
-            # OCR 텍스트 포함
-            full_content = main_text
-            if ocr_texts:
-                full_content += "\n\n--- 이미지 추출 텍스트 (Gemini OCR) ---\n"
-                full_content += "\n".join(ocr_texts)
-
-            final_text_to_save = f"출처 URL: {current_url}\n"
-            final_text_to_save += f"제목: {title}\n"
-
-            # ---------- ★ 여기 수정됨 (문법 오류 제거) ----------
-            if attachments:
-                attachment_text = ";".join(
-                    [f"{att['filename']}|{att['url']}" for att in attachments]
-                )
-                final_text_to_save += f"첨부파일: {attachment_text}\n"
-            # -----------------------------------------------------
-
-            final_text_to_save += f"{'=' * 40}\n\n{clean_text(full_content)}"
-
-            post_id_match = re.search(r'seq=(\d+)', current_url)
-            if post_id_match:
-                post_id = post_id_match.group(1)
-                filename = f"kau_article_{post_id}.txt"
-                try:
-                    with open(os.path.join(output_folder, filename), 'w', encoding='utf-8') as f:
-                        f.write(final_text_to_save)
-                    page_count += 1
-                except Exception as write_e:
-                    print(f"    -> ❌ 파일 쓰기 오류: {write_e}")
-            else:
-                print(f"    -> ⚠️ 게시글 ID(seq) 없음, 파일 저장 스킵.")
-
-
-        # ----------------------------
-        # 링크 수집
-        # ----------------------------
-        try:
-            for link in soup.find_all('a', href=True):
-                absolute_url = urljoin(current_url, link['href']).split('#')[0]
-
-                if (
-                    urlparse(absolute_url).netloc == base_netloc and
-                    absolute_url not in visited_urls and
-                    any(p in absolute_url for p in allowed_patterns)
-                ):
-                    visited_urls.add(absolute_url)
-                    queue.append(absolute_url)
-
-        except Exception as e:
-            print(f"    -> ❌ 링크 수집 오류: {e}")
-
-
-# ----------------------------
-# 6. 실행
-# ----------------------------
-if __name__ == "__main__":
-    start_url = 'https://kau.ac.kr/kaulife/acdnoti.php?searchkey=&searchvalue=&code=s1201&page=&mode=read&seq=9897'
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
-                      'AppleWebKit/537.36 (KHTML, like Gecko) '
-                      'Chrome/129.0.0.0 Safari/537.36'
-    }
-
-    start_crawling(start_url, headers, max_pages=100)
-    print("\n\n크롤링 완료.")
+import requests
+from bs4 import BeautifulSoup
+import soupsieve as sv
+import os
+import re
+import time
+from collections import deque
+from urllib.parse import urljoin, urlparse
+import base64
+import hashlib
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import google.generativeai as genai
+from dotenv import load_dotenv
+from PIL import Image, ImageFile
+import io
+
+from articles import ARTICLES_PATH, make_article, append_article
+from ratelimit import TokenBucket
+
+ImageFile.LOAD_TRUNCATED_IMAGES = True
+
+# ----------------------------
+# 1. API 키 및 모델 로드
+# ----------------------------
+load_dotenv()
+API_KEY = os.environ.get("GOOGLE_API_KEY")
+if API_KEY:
+    genai.configure(api_key=API_KEY)
+
+OCR_MODEL = genai.GenerativeModel('gemini-2.5-pro')
+OCR_PROMPT = """
+이 이미지는 공지사항 문서입니다.
+이미지 상단부터 하단까지, 눈에 보이는 모든 텍스트를 순서대로 빠짐없이 추출해주세요.
+배경색이 다르더라도 모든 영역의 텍스트를 포함해야 합니다.
+설명이나 요약 없이, 추출된 텍스트 원본만 제공해주세요.
+"""
+
+
+# ----------------------------
+# 2. 텍스트 클린 함수
+# ----------------------------
+def clean_text(text):
+    text = re.sub(r'\n\s*\n', '\n', text)
+    lines = [line.strip() for line in text.split('\n')]
+    cleaned_lines = [line for line in lines if len(line) > 5]
+    return "\n".join(cleaned_lines)
+
+
+# ----------------------------
+# 3. Gemini OCR 함수 (캐시 + 병렬 처리)
+# ----------------------------
+OCR_CACHE_PATH = "ocr_cache.json"
+OCR_MAX_SIDE = 1600          # OCR 전송 전 긴 변 최대 픽셀
+OCR_WORKERS = 4              # 동시 OCR 작업 수
+OCR_RATE_PER_SEC = 1.0       # Gemini 초당 호출 수 (토큰 버킷)
+OCR_PHASH_SIZE = 16          # dHash 격자 (16x16 = 256비트). 8x8은 같은 양식의 다른 포스터도 같게 나옴
+OCR_PHASH_DISTANCE = 2       # 지각 해시 해밍 거리 허용치 (같은 크기로 다시 올린 재인코딩 정도만 같은 이미지로 봄)
+# 날짜 몇 글자만 바뀐 같은 양식의 포스터는 어떤 해시로도 재인코딩과 구별이 안 되므로
+# 원본 픽셀 크기까지 같을 때만 재사용한다 (잘못 재사용하면 틀린 날짜가 색인됨, 놓치면 OCR 한 번 더 할 뿐)
+
+ocr_cache_lock = threading.Lock()
+ocr_rate_limiter = TokenBucket(OCR_RATE_PER_SEC, capacity=OCR_WORKERS)
+ocr_stats = {"images": 0, "exact_hits": 0, "phash_hits": 0, "ocr_calls": 0, "started": time.time()}
+
+
+def load_ocr_cache(path=OCR_CACHE_PATH):
+    # {"by_sha": {sha256: text}, "by_phash": {phash(hex): {"text": text, "size": [원본 w, h]}}}
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+            # 예전 64비트 해시 항목은 느슨한 기준으로 만든 것이라 버림 (by_sha는 그대로 사용)
+            cache["by_phash"] = {
+                k: v for k, v in cache.get("by_phash", {}).items()
+                if isinstance(v, dict) and len(k) == OCR_PHASH_SIZE * OCR_PHASH_SIZE // 4
+            }
+            return cache
+        except Exception as e:
+            print(f"    -> ⚠️ OCR 캐시 로드 실패, 새로 시작합니다: {e}")
+    return {"by_sha": {}, "by_phash": {}}
+
+
+def save_ocr_cache(path=OCR_CACHE_PATH):
+    with ocr_cache_lock:
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(ocr_cache, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+ocr_cache = load_ocr_cache()
+
+
+def image_dhash(img, hash_size=OCR_PHASH_SIZE):
+    # 차이 해시(dHash): 리사이즈된 흑백 이미지의 인접 픽셀 밝기 비교
+    small = img.convert("L").resize((hash_size + 1, hash_size), Image.LANCZOS)
+    pixels = list(small.getdata())
+    bits = 0
+    for row in range(hash_size):
+        for col in range(hash_size):
+            left = pixels[row * (hash_size + 1) + col]
+            right = pixels[row * (hash_size + 1) + col + 1]
+            bits = (bits << 1) | (left > right)
+    return f"{bits:0{hash_size * hash_size // 4}x}"
+
+
+def find_similar_phash(phash, size):
+    # 원본 크기가 같고 해시가 거의 같은 이미지
+    target = int(phash, 16)
+    with ocr_cache_lock:
+        for known, entry in ocr_cache["by_phash"].items():
+            if entry["size"] == list(size) and bin(target ^ int(known, 16)).count("1") <= OCR_PHASH_DISTANCE:
+                return known, entry["text"]
+    return None, None
+
+
+def fetch_image_bytes(image_url, headers):
+    if image_url.startswith('data:image'):
+        print(f"    -> 🖼️ 데이터 URL 처리 시도...")
+        header, encoded = image_url.split(',', 1)
+        return base64.b64decode(encoded)
+
+    print(f"    -> 🖼️ 웹 이미지 처리 시도: {image_url[:70]}...")
+    response = requests.get(image_url, headers=headers, stream=True, timeout=15)
+    response.raise_for_status()
+    return response.content
+
+
+def prepare_image(image_content):
+    img = Image.open(io.BytesIO(image_content))
+
+    # 이미지 모드 처리
+    if img.mode in ('RGBA', 'LA'):
+        print("    -> 💡 투명도(PNG) 감지. 흰색 배경으로 병합합니다.")
+        background = Image.new("RGB", img.size, (255, 255, 255))
+        background.paste(img, (0, 0), img)
+        img = background
+    elif img.mode != 'RGB':
+        print(f"    -> 💡 이미지 모드({img.mode})를 RGB로 변환합니다.")
+        img = img.convert('RGB')
+
+    # 전송 전 해상도 축소
+    if max(img.size) > OCR_MAX_SIDE:
+        img.thumbnail((OCR_MAX_SIDE, OCR_MAX_SIDE), Image.LANCZOS)
+
+    return img
+
+
+def ocr_with_gemini(image_url, headers):
+    try:
+        image_content = fetch_image_bytes(image_url, headers)
+        if not image_content:
+            return None
+
+        with ocr_cache_lock:
+            ocr_stats["images"] += 1
+
+        # (1) 바이트 해시 캐시
+        sha = hashlib.sha256(image_content).hexdigest()
+        with ocr_cache_lock:
+            cached = ocr_cache["by_sha"].get(sha)
+        if cached is not None:
+            with ocr_cache_lock:
+                ocr_stats["exact_hits"] += 1
+            print("    -> ♻️ OCR 캐시 적중 (동일 이미지)")
+            return cached or None
+
+        original_size = Image.open(io.BytesIO(image_content)).size  # 헤더만 읽음
+        img = prepare_image(image_content)
+
+        # (2) 지각 해시 캐시 (배너/로고 등 거의 같은 이미지)
+        phash = image_dhash(img)
+        known, cached = find_similar_phash(phash, original_size)
+        if known is not None:
+            with ocr_cache_lock:
+                ocr_stats["phash_hits"] += 1
+                ocr_cache["by_sha"][sha] = cached
+            print("    -> ♻️ OCR 캐시 적중 (유사 이미지)")
+            return cached or None
+
+        # (3) Gemini 호출 (토큰 버킷으로 속도 제한)
+        ocr_rate_limiter.acquire()
+        print(f"    -> 🤖 Gemini OCR 시도...")
+        response = OCR_MODEL.generate_content([OCR_PROMPT, img])
+        with ocr_cache_lock:
+            ocr_stats["ocr_calls"] += 1
+
+        extracted_text = response.text.strip()
+        if not (extracted_text and len(extracted_text) > 5):
+            extracted_text = ""
+
+        # 텍스트가 없는 이미지도 캐시해 두어 다시 OCR하지 않음
+        with ocr_cache_lock:
+            ocr_cache["by_sha"][sha] = extracted_text
+            ocr_cache["by_phash"][phash] = {"text": extracted_text, "size": list(original_size)}
+
+        if extracted_text:
+            print("    -> ✅ Gemini OCR 성공")
+            return extracted_text
+        else:
+            print("    -> ℹ️ Gemini OCR 결과 텍스트 없음")
+            return None
+
+    except Exception as e:
+        print(f"    -> ❌ Gemini OCR 처리 실패! 오류 타입: {e.__class__.__name__}, 메시지: {e}")
+        return None
+
+
+def ocr_images(image_urls, headers):
+    # 게시물 하나의 이미지들을 병렬로 OCR (결과 순서는 이미지 순서 유지)
+    targets = [
+        img_url for img_url in dict.fromkeys(image_urls)
+        if img_url and urlparse(img_url).scheme in ['http', 'https', 'data']
+    ]
+    if not targets:
+        return []
+
+    with ThreadPoolExecutor(max_workers=OCR_WORKERS) as executor:
+        results = list(executor.map(lambda u: ocr_with_gemini(u, headers), targets))
+
+    save_ocr_cache()
+    return [text for text in results if text]
+
+
+def ocr_stats_summary():
+    images = ocr_stats["images"]
+    hits = ocr_stats["exact_hits"] + ocr_stats["phash_hits"]
+    elapsed_min = max(time.time() - ocr_stats["started"], 1e-9) / 60
+    hit_rate = (hits / images * 100) if images else 0.0
+    return (
+        f"OCR 이미지 {images}개, 캐시 적중률 {hit_rate:.1f}% "
+        f"(동일 {ocr_stats['exact_hits']}, 유사 {ocr_stats['phash_hits']}), "
+        f"Gemini 호출 {ocr_stats['ocr_calls']}회, 분당 {images / elapsed_min:.1f}개 처리"
+    )
+
+
+# ----------------------------
+# 4. 본문 + 이미지 + 첨부파일 추출 함수
+# ----------------------------
+# lxml이 설치되어 있으면 C 기반 파서 사용 (html.parser 대비 수 배 빠름)
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+# 선택자/정규식은 한 번만 컴파일
+SEL_TITLE = sv.compile('div.view_header h4')
+SEL_CONTENT = sv.compile('div.view_conts')
+SEL_IMAGES = sv.compile('img[src]')
+SEL_ATTACH_LI = sv.compile('li.attatch a[href]')
+SEL_FILE_AREA = sv.compile('div.view_file')
+SEL_LINKS = sv.compile('a[href]')
+WHITESPACE_RE = re.compile(r'\s+')
+SEL_HEADER = sv.compile('div.view_header')
+SEL_HEADER_INFO = sv.compile('li, dd, td, span')
+DATE_RE = re.compile(r'(20\d{2})\s*[.\-/]\s*(\d{1,2})\s*[.\-/]\s*(\d{1,2})')
+POSTED_LABEL_RE = re.compile(r'작성일|등록일|게시일')
+
+
+def make_soup(html, parser=None):
+    return BeautifulSoup(html, parser or HTML_PARSER)
+
+
+def extract_posted_date(soup):
+    # 게시글 헤더의 작성일을 "YYYY-MM-DD"로
+    # 헤더에는 제목(h4)도 들어 있어서 "신청 안내 (~2025.09.23)" 같은 마감일을 작성일로 읽지 않도록
+    # "작성일" 항목을 먼저 보고, 없으면 제목을 뺀 나머지 헤더 텍스트에서 찾는다
+    header = SEL_HEADER.select_one(soup)
+    if not header:
+        return None
+    match = None
+    for item in SEL_HEADER_INFO.select(header):
+        text = item.get_text(" ", strip=True)
+        if POSTED_LABEL_RE.search(text):
+            match = DATE_RE.search(text)
+            if match:
+                break
+    if not match:
+        rest = " ".join(s for s in header.find_all(string=True) if s.find_parent("h4") is None)
+        match = DATE_RE.search(rest)
+    if not match:
+        return None
+    year, month, day = (int(g) for g in match.groups())
+    return f"{year:04d}-{month:02d}-{day:02d}"
+
+
+def extract_content_from_soup(soup, url):
+    try:
+        title = SEL_TITLE.select_one(soup).get_text(strip=True)
+
+        content_area = SEL_CONTENT.select_one(soup)
+        main_text, image_urls = "", []
+
+        if content_area:
+
+            # 이미지 수집
+            for img_tag in SEL_IMAGES.select(content_area):
+                image_urls.append(urljoin(url, img_tag['src']))
+
+            # script/style 제거
+            for tag in content_area.find_all(['script', 'style']):
+                tag.decompose()
+
+            # ----------------------------
+            # ⚡ 새 로직: 본문 + 테이블을 원래 순서대로 조합
+            # ----------------------------
+            result_lines = []
+
+            for elem in content_area.children:
+                # 텍스트 요소일 경우
+                if elem.name is None:
+                    text = elem.strip()
+                    if text:
+                        result_lines.append(text)
+
+                # 테이블일 경우 → 테이블 파싱해서 삽입
+                elif elem.name == "table":
+                    table_rows = []
+                    for tr in elem.find_all("tr"):
+                        cols = []
+                        for td in tr.find_all(["td", "th"]):
+                            cell = td.get_text(separator=" ", strip=True)
+                            cell = WHITESPACE_RE.sub(' ', cell)
+                            cols.append(cell)
+                        if cols:
+                            table_rows.append(" | ".join(cols))
+                    if table_rows:
+                        result_lines.append("\n".join(table_rows))
+
+                # p, div 등 다른 태그의 텍스트 처리
+                else:
+                    text = elem.get_text(separator="\n", strip=True)
+                    if text:
+                        result_lines.append(text)
+
+            # 최종 main_text 구성
+            main_text = "\n".join(result_lines)
+
+        # 첨부파일
+        attachments = []
+
+        attachment_li = SEL_ATTACH_LI.select_one(soup)
+        if attachment_li:
+            attachments.append({
+                'filename': attachment_li.get_text(strip=True),
+                'url': urljoin(url, attachment_li['href'])
+            })
+
+        file_list_area = SEL_FILE_AREA.select_one(soup)
+        if file_list_area:
+            for link_tag in SEL_LINKS.select(file_list_area):
+                attachments.append({
+                    'filename': link_tag.get_text(strip=True),
+                    'url': urljoin(url, link_tag['href'])
+                })
+
+        return title, main_text or '본문 없음', image_urls, attachments
+
+    except Exception as e:
+        print(f"       -> ❌ 웹 페이지 파싱 오류: {e}")
+        return "제목 없음", "본문 없음", [], []
+
+   
+
+# ----------------------------
+# 5. 크롤링 함수
+# ----------------------------
+def start_crawling(start_url, headers, output_path=ARTICLES_PATH, max_pages=100):
+    queue = deque([start_url])
+    visited_urls = {start_url}
+    page_count = 0
+
+    base_netloc = urlparse(start_url).netloc
+    allowed_patterns = ['acdnoti.php', 'notice.php']
+
+    while queue and page_count < max_pages:
+        current_url = queue.popleft()
+
+        print(f"\n➡️  페이지 방문/수집: {current_url}")
+        try:
+            response = requests.get(current_url, headers=headers, timeout=10)
+            response.raise_for_status()
+            soup = make_soup(response.text)
+        except Exception as e:
+            print(f"    -> ❌ 페이지 방문 오류: {e}")
+            continue
+
+        # ----------------------------
+        # 게시글 읽기 모드일 때 처리
+        # ----------------------------
+        if 'mode=read' in current_url:
+            title, main_text, image_urls, attachments = extract_content_from_soup(soup, current_url)
+            print(f"    -> ✅ [{page_count + 1}/{max_pages}] 게시물 처리: {title[:30]}...")
+
+            ocr_texts = ocr_images(image_urls, headers)
+
+            # OCR 텍스트 포함
+            full_content = main_text
+            if ocr_texts:
+                full_content += "\n\n--- 이미지 추출 텍스트 (Gemini OCR) ---\n"
+                full_content += "\n".join(ocr_texts)
+
+            posted_at = extract_posted_date(soup)
+            article = make_article(current_url, title, clean_text(full_content), attachments, image_urls, posted_at)
+            if article["seq"]:
+                try:
+                    append_article(article, output_path)
+                    page_count += 1
+                except Exception as write_e:
+                    print(f"    -> ❌ 레코드 저장 오류: {write_e}")
+            else:
+                print(f"    -> ⚠️ 게시글 ID(seq) 없음, 저장 스킵.")
+
+
+        # ----------------------------
+        # 링크 수집
+        # ----------------------------
+        try:
+            for link in soup.find_all('a', href=True):
+                absolute_url = urljoin(current_url, link['href']).split('#')[0]
+
+                if (
+                    urlparse(absolute_url).netloc == base_netloc and
+                    absolute_url not in visited_urls and
+                    any(p in absolute_url for p in allowed_patterns)
+                ):
+                    visited_urls.add(absolute_url)
+                    queue.append(absolute_url)
+
+        except Exception as e:
+            print(f"    -> ❌ 링크 수집 오류: {e}")
+
+
+# ----------------------------
+# 6. 실행
+# ----------------------------
+if __name__ == "__main__":
+    if not API_KEY:
+        print("오류: .env 파일에 GOOGLE_API_KEY가 없습니다.")
+        exit()
+
+    start_url = 'https://kau.ac.kr/kaulife/acdnoti.php?searchkey=&searchvalue=&code=s1201&page=&mode=read&seq=9897'
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
+                      'AppleWebKit/537.36 (KHTML, like Gecko) '
+                      'Chrome/129.0.0.0 Safari/537.36'
+    }
+
+    start_crawling(start_url, headers, max_pages=100)
+    print("\n\n크롤링 완료.")
+    print(ocr_stats_summary())
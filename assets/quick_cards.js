@@ -0,0 +1,53 @@
+// assets/quick_cards.js (빠른 버튼 카드: 서버 왕복 없이 브라우저에서 바로 그림)
+//
+// app.py가 quick-cards Store에 넣어 둔 카드 컴포넌트(JSON)를 채팅 화면과 기록에 이어 붙인다.
+// 지하철 카드는 내장 시간표에서 한국 시간 기준 다음 열차 3대를 여기서 계산한다.
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    cards: {
+        seoulTime: function () {
+            return new Date().toLocaleTimeString("en-GB", {
+                timeZone: "Asia/Seoul",
+                hour: "2-digit",
+                minute: "2-digit",
+                hourCycle: "h23"
+            });
+        },
+
+        quick: function (food, subway, calendar, library, cards, children, history) {
+            const dc = window.dash_clientside;
+            const triggered = dc.callback_context.triggered;
+            if (!triggered.length || !cards) {
+                throw dc.PreventUpdate;
+            }
+            const card = cards.buttons[triggered[0].prop_id.split(".")[0]];
+            if (!card) {
+                throw dc.PreventUpdate;
+            }
+
+            let aiRow = card.ai_row;
+            let entry = Object.assign({speaker: "ai"}, card.entry);
+
+            if (entry.type === "subway") {
+                const now = dc.cards.seoulTime();
+                const up = cards.timetable.up.filter(t => t > now).slice(0, 3);
+                const down = cards.timetable.down.filter(t => t > now).slice(0, 3);
+                entry = Object.assign(entry, {time: now, up: up, down: down});
+                aiRow = JSON.parse(
+                    JSON.stringify(card.ai_row)
+                        .replace("__NOW__", now)
+                        .replace("__UP__", up.length ? up.join(", ") : "운행 종료")
+                        .replace("__DOWN__", down.length ? down.join(", ") : "운행 종료")
+                );
+            }
+
+            let view = children || [];
+            if (!Array.isArray(view)) {
+                view = [view];
+            }
+            return [
+                view.concat([card.user_row, aiRow]),
+                (history || []).concat([{speaker: "user", content: card.question}, entry])
+            ];
+        }
+    }
+});
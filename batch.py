@@ -0,0 +1,191 @@
+# batch.py (질문 여러 개를 한 번에 처리: 재인덱싱 후 회귀 평가 / 자주 묻는 질문 답변 미리 만들기)
+#
+#   python batch.py questions.jsonl --out answers.jsonl --concurrency 4
+#   python batch.py questions.jsonl --out retrieval.jsonl --no-llm          # 검색만 (회귀 비교용)
+#   python batch.py questions.txt --generation gen-20251103-120000-000000 --out answers.jsonl
+#
+# 입력: .jsonl 한 줄에 {"question": "...", ...} (다른 필드는 결과에 그대로 복사) 또는 텍스트 한 줄에 질문 하나
+# 출력: 질문마다 한 줄 {"question", "answer", "citations", "retrieved": [출처 URL], "timings_ms": {...}}
+#
+# 검색은 질문 전체를 묶어서 처리한다: 임베딩은 배치로, FAISS는 질문 벡터 행렬 하나로 검색.
+# BM25/융합/재정렬은 질문별, Gemini 호출은 스레드 풀로 동시 실행 수를 제한한다.
+# embed/faiss 시간은 배치 전체 시간을 질문 수로 나눈 값.
+import os
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import rag_core
+
+BATCH_CONCURRENCY = int(os.environ.get("KAU_BATCH_CONCURRENCY", "4"))  # 동시에 보낼 Gemini 요청 수
+BATCH_EMBED_SIZE = 64  # 임베딩 한 번에 인코딩할 질문 수
+
+
+def read_questions(path):
+    items = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if path.endswith(".jsonl"):
+                items.append(json.loads(line))
+            else:
+                items.append({"question": line})
+    return items
+
+
+def embed_questions(embeddings, questions):
+    embed = getattr(embeddings, "base", embeddings)  # 마이크로 배치 래퍼를 거치지 않고 바로 배치 인코딩
+    vectors = []
+    for i in range(0, len(questions), BATCH_EMBED_SIZE):
+        vectors.extend(embed.embed_documents(questions[i:i + BATCH_EMBED_SIZE]))
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def filters_key(filters):
+    return repr(sorted(filters.items())) if filters else None
+
+
+def retrieve_batch(questions, generation=None):
+    # 질문 목록 → (질문별 LLM 컨텍스트 문서, 질문별 단계 시간 ms)
+    generation = generation or rag_core.active
+    ensemble = generation.ensemble
+    n = len(questions)
+    if not n:
+        return [], []
+    timings = [{} for _ in range(n)]
+    filters = [rag_core.infer_filters(q) for q in questions]
+
+    # (1) 임베딩 배치
+    start = time.perf_counter()
+    vectors = embed_questions(generation.vector_db.embedding_function, questions)
+    embed_ms = (time.perf_counter() - start) * 1000 / n
+
+    # (2) FAISS: 같은 필터를 쓰는 질문끼리 행렬 하나로 검색
+    start = time.perf_counter()
+    faiss_docs = [None] * n
+    groups = {}
+    for i, f in enumerate(filters):
+        groups.setdefault(filters_key(f), []).append(i)
+    for rows in groups.values():
+        found = generation.faiss_retriever.search_vectors(vectors[rows], filters[rows[0]])
+        for i, docs in zip(rows, found):
+            faiss_docs[i] = docs
+    faiss_ms = (time.perf_counter() - start) * 1000 / n
+
+    contexts = []
+    for i, question in enumerate(questions):
+        timings[i]["embed"] = embed_ms
+        timings[i]["faiss"] = faiss_ms
+
+        # (3) BM25 (질문별)
+        start = time.perf_counter()
+        bm25_docs = generation.bm25_searcher.invoke(question, filters[i])
+        timings[i]["bm25"] = (time.perf_counter() - start) * 1000
+
+        # (4) 융합 (앙상블 검색기와 같은 순서로 결과 전달)
+        start = time.perf_counter()
+        by_retriever = {id(generation.bm25_searcher): bm25_docs, id(generation.faiss_retriever): faiss_docs[i]}
+        docs = ensemble.fuse([by_retriever.get(id(r), []) for r in ensemble.retrievers])
+        timings[i]["fusion"] = (time.perf_counter() - start) * 1000
+
+        # (5) 재정렬 + 게시글 단위 중복 제거
+        start = time.perf_counter()
+        contexts.append(rag_core.select_context(question, docs))
+        timings[i]["context"] = (time.perf_counter() - start) * 1000
+
+    return contexts, timings
+
+
+def answer_one(question, unique_docs):
+    # 프롬프트 → Gemini → 출처 정리, (결과, 단계 시간 ms)
+    timings = {}
+    start = time.perf_counter()
+    final_prompt = rag_core.build_prompt(question, unique_docs)
+    timings["prompt"] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    try:
+        full_text = rag_core.generate(final_prompt)
+    except Exception as e:
+        timings["llm"] = (time.perf_counter() - start) * 1000
+        return {"answer": None, "citations": [], "error": str(e)}, timings
+    timings["llm"] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    content, citations = rag_core.parse_citations(full_text, unique_docs)
+    timings["postprocess"] = (time.perf_counter() - start) * 1000
+    return {"answer": content, "citations": citations}, timings
+
+
+def answer_batch(items, generation=None, concurrency=BATCH_CONCURRENCY, llm=True):
+    # items: [{"question": ...}, ...] → 같은 순서의 결과 목록
+    generation = generation or rag_core.active
+    if not generation.ensemble:
+        raise RuntimeError("인덱스가 로드되지 않았습니다.")
+
+    questions = [item["question"] for item in items]
+    contexts, timings = retrieve_batch(questions, generation)
+
+    results = []
+    for item, unique_docs, timing in zip(items, contexts, timings):
+        results.append(dict(
+            item,
+            generation=generation.name,
+            retrieved=[d.metadata.get("source", "") for d in unique_docs],
+            timings_ms=timing,
+        ))
+
+    if llm:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            answers = executor.map(answer_one, questions, contexts)
+            for result, (answer, timing) in zip(results, answers):
+                result.update(answer)
+                result["timings_ms"].update(timing)
+
+    for result in results:
+        result["timings_ms"] = {k: round(v, 3) for k, v in result["timings_ms"].items()}
+    return results
+
+
+def write_jsonl(path, results):
+    with open(path, "w", encoding="utf-8") as f:
+        for result in results:
+            f.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+
+def print_summary(results, elapsed):
+    stages = {}
+    for result in results:
+        for stage, ms in result["timings_ms"].items():
+            stages.setdefault(stage, []).append(ms)
+    print(f"질문 {len(results)}개, {elapsed:.1f}초 ({len(results) / elapsed:.2f} 질문/초)")
+    for stage, values in stages.items():
+        print(f"  {stage:12s} 평균 {np.mean(values):9.2f}ms  p99 {np.percentile(values, 99):9.2f}ms")
+    errors = sum(1 for r in results if r.get("error"))
+    if errors:
+        print(f"  ⚠️ Gemini 오류 {errors}건")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("questions", help="질문 파일 (.jsonl 또는 한 줄에 질문 하나)")
+    parser.add_argument("--out", default="answers.jsonl")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY, help="동시 Gemini 요청 수")
+    parser.add_argument("--no-llm", action="store_true", help="검색까지만 (회귀 비교용)")
+    parser.add_argument("--generation", default=None, help="평가할 인덱스 세대 (기본: 현재 서비스 중인 세대)")
+    args = parser.parse_args()
+
+    generation = rag_core.load_generation(args.generation) if args.generation else rag_core.active
+    items = read_questions(args.questions)
+
+    started = time.perf_counter()
+    results = answer_batch(items, generation, args.concurrency, llm=not args.no_llm)
+    print_summary(results, time.perf_counter() - started)
+
+    write_jsonl(args.out, results)
+    print(f"결과 저장: {args.out}")
@@ -0,0 +1,118 @@
+# bench/buttons.py (빠른 버튼 → 카드 표시 지연: 서버 콜백 vs clientside)
+#
+#   python -m bench.stub_server &
+#   python -m bench.buttons --url http://127.0.0.1:8050 --history-turns 0 10 50 --out buttons.json
+#
+# 이전: 버튼이 update_chat 서버 콜백을 거침 → 같은 질문을 send-btn으로 보내 왕복 시간을 잰다
+#       (update_chat의 키워드 분기가 예전 버튼 경로와 같음, 기록 전체가 양방향으로 직렬화됨)
+# 이후: assets/quick_cards.js 함수를 node로 실행해 브라우저 안 처리 시간만 잰다 (서버 요청 없음)
+# 두 경우 모두 DOM 렌더링 시간은 빠져 있다.
+import argparse
+import json
+import os
+import subprocess
+import time
+
+import requests
+
+from bench.common import BASE_DIR, summarize, write_results
+from bench.load import build_payload, find_callback, make_history
+
+QUICK_CARDS_JS = os.path.join(BASE_DIR, "assets", "quick_cards.js")
+
+NODE_RUNNER = """
+const fs = require("fs");
+const input = JSON.parse(fs.readFileSync(0, "utf8"));
+global.window = {};
+eval(input.js);
+const dc = window.dash_clientside;
+dc.PreventUpdate = {};
+const out = {};
+for (const id of Object.keys(input.cards.buttons)) {
+    dc.callback_context = {triggered: [{prop_id: id + ".n_clicks", value: 1}]};
+    dc.cards.quick(1, 1, 1, 1, input.cards, [], input.history);  // warmup (Intl 초기화 등)
+    const times = [];
+    for (let i = 0; i < input.rounds; i++) {
+        const start = process.hrtime.bigint();
+        const result = dc.cards.quick(1, 1, 1, 1, input.cards, [], input.history);
+        JSON.stringify(result);  // dash-renderer가 store에 쓰기 전 직렬화하는 비용
+        times.push(Number(process.hrtime.bigint() - start) / 1e9);
+    }
+    out[id] = times;
+}
+console.log(JSON.stringify(out));
+"""
+
+
+def find_store(layout, store_id):
+    # /_dash-layout JSON에서 dcc.Store 데이터 찾기
+    if isinstance(layout, list):
+        for child in layout:
+            found = find_store(child, store_id)
+            if found is not None:
+                return found
+    elif isinstance(layout, dict):
+        props = layout.get("props", {})
+        if props.get("id") == store_id:
+            return props.get("data")
+        return find_store(props.get("children"), store_id)
+    return None
+
+
+def bench_server(base_url, cards, history, rounds, timeout):
+    dep = find_callback(base_url)
+    session = requests.Session()
+    results = {}
+    for button_id, card in cards["buttons"].items():
+        latencies = []
+        for _ in range(rounds):
+            payload = build_payload(dep, card["question"], history)
+            start = time.perf_counter()
+            session.post(f"{base_url}/_dash-update-component", json=payload, timeout=timeout).raise_for_status()
+            latencies.append(time.perf_counter() - start)
+        results[button_id] = summarize(latencies)
+    return results
+
+
+def bench_clientside(cards, history, rounds):
+    with open(QUICK_CARDS_JS, "r", encoding="utf-8") as f:
+        js = f.read()
+    proc = subprocess.run(
+        ["node", "-e", NODE_RUNNER],
+        input=json.dumps({"js": js, "cards": cards, "history": history, "rounds": rounds}, ensure_ascii=False),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return {button_id: summarize(times) for button_id, times in json.loads(proc.stdout).items()}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--url", default="http://127.0.0.1:8050")
+    ap.add_argument("--history-turns", type=int, nargs="+", default=[0, 10, 50])
+    ap.add_argument("--rounds", type=int, default=50)
+    ap.add_argument("--timeout", type=float, default=30)
+    ap.add_argument("--out", default="buttons_results.json")
+    args = ap.parse_args()
+
+    layout = requests.get(f"{args.url}/_dash-layout", timeout=10).json()
+    cards = find_store(layout, "quick-cards")
+    if cards is None:
+        raise RuntimeError("quick-cards Store를 찾지 못했습니다.")
+
+    results = {}
+    for turns in args.history_turns:
+        history = make_history(turns)
+        server = bench_server(args.url, cards, history, args.rounds, args.timeout)
+        client = bench_clientside(cards, history, args.rounds)
+        results[f"history_{turns}"] = {"server": server, "clientside": client}
+        for button_id in cards["buttons"]:
+            print(f"기록 {turns:3d}턴 {button_id:13s} 서버 p50 {server[button_id]['p50_ms']:8.2f}ms  "
+                  f"clientside p50 {client[button_id]['p50_ms']:8.3f}ms")
+
+    write_results(args.out, results, kind="buttons", url=args.url)
+
+
+if __name__ == "__main__":
+    main()
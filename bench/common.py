@@ -0,0 +1,85 @@
+# bench/common.py (벤치마크 공용 도구: 통계, 가짜 Gemini, 결과 저장)
+import json
+import os
+import subprocess
+import time
+from datetime import datetime
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR = os.path.dirname(BENCH_DIR)
+QUERIES_PATH = os.path.join(BENCH_DIR, "queries.jsonl")
+
+# 임베딩 벤치(encoder, embed_load)용 짧은 질문. 모델/인덱스를 로드하는 모듈에 두지 않음
+EMBED_QUERIES = [
+    "수강신청 기간 언제야?",
+    "장학금 신청 방법 알려줘",
+    "기말고사 일정",
+    "휴학 신청은 어디서 해?",
+    "졸업요건 확인 방법",
+    "계절학기 등록금 납부 기간",
+    "복학 신청 기간이 언제야?",
+    "교환학생 모집 공고",
+]
+
+
+def load_queries(path=QUERIES_PATH):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def summarize(latencies_sec):
+    ms = np.asarray(latencies_sec) * 1000
+    return {
+        "n": int(len(ms)),
+        "mean_ms": float(ms.mean()),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p90_ms": float(np.percentile(ms, 90)),
+        "p99_ms": float(np.percentile(ms, 99)),
+    }
+
+
+def timeit(fn, args_list, rounds=1, warmup=1):
+    for args in args_list[:warmup]:
+        fn(*args)
+    latencies = []
+    for _ in range(rounds):
+        for args in args_list:
+            start = time.perf_counter()
+            fn(*args)
+            latencies.append(time.perf_counter() - start)
+    return summarize(latencies)
+
+
+def make_stub_generate(latency_ms=0, answer=None):
+    # 네트워크 없이 Gemini 자리를 채우는 가짜 생성 함수 (고정 지연 + 근거 태그 포함 답변)
+    answer = answer or "문서에 따르면 신청 기간은 공지된 일정과 같습니다. [근거: 1, 2]"
+
+    def stub_generate(final_prompt):
+        if latency_ms:
+            time.sleep(latency_ms / 1000)
+        return answer
+
+    return stub_generate
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(path, results, **meta):
+    payload = {
+        "commit": git_commit(),
+        "time": datetime.now().isoformat(timespec="seconds"),
+        **meta,
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    print(f"결과 저장: {path}")
@@ -0,0 +1,58 @@
+# bench/compare.py (두 벤치마크 결과 비교, 회귀 시 종료 코드 1)
+#
+#   python -m bench.compare base.json new.json --threshold 0.10
+import argparse
+import json
+import sys
+
+METRICS = ("p50_ms", "p99_ms")
+
+
+def flatten(results, prefix=""):
+    # {"이름": {"p50_ms": ...}} 또는 {"이름": [{"concurrency": 4, ...}, ...]} 모두 지원
+    flat = {}
+    for name, value in results.items():
+        if isinstance(value, list):
+            for row in value:
+                flat[f"{prefix}{name}@c{row.get('concurrency')}"] = row
+        elif isinstance(value, dict):
+            flat[f"{prefix}{name}"] = value
+    return flat
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("base")
+    ap.add_argument("new")
+    ap.add_argument("--threshold", type=float, default=0.10)
+    args = ap.parse_args()
+
+    with open(args.base, "r", encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.new, "r", encoding="utf-8") as f:
+        new = json.load(f)
+
+    print(f"{base.get('commit')} → {new.get('commit')}")
+    base_rows, new_rows = flatten(base["results"]), flatten(new["results"])
+    regressions = 0
+    for name in sorted(set(base_rows) & set(new_rows)):
+        for metric in METRICS:
+            old, cur = base_rows[name].get(metric), new_rows[name].get(metric)
+            if not old or cur is None:
+                continue
+            change = (cur - old) / old
+            mark = ""
+            if change > args.threshold:
+                mark = "  ❌ 회귀"
+                regressions += 1
+            elif change < -args.threshold:
+                mark = "  ✅ 개선"
+            print(f"{name:24s} {metric}: {old:9.2f} → {cur:9.2f}ms ({change:+.1%}){mark}")
+
+    if regressions:
+        print(f"회귀 {regressions}건 (임계값 {args.threshold:.0%})")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# bench/embed_load.py (쿼리 임베딩 부하 테스트: 배치 on/off 비교)
+#
+#   python -m bench.embed_load --concurrency 1 4 16 32 --requests 256
+#
+# 동시 사용자 수별 초당 임베딩 수와 p50/p99 지연(ms)을 출력한다.
+# 인코더는 encoders에서 한 번만 로드한다 (rag_core/eee는 import 시점에 모델/인덱스를 올리므로 쓰지 않음).
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from bench.common import EMBED_QUERIES as QUERIES
+from encoders import EMBED_BATCH_WINDOW_MS, EMBED_MAX_BATCH, QUERY_MAX_SEQ_LENGTH, BatchedQueryEmbeddings, load_encoder
+
+
+def run(embeddings, concurrency, n_requests):
+    latencies = []
+
+    def one(i):
+        start = time.perf_counter()
+        embeddings.embed_query(f"{QUERIES[i % len(QUERIES)]} {i}")  # 캐시 효과 없이 매번 다른 문장
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(one, range(n_requests)))
+    elapsed = time.perf_counter() - start
+
+    ms = np.array(latencies) * 1000
+    return {
+        "concurrency": concurrency,
+        "embeddings_per_sec": n_requests / elapsed,
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p99_ms": float(np.percentile(ms, 99)),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 32])
+    ap.add_argument("--requests", type=int, default=256)
+    ap.add_argument("--window-ms", type=float, default=EMBED_BATCH_WINDOW_MS or 5)
+    ap.add_argument("--max-batch", type=int, default=EMBED_MAX_BATCH)
+    ap.add_argument("--out", default=None)
+    args = ap.parse_args()
+
+    base = load_encoder(max_seq_length=QUERY_MAX_SEQ_LENGTH)  # 서버와 같은 쿼리 인코더 설정
+    base.embed_query("워밍업")
+    modes = {
+        "single": base,
+        "batched": BatchedQueryEmbeddings(base, window_ms=args.window_ms, max_batch=args.max_batch),
+    }
+
+    results = []
+    for mode, embeddings in modes.items():
+        for concurrency in args.concurrency:
+            result = dict(run(embeddings, concurrency, args.requests), mode=mode)
+            results.append(result)
+            print(f"{mode:8s} 동시 {concurrency:3d}: {result['embeddings_per_sec']:7.1f}/s  "
+                  f"p50 {result['p50_ms']:7.1f}ms  p99 {result['p99_ms']:7.1f}ms")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# bench/encoder.py (쿼리 인코더 백엔드별 지연/메모리/벡터 일치도)
+#
+#   python -m bench.encoder --backends torch int8 onnx --max-seq-length 128
+#
+# 백엔드마다 별도 프로세스에서 로드해 메모리를 따로 잰다. 자식 프로세스는 encoders만 import하고
+# (rag_core/eee는 import 시점에 모델과 인덱스를 올림) RSS 기준값을 잰 뒤에 인코더를 로드한다. 일치도는 fp32(torch, 길이 제한 없음)
+# 벡터와의 코사인 유사도(평균/최소)로, PARITY_THRESHOLD 미만이면 재인덱싱이 필요하다는 뜻이다.
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from bench.common import EMBED_QUERIES as QUERIES
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def rss_mb():
+    with open("/proc/self/status", "r") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def run_backend(backend, max_seq_length, rounds, vectors_path):
+    from encoders import load_encoder
+
+    before = rss_mb()
+    start = time.perf_counter()
+    encoder = load_encoder(backend, max_seq_length)
+    load_sec = time.perf_counter() - start
+    encoder.embed_query("워밍업")
+
+    latencies = []
+    for _ in range(rounds):
+        for query in QUERIES:
+            start = time.perf_counter()
+            encoder.embed_query(query)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    np.save(vectors_path, np.asarray(encoder.embed_documents(QUERIES), dtype=np.float32))
+    return {
+        "backend": backend,
+        "max_seq_length": max_seq_length,
+        "load_sec": load_sec,
+        "rss_mb": rss_mb() - before,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+    }
+
+
+def spawn(backend, max_seq_length, rounds, vectors_path):
+    cmd = [sys.executable, "-m", "bench.encoder", "--child", backend, "--rounds", str(rounds),
+           "--vectors", vectors_path]
+    if max_seq_length:
+        cmd += ["--max-seq-length", str(max_seq_length)]
+    out = subprocess.run(cmd, cwd=BASE_DIR, check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def cosine(a, b):
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return (a * b).sum(axis=1)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--backends", nargs="+", default=["torch", "int8", "onnx"])
+    ap.add_argument("--max-seq-length", type=int, default=None)
+    ap.add_argument("--rounds", type=int, default=5)
+    ap.add_argument("--out", default=None)
+    ap.add_argument("--child", default=None)
+    ap.add_argument("--vectors", default=None)
+    args = ap.parse_args()
+
+    if args.child:
+        print(json.dumps(run_backend(args.child, args.max_seq_length, args.rounds, args.vectors)))
+        return
+
+    from encoders import PARITY_THRESHOLD
+
+    with tempfile.TemporaryDirectory() as tmp:
+        reference_path = os.path.join(tmp, "reference.npy")
+        spawn("torch", None, 1, reference_path)
+        reference = np.load(reference_path)
+
+        results = []
+        for backend in args.backends:
+            vectors_path = os.path.join(tmp, f"{backend}.npy")
+            result = spawn(backend, args.max_seq_length, args.rounds, vectors_path)
+            scores = cosine(reference, np.load(vectors_path))
+            result.update(cosine_mean=float(scores.mean()), cosine_min=float(scores.min()))
+            results.append(result)
+            ok = "OK" if result["cosine_min"] >= PARITY_THRESHOLD else "재인덱싱 필요"
+            print(f"{backend:6s}: 로드 {result['load_sec']:.1f}s, 메모리 +{result['rss_mb']:.0f}MB, "
+                  f"p50 {result['p50_ms']:.1f}ms, p99 {result['p99_ms']:.1f}ms, "
+                  f"코사인 평균 {result['cosine_mean']:.4f} / 최소 {result['cosine_min']:.4f} ({ok})")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# bench/load.py (Dash update_chat 콜백 HTTP 부하 생성기)
+#
+#   python -m bench.stub_server --llm-latency-ms 1500 &
+#   python -m bench.load --url http://127.0.0.1:8050 --concurrency 1 4 16 --requests 64 --out load.json
+#
+# /_dash-dependencies 에서 update_chat 콜백 정의를 읽어, 브라우저와 같은 요청 본문을 만든다.
+import argparse
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from bench.common import load_queries, summarize, write_results
+
+TRIGGER = {"id": "send-btn", "property": "n_clicks"}
+
+
+def find_callback(base_url, trigger=TRIGGER):
+    deps = requests.get(f"{base_url}/_dash-dependencies", timeout=10).json()
+    for dep in deps:
+        if trigger in [{"id": i["id"], "property": i["property"]} for i in dep["inputs"]]:
+            return dep
+    raise RuntimeError("update_chat 콜백을 찾지 못했습니다.")
+
+
+def parse_outputs(output):
+    # "..a.children@hash...b.value.." → [{"id": "a", "property": "children@hash"}, ...]
+    specs = output[2:-2].split("...") if output.startswith("..") else [output]
+    outputs = []
+    for spec in specs:
+        component_id, prop = spec.rsplit(".", 1) if "@" not in spec else spec.split(".", 1)
+        outputs.append({"id": component_id, "property": prop})
+    return outputs
+
+
+def build_payload(dep, question, history):
+    values = {
+        ("send-btn", "n_clicks"): 1,
+        ("user-input", "value"): question,
+        ("chat-history-store", "data"): history,
+    }
+    outputs = parse_outputs(dep["output"])
+    return {
+        "output": dep["output"],
+        "outputs": outputs if len(outputs) > 1 else outputs[0],
+        "inputs": [dict(i, value=values.get((i["id"], i["property"]))) for i in dep["inputs"]],
+        "state": [dict(s, value=values.get((s["id"], s["property"]))) for s in dep.get("state", [])],
+        "changedPropIds": [f"{TRIGGER['id']}.{TRIGGER['property']}"],
+    }
+
+
+def make_history(turns):
+    history = []
+    for i in range(turns):
+        history.append({"speaker": "user", "content": f"이전 질문 {i}"})
+        history.append({"speaker": "ai", "type": "text", "content": "이전 답변입니다. " * 20})
+    return history
+
+
+def run_level(base_url, dep, questions, concurrency, n_requests, history, timeout):
+    session = requests.Session()
+    latencies, errors = [], 0
+    question_cycle = itertools.cycle(questions)
+    payloads = [build_payload(dep, next(question_cycle), history) for _ in range(n_requests)]
+
+    def one(payload):
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            response = session.post(f"{base_url}/_dash-update-component", json=payload, timeout=timeout)
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+        except requests.RequestException:
+            errors += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(one, payloads))
+    elapsed = time.perf_counter() - start
+
+    result = summarize(latencies) if latencies else {"n": 0}
+    result.update(concurrency=concurrency, errors=errors, requests_per_sec=len(latencies) / elapsed)
+    return result
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--url", default="http://127.0.0.1:8050")
+    ap.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    ap.add_argument("--requests", type=int, default=64)
+    ap.add_argument("--history-turns", type=int, default=0, help="요청마다 같이 보내는 이전 대화 수")
+    ap.add_argument("--timeout", type=float, default=120)
+    ap.add_argument("--out", default="load_results.json")
+    args = ap.parse_args()
+
+    dep = find_callback(args.url)
+    questions = [q["question"] for q in load_queries()]
+    history = make_history(args.history_turns)
+
+    rows = []
+    for concurrency in args.concurrency:
+        row = run_level(args.url, dep, questions, concurrency, args.requests, history, args.timeout)
+        rows.append(row)
+        print(f"동시 {concurrency:3d}: {row['requests_per_sec']:6.2f} req/s, "
+              f"p50 {row.get('p50_ms', 0):8.1f}ms, p99 {row.get('p99_ms', 0):8.1f}ms, 오류 {row['errors']}")
+
+    write_results(args.out, {"update_chat": rows}, kind="load", url=args.url, history_turns=args.history_turns)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# bench/overload.py (과부하 시 입장 제어 유무에 따른 지연 p99 / 저하 단계 분포)
+#
+#   python -m bench.overload --llm-latency-ms 1500 --upstream-capacity 8 --concurrency 8 32 64 --requests 256
+#
+# 같은 프로세스 안에서 동시 사용자 스레드를 돌린다. Gemini는 고정 지연 스텁이고,
+# --upstream-capacity 개만 동시에 처리되도록 묶어 워커/할당량 포화를 흉내 낸다.
+#   direct     지금까지처럼 rag_core.answer_question 직접 호출 → 포화되면 모두 줄 서서 기다림
+#   admission  admission.Admission 경유 → 자리가 없으면 캐시 / 검색 발췌 / 안내 메시지로 바로 응답
+# 질문은 bench/queries.jsonl을 돌려 써서 뒤쪽 요청은 답변 캐시에 걸릴 수 있다.
+import argparse
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import admission
+import rag_core
+from bench.common import load_queries, make_stub_generate, summarize, write_results
+
+
+def saturating_generate(latency_ms, capacity):
+    stub = make_stub_generate(latency_ms)
+    upstream = threading.Semaphore(capacity)
+
+    def generate(final_prompt):
+        with upstream:
+            return stub(final_prompt)
+
+    return generate
+
+
+def run_level(answer_fn, questions, concurrency, n_requests):
+    latencies, tiers = [], {}
+    lock = threading.Lock()
+    question_cycle = itertools.cycle(questions)
+    batch = [next(question_cycle) for _ in range(n_requests)]
+
+    def one(i_question):
+        i, question = i_question
+        start = time.perf_counter()
+        result = answer_fn(question, f"user-{i % concurrency}")
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            tier = result.get("tier", "full")
+            tiers[tier] = tiers.get(tier, 0) + 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(one, enumerate(batch)))
+    elapsed = time.perf_counter() - start
+
+    result = summarize(latencies)
+    result.update(concurrency=concurrency, tiers=tiers, requests_per_sec=len(latencies) / elapsed)
+    return result
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--llm-latency-ms", type=float, default=1500)
+    ap.add_argument("--upstream-capacity", type=int, default=8, help="동시에 처리되는 Gemini 요청 수 (포화 흉내)")
+    ap.add_argument("--concurrency", type=int, nargs="+", default=[8, 32, 64])
+    ap.add_argument("--requests", type=int, default=256)
+    ap.add_argument("--max-inflight", type=int, default=None, help="기본: --upstream-capacity")
+    ap.add_argument("--queue-size", type=int, default=admission.QUEUE_SIZE)
+    ap.add_argument("--queue-timeout", type=float, default=admission.QUEUE_TIMEOUT_SEC)
+    ap.add_argument("--out", default="overload_results.json")
+    args = ap.parse_args()
+
+    if not rag_core.active.ensemble:
+        raise SystemExit("인덱스가 로드되지 않았습니다.")
+    rag_core.generate = saturating_generate(args.llm_latency_ms, args.upstream_capacity)
+    questions = [q["question"] for q in load_queries()]
+
+    results = {"direct": [], "admission": []}
+    for concurrency in args.concurrency:
+        gate = admission.Admission(
+            max_inflight=args.max_inflight or args.upstream_capacity,
+            queue_size=args.queue_size,
+            queue_timeout=args.queue_timeout,
+            session_rate=0,  # 가상 사용자는 속도 제한 없이 계속 보냄
+        )
+        modes = {
+            "direct": lambda q, session: dict(rag_core.answer_question(q), tier="full"),
+            "admission": gate.answer,
+        }
+        for mode, answer_fn in modes.items():
+            row = run_level(answer_fn, questions, concurrency, args.requests)
+            results[mode].append(row)
+            tiers = ", ".join(f"{k} {v}" for k, v in sorted(row["tiers"].items()))
+            print(f"{mode:9s} 동시 {concurrency:3d}: p50 {row['p50_ms']:8.1f}ms  p99 {row['p99_ms']:8.1f}ms  "
+                  f"{row['requests_per_sec']:6.2f} req/s  ({tiers})")
+
+    write_results(
+        args.out,
+        results,
+        kind="overload",
+        llm_latency_ms=args.llm_latency_ms,
+        upstream_capacity=args.upstream_capacity,
+        queue_size=args.queue_size,
+        queue_timeout=args.queue_timeout,
+    )
+
+
+if __name__ == "__main__":
+    main()
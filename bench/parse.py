@@ -0,0 +1,128 @@
+# bench/parse.py (공지 HTML 추출 골든 파일 검사 + 파싱 처리량 측정)
+#
+#   python -m bench.parse --fetch "<게시글 URL>" ...   # 공지 HTML을 bench/html/ 에 저장
+#   python -m bench.parse --update                    # html.parser 기준 출력을 골든 파일로 기록
+#   python -m bench.parse                             # 빠른 파서 출력이 골든과 같은지 검사 + pages/sec 측정
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+import time
+
+import requests
+
+from asd import HTML_PARSER, extract_content_from_soup, extract_posted_date, make_soup
+
+HTML_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "html")
+HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
+
+
+def golden_path(html_path):
+    return os.path.splitext(html_path)[0] + ".golden.json"
+
+
+def extract(html, url, parser):
+    soup = make_soup(html, parser)
+    posted_at = extract_posted_date(soup)
+    title, main_text, image_urls, attachments = extract_content_from_soup(soup, url)
+    return {"title": title, "posted_at": posted_at, "main_text": main_text, "image_urls": image_urls,
+            "attachments": attachments}
+
+
+def fetch_pages(urls):
+    os.makedirs(HTML_DIR, exist_ok=True)
+    for url in urls:
+        seq = re.search(r"seq=(\d+)", url)
+        name = f"kau_{seq.group(1) if seq else int(time.time())}.html"
+        response = requests.get(url, headers=HEADERS, timeout=10)
+        response.raise_for_status()
+        with open(os.path.join(HTML_DIR, name), "w", encoding="utf-8") as f:
+            f.write(response.text)
+        with open(os.path.join(HTML_DIR, name.replace(".html", ".url")), "w", encoding="utf-8") as f:
+            f.write(url)
+        print(f"저장: {name}")
+
+
+def load_pages():
+    pages = []
+    for html_path in sorted(glob.glob(os.path.join(HTML_DIR, "*.html"))):
+        with open(html_path, "r", encoding="utf-8") as f:
+            html = f.read()
+        url_path = html_path[:-len(".html")] + ".url"
+        url = "https://kau.ac.kr/kaulife/acdnoti.php"
+        if os.path.exists(url_path):
+            with open(url_path, "r", encoding="utf-8") as f:
+                url = f.read().strip()
+        pages.append((html_path, html, url))
+    return pages
+
+
+def update_golden(pages):
+    # 골든 출력은 항상 기존 기준 파서(html.parser)로 만든다
+    for html_path, html, url in pages:
+        with open(golden_path(html_path), "w", encoding="utf-8") as f:
+            json.dump(extract(html, url, "html.parser"), f, ensure_ascii=False, indent=2)
+    print(f"골든 파일 {len(pages)}개 갱신")
+
+
+def check_golden(pages, parser):
+    failures = 0
+    for html_path, html, url in pages:
+        if not os.path.exists(golden_path(html_path)):
+            # 골든 없이 통과시키면 파서가 바뀌어도 검사가 항상 성공한다
+            failures += 1
+            print(f"  ❌ 골든 없음: {os.path.basename(html_path)} (--update로 먼저 기록)")
+            continue
+        with open(golden_path(html_path), "r", encoding="utf-8") as f:
+            expected = json.load(f)
+        actual = extract(html, url, parser)
+        if actual != expected:
+            failures += 1
+            diff_keys = [k for k in dict.fromkeys([*expected, *actual]) if expected.get(k) != actual.get(k)]
+            print(f"  ❌ {os.path.basename(html_path)}: {', '.join(diff_keys)} 불일치")
+    return failures
+
+
+def throughput(pages, parser, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for html_path, html, url in pages:
+            extract(html, url, parser)
+    elapsed = time.perf_counter() - start
+    return len(pages) * rounds / elapsed
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--fetch", nargs="+", metavar="URL")
+    ap.add_argument("--update", action="store_true")
+    ap.add_argument("--rounds", type=int, default=5)
+    args = ap.parse_args()
+
+    if args.fetch:
+        fetch_pages(args.fetch)
+        return
+
+    pages = load_pages()
+    if not pages:
+        print(f"'{HTML_DIR}'에 저장된 HTML이 없습니다. --fetch로 먼저 저장하세요.")
+        sys.exit(1)
+
+    if args.update:
+        update_golden(pages)
+        return
+
+    failures = check_golden(pages, HTML_PARSER)
+    print(f"골든 검사 ({HTML_PARSER}): {len(pages) - failures}/{len(pages)} 일치")
+
+    for parser in dict.fromkeys(["html.parser", HTML_PARSER]):
+        print(f"{parser:12s}: {throughput(pages, parser, args.rounds):.1f} pages/sec")
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# bench/rerank_eval.py (재정렬 유무에 따른 답변 근거 recall vs 지연)
+#
+#   python -m bench.rerank_eval --eval bench/eval_questions.jsonl --modes cross m3 --top-k 3 5 --budget-ms 100 300
+#
+# 평가 파일: 한 줄에 {"question": "...", "sources": ["정답 근거 공지 URL", ...]}
+# recall = LLM에 전달되는 문서(제목/출처 기준 중복 제거 후 top-k) 안에 정답 URL이 들어간 비율.
+# 중복 제거로 합쳐진 공지는 aliases의 URL도 정답으로 인정한다.
+import argparse
+import json
+import time
+
+import numpy as np
+
+import rag_core
+from rerank import RERANK_CANDIDATES, Reranker
+
+
+def doc_urls(doc):
+    urls = {doc.metadata.get("source", "")}
+    urls.update(a for a in doc.metadata.get("aliases", "").split(";") if a)
+    return urls
+
+
+def recall(docs, sources):
+    found = set().union(*(doc_urls(d) for d in docs)) if docs else set()
+    return len(found & set(sources)) / len(sources)
+
+
+def candidate_ensemble(generation, depth, k):
+    return rag_core.EnsembleRetriever(
+        retrievers=[
+            rag_core.BM25Searcher(generation.bm25_retriever, k=depth),
+            rag_core.FaissSearcher(generation.vector_db, k=depth),
+        ],
+        weights=[0.3, 0.7],
+        k=k,
+        depth=depth,
+    )
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--eval", required=True)
+    ap.add_argument("--modes", nargs="+", default=["cross"])
+    ap.add_argument("--top-k", type=int, nargs="+", default=[3, 5])
+    ap.add_argument("--budget-ms", type=float, nargs="+", default=[100, 300, 1000])
+    ap.add_argument("--out", default=None)
+    args = ap.parse_args()
+
+    with open(args.eval, "r", encoding="utf-8") as f:
+        items = [json.loads(line) for line in f if line.strip()]
+
+    # 후보 목록은 한 번만 만들어 모든 설정에서 재사용
+    ensemble = candidate_ensemble(rag_core.active, RERANK_CANDIDATES, RERANK_CANDIDATES)
+    candidates = [ensemble.invoke(item["question"]) for item in items]
+
+    # 기준선: 지금처럼 검색기별 10개 융합 → top 5
+    fused = candidate_ensemble(rag_core.active, 10, 5)
+    fused_docs = [rag_core.unique_by_article(fused.invoke(item["question"])) for item in items]
+
+    results = []
+    for top_k in args.top_k:
+        baseline = [recall(docs[:top_k], it["sources"]) for docs, it in zip(fused_docs, items)]
+        results.append({"mode": "off", "top_k": top_k, "recall": float(np.mean(baseline)), "p50_ms": 0.0, "p99_ms": 0.0})
+
+    for mode in args.modes:
+        for budget in args.budget_ms:
+            reranker = Reranker(mode, budget_ms=budget)
+            reranker.rerank("워밍업", candidates[0][:2], top_k=1)
+            for top_k in args.top_k:
+                reranker.cache.clear()
+                scores, latencies = [], []
+                for c, item in zip(candidates, items):
+                    start = time.perf_counter()
+                    ranked = reranker.rerank(item["question"], c, top_k=len(c))
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    scores.append(recall(rag_core.unique_by_article(ranked)[:top_k], item["sources"]))
+                results.append({
+                    "mode": mode, "budget_ms": budget, "top_k": top_k,
+                    "recall": float(np.mean(scores)),
+                    "p50_ms": float(np.percentile(latencies, 50)),
+                    "p99_ms": float(np.percentile(latencies, 99)),
+                })
+
+    for r in results:
+        budget = f"예산 {r['budget_ms']:.0f}ms" if "budget_ms" in r else "재정렬 없음"
+        print(f"{r['mode']:5s} {budget:12s} top{r['top_k']}: recall {r['recall']:.3f}, "
+              f"p50 {r['p50_ms']:.1f}ms, p99 {r['p99_ms']:.1f}ms")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+# bench/rewrite.py (후속 질문 질의 재작성 지연 + 검색 재사용 효과)
+#
+#   python -m bench.rewrite                      # 기대 재작성 검사 + 재작성 단계 지연 (인덱스 불필요)
+#   python -m bench.rewrite --retrieve --out rewrite.json
+#
+# 대화 파일: 한 줄에 {"turns": ["첫 질문", "후속 질문", ...], "expected": [null, "기대 검색 질의", ...]}
+#   expected의 null은 "다시 쓰지 않고 그대로 검색". 하나라도 다르면 종료 코드 1
+# 재작성은 처음 보는 입력(cold, lru_cache 비움)과 반복 입력(warm)을 따로 잰다.
+# --retrieve: 후속 질문마다 재작성 질의로 새로 검색할 때와 직전 결과를 재사용할 때의 지연 비교
+import argparse
+import json
+import os
+import sys
+import time
+
+import rewrite
+from bench.common import BENCH_DIR, summarize, write_results
+
+CONVERSATIONS_PATH = os.path.join(BENCH_DIR, "conversations.jsonl")
+
+
+def load_conversations(path=CONVERSATIONS_PATH):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def followups(conversations):
+    # (질문, 그 앞까지의 기록) 목록. 답변 자리는 빈 텍스트 응답으로 채움
+    cases = []
+    for conversation in conversations:
+        history = []
+        for question in conversation["turns"]:
+            if history:
+                cases.append((question, list(history)))
+            query, _, _ = rewrite.rewrite_query(question, history)
+            user_entry = {"speaker": "user", "content": question}
+            if query != question:
+                user_entry["query"] = query
+            history += [user_entry, {"speaker": "ai", "type": "text", "content": ""}]
+    return cases
+
+
+def check_expected(conversations):
+    # 대화를 처음부터 따라가며 턴마다 기대 질의와 비교, 불일치 수
+    failures = 0
+    for conversation in conversations:
+        history = []
+        for question, expected in zip(conversation["turns"], conversation.get("expected", [])):
+            query, _, _ = rewrite.rewrite_query(question, history)
+            actual = query if query != question else None
+            if actual != expected:
+                failures += 1
+                print(f"  ❌ {question}: 기대 {expected!r}, 실제 {actual!r}")
+            history += [{"speaker": "user", "content": question}, {"speaker": "ai", "type": "text", "content": ""}]
+    return failures
+
+
+def time_rewrite(cases, rounds, cold):
+    latencies = []
+    for _ in range(rounds):
+        for question, history in cases:
+            if cold:
+                rewrite._rewrite.cache_clear()
+            start = time.perf_counter()
+            rewrite.rewrite_query(question, history)
+            latencies.append(time.perf_counter() - start)
+    return summarize(latencies)
+
+
+def time_retrieve(cases):
+    import rag_core
+
+    fresh, reused, n_reused = [], [], 0
+    for question, history in cases:
+        query, previous, same_topic = rewrite.rewrite_query(question, history)
+        if previous is not None:
+            rag_core.retrieval_cache.put(
+                rag_core.RetrievalCache.key(rag_core.active, previous, None), rag_core.retrieve(previous)
+            )
+
+        start = time.perf_counter()
+        rag_core.retrieve(query)
+        fresh.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        rag_core.retrieve_in_context(question, history)
+        reused.append(time.perf_counter() - start)
+        n_reused += same_topic
+    return {"fresh": summarize(fresh), "in_context": summarize(reused), "same_topic": n_reused}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--conversations", default=CONVERSATIONS_PATH)
+    ap.add_argument("--rounds", type=int, default=200)
+    ap.add_argument("--retrieve", action="store_true", help="검색 재사용 효과도 측정 (인덱스 로드)")
+    ap.add_argument("--out", default=None)
+    args = ap.parse_args()
+
+    conversations = load_conversations(args.conversations)
+    cases = followups(conversations)
+    for question, history in cases:
+        query, _, same_topic = rewrite.rewrite_query(question, history)
+        print(f"{question:24s} → {query}{'  (주제 유지)' if same_topic else ''}")
+    failures = check_expected(conversations)
+    n_turns = sum(len(c.get("expected", [])) for c in conversations)
+    print(f"기대 재작성 검사: {n_turns - failures}/{n_turns} 일치")
+
+    results = {
+        "rewrite_cold": time_rewrite(cases, args.rounds, cold=True),
+        "rewrite_warm": time_rewrite(cases, args.rounds, cold=False),
+    }
+    if args.retrieve:
+        results["retrieve"] = time_retrieve(cases)
+
+    for name in ("rewrite_cold", "rewrite_warm"):
+        r = results[name]
+        print(f"{name:13s} p50 {r['p50_ms'] * 1000:8.1f}µs  p99 {r['p99_ms'] * 1000:8.1f}µs  (n={r['n']})")
+    if args.retrieve:
+        r = results["retrieve"]
+        print(f"검색 새로 p50 {r['fresh']['p50_ms']:.1f}ms / 맥락 검색 p50 {r['in_context']['p50_ms']:.1f}ms "
+              f"(주제 유지 {r['same_topic']}/{len(cases)})")
+
+    if args.out:
+        write_results(args.out, results, kind="rewrite", followups=len(cases))
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# bench/rss.py (워커 수별 메모리 사용량 측정)
+#
+#   python -m bench.rss                          # 워커 1, 4, 8개로 각각 gunicorn 실행
+#   python -m bench.rss --workers 1 4 --env KAU_FAISS_MMAP=1 --env KAU_EMBED_SOCKET=/tmp/kau-embed.sock
+#
+# 워커별 RSS(프로세스가 올린 전체 페이지)와 PSS(공유 페이지를 나눠 계산한 실제 부담)를 함께 본다.
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import requests
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def memory_kb(pid):
+    usage = {}
+    with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if key in ("Rss", "Pss", "Shared_Clean", "Private_Dirty"):
+                usage[key] = int(value.split()[0])
+    return usage
+
+
+def child_pids(pid):
+    children = []
+    for tid in os.listdir(f"/proc/{pid}/task"):
+        with open(f"/proc/{pid}/task/{tid}/children", "r") as f:
+            children.extend(int(c) for c in f.read().split())
+    return children
+
+
+def wait_ready(url, timeout):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(url, timeout=2).status_code == 200:
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(1)
+    return False
+
+
+def measure(n_workers, port, extra_env, timeout):
+    env = dict(os.environ, KAU_WORKERS=str(n_workers), KAU_BIND=f"127.0.0.1:{port}", **extra_env)
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:server"],
+        cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        if not wait_ready(f"http://127.0.0.1:{port}/", timeout):
+            raise RuntimeError(f"gunicorn(워커 {n_workers}) 준비 시간 초과")
+
+        workers = [memory_kb(pid) for pid in child_pids(proc.pid)]
+        return {
+            "workers": n_workers,
+            "master": memory_kb(proc.pid),
+            "per_worker": workers,
+            "avg_worker_rss_mb": sum(w["Rss"] for w in workers) / len(workers) / 1024,
+            "avg_worker_pss_mb": sum(w["Pss"] for w in workers) / len(workers) / 1024,
+            "total_pss_mb": (sum(w["Pss"] for w in workers) + memory_kb(proc.pid)["Pss"]) / 1024,
+        }
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(timeout=30)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    ap.add_argument("--port", type=int, default=18050)
+    ap.add_argument("--env", action="append", default=[], metavar="KEY=VALUE")
+    ap.add_argument("--timeout", type=int, default=600)
+    ap.add_argument("--out", default=None)
+    args = ap.parse_args()
+
+    extra_env = dict(item.split("=", 1) for item in args.env)
+    results = []
+    for n in args.workers:
+        result = measure(n, args.port, extra_env, args.timeout)
+        results.append(result)
+        print(f"워커 {n}개: 워커당 RSS {result['avg_worker_rss_mb']:.0f}MB, "
+              f"PSS {result['avg_worker_pss_mb']:.0f}MB, 전체 PSS {result['total_pss_mb']:.0f}MB")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"env": extra_env, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# bench/run.py (검색/융합/컨텍스트/출처 후처리 마이크로벤치 + 가짜 Gemini 종단 측정)
+#
+#   python -m bench.run --out bench_results.json
+#   python -m bench.compare old.json bench_results.json
+#
+# 저장소에 포함된 인덱스(또는 현재 세대)를 그대로 쓰고, Gemini는 고정 지연 스텁으로 대체한다.
+import argparse
+
+import rag_core
+from bench.common import load_queries, make_stub_generate, timeit, write_results
+
+
+class StaticRetriever:
+    # 미리 구한 검색 결과를 돌려줌 → 융합 단계만 따로 측정
+    def __init__(self, results):
+        self.results = results
+
+    def invoke(self, query):
+        return self.results[query]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rounds", type=int, default=3)
+    ap.add_argument("--llm-latency-ms", type=float, default=0)
+    ap.add_argument("--out", default="bench_results.json")
+    args = ap.parse_args()
+
+    generation = rag_core.active
+    if not generation.ensemble:
+        raise SystemExit("인덱스가 로드되지 않았습니다.")
+
+    questions = [(q["question"],) for q in load_queries()]
+    results = {}
+
+    # (1) 검색기별
+    results["embed_query"] = timeit(rag_core.embeddings.embed_query, questions, args.rounds)
+    results["bm25"] = timeit(generation.bm25_searcher.invoke, questions, args.rounds)
+    results["faiss"] = timeit(generation.faiss_retriever.invoke, questions, args.rounds)
+
+    # (2) 융합만
+    bm25_results = {q: generation.bm25_searcher.invoke(q) for (q,) in questions}
+    faiss_results = {q: generation.faiss_retriever.invoke(q) for (q,) in questions}
+    fusion = rag_core.EnsembleRetriever(
+        retrievers=[StaticRetriever(bm25_results), StaticRetriever(faiss_results)],
+        weights=generation.ensemble.weights,
+        k=generation.ensemble.k,
+        depth=generation.ensemble.depth,
+    )
+    results["fusion"] = timeit(fusion.invoke, questions, args.rounds)
+
+    # (3) 검색 전체 (융합 + 재정렬 + 중복 제거)
+    results["retrieve"] = timeit(rag_core.retrieve, questions, args.rounds)
+
+    # (4) 컨텍스트 구성 / 출처 후처리
+    retrieved = {q: rag_core.retrieve(q) for (q,) in questions}
+    results["build_prompt"] = timeit(
+        rag_core.build_prompt, [(q, retrieved[q]) for (q,) in questions], args.rounds * 10
+    )
+    stub_answer = make_stub_generate()("")
+    results["attach_sources"] = timeit(
+        rag_core.attach_sources, [(stub_answer, retrieved[q]) for (q,) in questions], args.rounds * 10
+    )
+    results["parse_citations"] = timeit(
+        rag_core.parse_citations, [(stub_answer, retrieved[q]) for (q,) in questions], args.rounds * 10
+    )
+
+    # (5) 종단 (Gemini 스텁)
+    rag_core.generate = make_stub_generate(args.llm_latency_ms)
+    results["get_ai_response"] = timeit(rag_core.get_ai_response, questions, args.rounds)
+
+    for name, r in results.items():
+        print(f"{name:16s} p50 {r['p50_ms']:8.2f}ms  p99 {r['p99_ms']:8.2f}ms  (n={r['n']})")
+
+    write_results(
+        args.out,
+        results,
+        kind="micro",
+        generation=generation.name,
+        chunks=len(generation.bm25_retriever.docs),
+        llm_latency_ms=args.llm_latency_ms,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+# bench/stub_server.py (Gemini를 스텁으로 바꾼 앱 서버, 부하 테스트용)
+#
+#   python -m bench.stub_server --port 8050 --llm-latency-ms 1500
+import argparse
+
+import rag_core
+from bench.common import make_stub_generate
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8050)
+    ap.add_argument("--llm-latency-ms", type=float, default=1500)
+    args = ap.parse_args()
+
+    rag_core.generate = make_stub_generate(args.llm_latency_ms)
+
+    import app
+    app.server.run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# chunking.py (chunk 분할 전략)
+#
+#   KAU_CHUNK_STRATEGY=recursive  기존 방식 (RecursiveCharacterTextSplitter 350 / overlap 100)
+#   KAU_CHUNK_STRATEGY=structure  문단(줄)·표 행 경계에서만 자름, 중간에 잘린 표는 머리행을 반복
+#   KAU_CHUNK_STRATEGY=sentence   structure + 긴 문단은 한국어 문장 단위로 다시 나눔
+#
+# 모든 전략은 chunk마다 원문(page_content) 기준 위치 chunk_start / chunk_end 를 metadata에 기록한다.
+import os
+import re
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+CHUNK_STRATEGY = os.environ.get("KAU_CHUNK_STRATEGY", "recursive")
+CHUNK_SIZE = int(os.environ.get("KAU_CHUNK_SIZE", "350"))
+CHUNK_OVERLAP = int(os.environ.get("KAU_CHUNK_OVERLAP", "100"))  # recursive 전용
+UNIT_OVERLAP = int(os.environ.get("KAU_CHUNK_UNIT_OVERLAP", "0"))  # structure/sentence: 겹칠 줄(문장) 수
+
+TABLE_ROW_SEPARATOR = " | "  # extract_content_from_soup가 표 셀을 잇는 구분자
+sentence_end_regex = re.compile(r"(?<=[.!?。])\s+|(?<=[다요죠]\.)(?=\S)")
+
+
+class RecursiveChunker:
+    def __init__(self, chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP):
+        self.splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            add_start_index=True,
+        )
+
+    def split_documents(self, documents):
+        chunks = self.splitter.split_documents(documents)
+        for chunk in chunks:
+            start = chunk.metadata.pop("start_index", -1)
+            chunk.metadata["chunk_start"] = start
+            chunk.metadata["chunk_end"] = start + len(chunk.page_content) if start >= 0 else -1
+        return chunks
+
+
+class StructureChunker:
+    def __init__(self, chunk_size=CHUNK_SIZE, unit_overlap=UNIT_OVERLAP, sentences=False):
+        self.chunk_size = chunk_size
+        self.unit_overlap = unit_overlap
+        self.sentences = sentences
+        # 한 줄(문장)이 chunk_size보다 길 때만 쓰는 예비 분할기
+        self.fallback = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=0, add_start_index=True)
+
+    def units(self, text):
+        # (시작 위치, 끝 위치, 표 행 여부) 목록
+        units = []
+        for line_match in re.finditer(r"[^\n]+", text):
+            line = line_match.group()
+            base = line_match.start()
+            is_row = TABLE_ROW_SEPARATOR in line
+
+            if self.sentences and not is_row and len(line) > self.chunk_size:
+                pieces = self._split_sentences(line)
+            else:
+                pieces = [(0, len(line))]
+
+            for start, end in pieces:
+                # 앞뒤 공백은 chunk 경계에 포함하지 않음
+                while start < end and line[start].isspace():
+                    start += 1
+                while end > start and line[end - 1].isspace():
+                    end -= 1
+                if start == end:
+                    continue
+                if end - start > self.chunk_size:
+                    for doc in self.fallback.create_documents([line[start:end]]):
+                        s = start + doc.metadata["start_index"]
+                        units.append((base + s, base + s + len(doc.page_content), is_row))
+                else:
+                    units.append((base + start, base + end, is_row))
+        return units
+
+    def _split_sentences(self, line):
+        pieces, start = [], 0
+        for match in sentence_end_regex.finditer(line):
+            pieces.append((start, match.start()))
+            start = match.end()
+        pieces.append((start, len(line)))
+        return [(s, e) for s, e in pieces if e > s]
+
+    def split_text(self, text):
+        # (chunk 문자열, 시작, 끝) 목록
+        units = self.units(text)
+        chunks = []
+        i = 0
+        table_header = None  # 현재 표의 첫 행
+
+        while i < len(units):
+            first = i
+            start, end, is_row = units[i]
+            prefix = ""
+            if is_row and table_header is not None and table_header[0] != start:
+                prefix = text[table_header[0]:table_header[1]] + "\n"
+
+            size = len(prefix) + (end - start)
+            i += 1
+            while i < len(units) and size + 1 + (units[i][1] - units[i][0]) <= self.chunk_size:
+                size += 1 + (units[i][1] - units[i][0])
+                end = units[i][1]
+                i += 1
+
+            # 다음 chunk에서 표가 이어지면 머리행을 알 수 있도록 기록
+            for s, e, row in units[first:i]:
+                if not row:
+                    table_header = None
+                elif table_header is None:
+                    table_header = (s, e)
+
+            chunks.append((prefix + text[start:end], start, end))
+            if self.unit_overlap and i < len(units):
+                i = max(first + 1, i - self.unit_overlap)
+        return chunks
+
+    def split_documents(self, documents):
+        chunks = []
+        for doc in documents:
+            for index, (content, start, end) in enumerate(self.split_text(doc.page_content)):
+                metadata = dict(doc.metadata, chunk_index=index, chunk_start=start, chunk_end=end)
+                chunks.append(Document(page_content=content, metadata=metadata))
+        return chunks
+
+
+def get_chunker(strategy=CHUNK_STRATEGY):
+    if strategy == "recursive":
+        return RecursiveChunker()
+    if strategy == "structure":
+        return StructureChunker()
+    if strategy == "sentence":
+        return StructureChunker(sentences=True)
+    raise ValueError(f"알 수 없는 chunk 전략: {strategy}")
+
+
+def chunk_stats(chunks):
+    return {
+        "chunks": len(chunks),
+        "embedded_chars": sum(len(c.page_content) for c in chunks),
+    }
@@ -0,0 +1,116 @@
+# dedup.py (MinHash 기반 유사 중복 게시글 탐지)
+#
+# acdnoti.php / notice.php 에 같은 공지가 중복 게시되거나, 수정본이 새 글로 올라오는 경우를
+# 인덱싱 전에 하나로 묶는다. 묶음마다 최신 글만 남기고 나머지 URL은 aliases로 기록한다.
+import re
+import zlib
+
+import numpy as np
+
+SHINGLE_SIZE = 5        # 문자 n-gram 크기 (한국어는 단어보다 문자 단위가 안정적)
+NUM_PERM = 64           # MinHash 해시 함수 수
+LSH_BANDS = 16          # LSH 밴드 수 (밴드당 NUM_PERM / LSH_BANDS 행)
+DEDUP_THRESHOLD = 0.8   # 추정 자카드 유사도가 이 값 이상이면 중복
+
+_MERSENNE_PRIME = (1 << 31) - 1
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(1, _MERSENNE_PRIME, size=NUM_PERM, dtype=np.int64)
+_PERM_B = _rng.randint(0, _MERSENNE_PRIME, size=NUM_PERM, dtype=np.int64)
+
+whitespace_regex = re.compile(r"\s+")
+
+
+def minhash_signature(text):
+    text = whitespace_regex.sub("", text.lower())
+    if len(text) < SHINGLE_SIZE:
+        text = text.ljust(SHINGLE_SIZE)
+
+    shingles = {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+    hashes = np.fromiter(
+        (zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.int64, count=len(shingles)
+    )
+    # (a*h + b) mod p 를 모든 해시 함수에 대해 한 번에 계산
+    permuted = (np.outer(_PERM_A, hashes) + _PERM_B[:, None]) % _MERSENNE_PRIME
+    return permuted.min(axis=1)
+
+
+def similarity(sig_a, sig_b):
+    return float(np.mean(sig_a == sig_b))
+
+
+def article_text(article):
+    return f"{article.get('title', '')}\n{article.get('content', '')}"
+
+
+def recency_key(article):
+    # 최신 판정: 게시일 → seq(게시 번호) → 수집 시각 순
+    seq = article.get("seq")
+    return (
+        article.get("posted_at") or "",
+        int(seq) if seq and str(seq).isdigit() else 0,
+        article.get("crawled_at") or "",
+    )
+
+
+class NearDupIndex:
+    def __init__(self):
+        self.rows = NUM_PERM // LSH_BANDS
+        self.buckets = [{} for _ in range(LSH_BANDS)]
+        self.signatures = {}  # key → signature
+
+    def _band_keys(self, sig):
+        for band in range(LSH_BANDS):
+            yield band, sig[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def find(self, sig):
+        # 가장 비슷한 기존 항목 (임계값 이상일 때만)
+        candidates = set()
+        for band, band_key in self._band_keys(sig):
+            candidates.update(self.buckets[band].get(band_key, ()))
+
+        best_key, best_score = None, DEDUP_THRESHOLD
+        for key in candidates:
+            score = similarity(sig, self.signatures[key])
+            if score >= best_score:
+                best_key, best_score = key, score
+        return best_key
+
+    def add(self, key, sig):
+        self.signatures[key] = sig
+        for band, band_key in self._band_keys(sig):
+            self.buckets[band].setdefault(band_key, []).append(key)
+
+    def remove(self, key):
+        sig = self.signatures.pop(key, None)
+        if sig is None:
+            return
+        for band, band_key in self._band_keys(sig):
+            bucket = self.buckets[band].get(band_key, [])
+            if key in bucket:
+                bucket.remove(key)
+
+
+def dedup_articles(articles):
+    # 반환: (남길 게시글 목록 (aliases 포함), 제거된 게시글 목록)
+    index = NearDupIndex()
+    clusters = {}  # 대표 URL → 묶인 게시글들
+
+    # 최신 글부터 넣어서, 각 묶음의 첫 글(대표)이 최신이 되도록 함
+    for article in sorted(articles, key=recency_key, reverse=True):
+        sig = minhash_signature(article_text(article))
+        match = index.find(sig)
+        if match is None:
+            index.add(article["url"], sig)
+            clusters[article["url"]] = [article]
+        else:
+            clusters[match].append(article)
+
+    kept, removed = [], []
+    for members in clusters.values():
+        canonical = dict(members[0])
+        aliases = [m["url"] for m in members[1:]]
+        if aliases:
+            canonical["aliases"] = sorted(set(canonical.get("aliases", []) + aliases))
+        kept.append(canonical)
+        removed.extend(members[1:])
+    return kept, removed
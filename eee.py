@@ -1,128 +1,320 @@
-﻿import os
-import re
-import glob
-import pickle
-
-from langchain_core.documents import Document
-from langchain_community.vectorstores import FAISS
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.retrievers import BM25Retriever
-
-# -----------------------------
-# 경로 / 설정
-# -----------------------------
-TEXT_FILES_PATH = "cleaned_texts"
-DB_FAISS_PATH = "faiss_index"
-DB_BM25_PATH = "bm25_retriever.pkl"
-
-# 최신 한국어 임베딩
-EMBEDDING_MODEL = "BAAI/bge-m3"
-
-# -----------------------------
-# 정규식
-# -----------------------------
-url_regex = re.compile(r"^출처 URL: (https?://[^\s]+)")
-title_regex = re.compile(r"^제목: (.+)")
-image_url_regex = re.compile(r"^이미지 URL: (.+)")
-attachment_regex = re.compile(r"^첨부파일: (.+)")
-separator = "=" * 40
-
-
-def create_vector_db():
-    txt_files = glob.glob(os.path.join(TEXT_FILES_PATH, "*.txt"))
-    if not txt_files:
-        print(f"'{TEXT_FILES_PATH}' 폴더에 .txt 파일이 없습니다.")
-        return
-
-    documents = []
-
-    for file_path in txt_files:
-        with open(file_path, "r", encoding="utf-8") as f:
-            content = f.read()
-
-        # 메타데이터 / 본문 분리
-        parts = content.split(separator, 1)
-        if len(parts) > 1:
-            metadata_part, page_content = parts[0], parts[1].strip()
-        else:
-            metadata_part, page_content = "", content
-
-        if not page_content:
-            continue
-
-        # -----------------------------
-        # 메타데이터 파싱
-        # -----------------------------
-        source_url, title, image_url_str, attachment_str = "출처 없음", "제목 없음", "", ""
-
-        for line in metadata_part.split("\n"):
-            if url_match := url_regex.search(line):
-                source_url = url_match.group(1)
-            if title_match := title_regex.search(line):
-                title = title_match.group(1)
-            if image_match := image_url_regex.search(line):
-                image_url_str = image_match.group(1)
-            if attachment_match := attachment_regex.search(line):
-                attachment_str = attachment_match.group(1)
-
-        metadata = {
-            "source": source_url,
-            "title": title,
-            "raw_content": page_content,  # LLM에 보여줄 원본 텍스트
-        }
-        if image_url_str:
-            metadata["image_urls"] = image_url_str
-        if attachment_str:
-            metadata["attachments"] = attachment_str
-
-        # 검색 정확도 향상을 위해 제목을 본문 앞에 붙여둠
-        doc_text = f"{title}\n{page_content}"
-
-        documents.append(
-            Document(
-                page_content=doc_text,
-                metadata=metadata,
-            )
-        )
-
-    # -----------------------------
-    # 텍스트 분할 (chunk_size=350, overlap=100)
-    # -----------------------------
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=350,
-        chunk_overlap=100,
-    )
-
-    print(f"총 {len(documents)}개의 문서를 로드했습니다. 텍스트 분할을 시작합니다...")
-    split_docs = text_splitter.split_documents(documents)
-    print(f"총 {len(split_docs)}개의 텍스트 조각(chunk)을 생성했습니다.")
-
-    # -----------------------------
-    # FAISS 생성 (bge-m3)
-    # -----------------------------
-    print("FAISS 인덱스를 생성합니다...(bge-m3)")
-    embeddings = HuggingFaceEmbeddings(
-        model_name=EMBEDDING_MODEL,
-        model_kwargs={"device": "cpu"},
-        encode_kwargs={"normalize_embeddings": True},
-    )
-
-    db = FAISS.from_documents(split_docs, embeddings)
-    db.save_local(DB_FAISS_PATH)
-    print(f"Vector DB가 '{DB_FAISS_PATH}'에 저장되었습니다.")
-
-    # -----------------------------
-    # BM25 생성 (원본 chunk 기반)
-    # -----------------------------
-    print("BM25 인덱스를 생성합니다...")
-    bm25_retriever = BM25Retriever.from_documents(split_docs)
-
-    with open(DB_BM25_PATH, "wb") as f:
-        pickle.dump(bm25_retriever, f)
-
-    print(f"BM25 인덱스가 '{DB_BM25_PATH}'에 저장되었습니다.")
-
-
-if __name__ == "__main__":
-    create_vector_db()
+﻿import os
+import json
+import time
+import pickle
+import hashlib
+import argparse
+
+from langchain_core.documents import Document
+from langchain_community.vectorstores import FAISS
+from langchain_community.retrievers import BM25Retriever
+
+from articles import ARTICLES_PATH, seq_regex, citation_entry, read_articles, follow_articles, import_legacy_texts
+from chunking import CHUNK_STRATEGY, get_chunker, chunk_stats
+from encoders import EMBEDDING_MODEL, EMBEDDING_BACKEND, load_encoder, encoder_manifest
+from generations import INDEXES_DIR, FAISS_DIR, BM25_FILE, publish_generation, current_generation, read_manifest
+from dedup import NearDupIndex, minhash_signature, article_text, recency_key, dedup_articles
+
+# -----------------------------
+# 경로 / 설정
+# -----------------------------
+TEXT_FILES_PATH = "cleaned_texts"  # 예전 .txt 포맷 (변환용)
+DB_FAISS_PATH = "faiss_index"  # 세대 도입 전 인덱스 위치 (읽기 전용 fallback)
+DB_BM25_PATH = "bm25_retriever.pkl"
+
+# 한 번에 분할/임베딩할 게시글 수
+ARTICLE_BATCH_SIZE = 32
+
+
+def load_embeddings():
+    # 최신 한국어 임베딩 (bge-m3), 백엔드는 KAU_EMBED_BACKEND로 선택
+    return load_encoder(EMBEDDING_BACKEND)
+
+
+def get_text_splitter():
+    # 텍스트 분할 전략은 KAU_CHUNK_STRATEGY로 선택 (기본: chunk_size=350, overlap=100)
+    return get_chunker(CHUNK_STRATEGY)
+
+
+# -----------------------------
+# 게시글 레코드 → Document
+# -----------------------------
+def article_fingerprint(article):
+    # 다시 수집한 게시글이 수정됐는지 비교하는 값 (crawled_at은 매번 바뀌므로 제외)
+    key = [
+        article.get("title") or "",
+        (article.get("content") or "").strip(),
+        article.get("posted_at"),
+        [[att["filename"], att["url"]] for att in article.get("attachments") or []],
+        list(article.get("image_urls") or []),
+    ]
+    return hashlib.sha1(json.dumps(key, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def article_to_document(article):
+    page_content = (article.get("content") or "").strip()
+    if not page_content:
+        return None
+
+    title = article.get("title") or "제목 없음"
+    metadata = {
+        "source": article.get("url") or "출처 없음",
+        "title": title,
+        "raw_content": page_content,  # LLM에 보여줄 원본 텍스트
+        "content_hash": article_fingerprint(article),
+    }
+    # 검색 필터/최신순 가산점용 메타데이터
+    if article.get("seq"):
+        metadata["seq"] = int(article["seq"])
+    if article.get("board"):
+        metadata["board"] = article["board"]
+    if article.get("posted_at"):
+        metadata["posted_at"] = article["posted_at"]
+    if article.get("image_urls"):
+        metadata["image_urls"] = ";".join(article["image_urls"])
+    if article.get("attachments"):
+        metadata["attachments"] = ";".join(
+            f"{att['filename']}|{att['url']}" for att in article["attachments"]
+        )
+    # 답변 출처 항목(제목 링크 + 첨부파일 링크)은 미리 만들어 둠
+    metadata["citation"] = citation_entry(
+        title,
+        article.get("url"),
+        [(att["filename"], att["url"]) for att in article.get("attachments") or []],
+    )
+    if article.get("aliases"):
+        metadata["aliases"] = ";".join(article["aliases"])  # 중복으로 합쳐진 다른 게시글 URL
+
+    # 검색 정확도 향상을 위해 제목을 본문 앞에 붙여둠
+    return Document(page_content=f"{title}\n{page_content}", metadata=metadata)
+
+
+# -----------------------------
+# 배치 인덱싱 / 저장
+# -----------------------------
+def index_batch(documents, db, bm25_docs, embeddings, text_splitter):
+    split_docs = text_splitter.split_documents(documents)
+    if not split_docs:
+        return db, 0
+
+    if db is None:
+        db = FAISS.from_documents(split_docs, embeddings)
+    else:
+        db.add_documents(split_docs)
+
+    bm25_docs.extend(split_docs)
+    return db, len(split_docs)
+
+
+def save_indexes(db, bm25_docs, articles_offset, embeddings, **manifest_extra):
+    # BM25는 증분 추가를 지원하지 않으므로 전체 chunk로 다시 생성 (임베딩이 없어 빠름)
+    bm25_retriever = BM25Retriever.from_documents(bm25_docs)
+
+    # 새 세대로 저장 → 실행 중인 서버가 감지해서 무중단 교체
+    # 읽은 위치(offset)와 인코더 probe 벡터도 manifest에 함께 기록
+    return publish_generation(
+        db,
+        bm25_retriever,
+        INDEXES_DIR,
+        articles_offset=articles_offset,
+        chunk_strategy=CHUNK_STRATEGY,
+        embedded_chars=chunk_stats(bm25_docs)["embedded_chars"],
+        **encoder_manifest(embeddings, EMBEDDING_BACKEND),
+        **manifest_extra,
+    )
+
+
+def load_existing_indexes(embeddings):
+    # 현재 세대 → 예전 고정 경로 순으로 기존 인덱스 로드. (db, bm25 chunk 목록, 읽은 위치)
+    name = current_generation(INDEXES_DIR)
+    if name:
+        gen_dir = os.path.join(INDEXES_DIR, name)
+        faiss_path, bm25_path = os.path.join(gen_dir, FAISS_DIR), os.path.join(gen_dir, BM25_FILE)
+        offset = read_manifest(name, INDEXES_DIR).get("articles_offset", 0)
+    elif os.path.exists(DB_FAISS_PATH) and os.path.exists(DB_BM25_PATH):
+        faiss_path, bm25_path, offset = DB_FAISS_PATH, DB_BM25_PATH, 0
+    else:
+        return None, [], 0
+
+    db = FAISS.load_local(faiss_path, embeddings, allow_dangerous_deserialization=True)
+    with open(bm25_path, "rb") as f:
+        bm25_docs = list(pickle.load(f).docs)
+    return db, bm25_docs, offset
+
+
+# -----------------------------
+# 전체 재생성
+# -----------------------------
+def create_vector_db():
+    if not os.path.exists(ARTICLES_PATH) and os.path.isdir(TEXT_FILES_PATH):
+        import_legacy_texts(TEXT_FILES_PATH, ARTICLES_PATH)
+
+    # 같은 URL을 여러 번 수집했으면 마지막(최신) 레코드만 사용
+    latest, end_offset = {}, 0
+    for article, end_offset in read_articles(ARTICLES_PATH):
+        latest[article.get("url")] = article
+
+    kept, removed = dedup_articles(latest.values())
+    documents = [doc for doc in map(article_to_document, kept) if doc]
+    if not documents:
+        print(f"'{ARTICLES_PATH}'에 게시글이 없습니다.")
+        return
+
+    text_splitter = get_text_splitter()
+    removed_docs = [doc for doc in map(article_to_document, removed) if doc]
+    removed_chunks = len(text_splitter.split_documents(removed_docs))
+    print(f"유사 중복 게시글 {len(removed)}개를 묶었습니다. (chunk {removed_chunks}개 절감)")
+
+    print(f"총 {len(documents)}개의 문서를 로드했습니다. 텍스트 분할 및 임베딩을 시작합니다...({EMBEDDING_MODEL}, {EMBEDDING_BACKEND})")
+    embeddings = load_embeddings()
+
+    db, bm25_docs = None, []
+    started = time.perf_counter()
+    for i in range(0, len(documents), ARTICLE_BATCH_SIZE):
+        db, n_chunks = index_batch(documents[i:i + ARTICLE_BATCH_SIZE], db, bm25_docs, embeddings, text_splitter)
+        print(f"  -> {min(i + ARTICLE_BATCH_SIZE, len(documents))}/{len(documents)} 문서 처리 ({n_chunks} chunk)")
+    ingest_seconds = time.perf_counter() - started
+
+    stats = chunk_stats(bm25_docs)
+    print(f"총 {stats['chunks']}개의 텍스트 조각(chunk)을 생성했습니다. "
+          f"(전략 {CHUNK_STRATEGY}, 임베딩 {stats['embedded_chars']:,}자, {ingest_seconds:.1f}초)")
+
+    name = save_indexes(db, bm25_docs, end_offset, embeddings, ingest_seconds=round(ingest_seconds, 1))
+    print(f"Vector DB와 BM25 인덱스가 '{os.path.join(INDEXES_DIR, name)}'에 저장되었습니다.")
+
+
+# -----------------------------
+# 스트리밍 인덱싱 (크롤러가 추가하는 레코드를 바로 반영)
+# -----------------------------
+def indexed_articles(bm25_docs):
+    # 이미 인덱싱된 chunk들에서 게시글 단위 정보 복원 (URL → 게시글)
+    articles = {}
+    for d in bm25_docs:
+        url = d.metadata.get("source")
+        if url not in articles:
+            seq_match = seq_regex.search(url or "")
+            articles[url] = {
+                "url": url,
+                "seq": seq_match.group(1) if seq_match else None,
+                "posted_at": d.metadata.get("posted_at"),
+                "title": d.metadata.get("title", ""),
+                "content": d.metadata.get("raw_content", ""),
+                "aliases": [a for a in d.metadata.get("aliases", "").split(";") if a],
+                "content_hash": d.metadata.get("content_hash"),
+            }
+    return articles
+
+
+def is_unchanged(known_article, article):
+    if known_article.get("content_hash"):
+        return known_article["content_hash"] == article_fingerprint(article)
+    # content_hash 도입 전 chunk: 복원 가능한 제목/본문만 비교
+    return (known_article["title"] == (article.get("title") or "제목 없음")
+            and known_article["content"] == (article.get("content") or "").strip())
+
+
+def remove_article(db, bm25_docs, url):
+    ids = [doc_id for doc_id, doc in db.docstore._dict.items() if doc.metadata.get("source") == url]
+    if ids:
+        db.delete(ids)
+    bm25_docs[:] = [d for d in bm25_docs if d.metadata.get("source") != url]
+
+
+def add_alias(db, bm25_docs, url, alias):
+    for doc in list(db.docstore._dict.values()) + bm25_docs:
+        if doc.metadata.get("source") == url:
+            aliases = [a for a in doc.metadata.get("aliases", "").split(";") if a]
+            if alias not in aliases:
+                doc.metadata["aliases"] = ";".join(aliases + [alias])
+
+
+def stream_index(poll_interval=10):
+    embeddings = load_embeddings()
+    text_splitter = get_text_splitter()
+
+    db, bm25_docs, offset = load_existing_indexes(embeddings)
+
+    known = indexed_articles(bm25_docs)
+    dedup_index = NearDupIndex()
+    for url, article in known.items():
+        dedup_index.add(url, minhash_signature(article_text(article)))
+
+    pending = []
+    dirty = False  # pending 없이 인덱스가 바뀜 (chunk 제거, 별칭 추가) → 이것도 새 세대로 내보내야 함
+    print(f"'{ARTICLES_PATH}' 감시 시작 (offset {offset})")
+
+    for article, offset in follow_articles(ARTICLES_PATH, offset, poll_interval):
+        if article is not None and article.get("url") in known:
+            # 같은 URL을 다시 수집함: 내용이 같으면 건너뛰고, 수정됐으면 예전 chunk를 내린 뒤 새 글로 처리
+            url = article["url"]
+            if is_unchanged(known[url], article):
+                continue
+            old = known.pop(url)
+            dedup_index.remove(url)
+            pending = [d for d in pending if d.metadata.get("source") != url]
+            if db is not None:
+                remove_article(db, bm25_docs, url)
+                dirty = True
+            article = dict(article, aliases=old["aliases"])
+            print(f"  -> 수정된 게시글 재인덱싱: {url}")
+
+        if article is not None and article.get("url") not in known:
+            url = article["url"]
+            sig = minhash_signature(article_text(article))
+            match = dedup_index.find(sig)
+
+            if match is not None and recency_key(known[match]) >= recency_key(article):
+                # 기존 글이 최신 → 새 글은 별칭으로만 기록
+                if db is not None:
+                    add_alias(db, bm25_docs, match, url)
+                    dirty = True
+                known[match]["aliases"].append(url)
+                print(f"  -> 중복 게시글 건너뜀: {url}")
+                continue
+
+            if match is not None:
+                # 새 글이 수정본 → 예전 글의 chunk를 내리고 새 글로 교체
+                old = known.pop(match)
+                dedup_index.remove(match)
+                pending = [d for d in pending if d.metadata.get("source") != match]
+                if db is not None:
+                    remove_article(db, bm25_docs, match)
+                    dirty = True
+                article = dict(article, aliases=old["aliases"] + [match])
+                print(f"  -> 수정본으로 교체: {match} → {url}")
+
+            doc = article_to_document(article)
+            if doc:
+                pending.append(doc)
+            known[url] = dict(article, aliases=list(article.get("aliases", [])),
+                              content_hash=article_fingerprint(article))
+            dedup_index.add(url, sig)
+
+        if article is not None and len(pending) < ARTICLE_BATCH_SIZE:
+            continue
+
+        # 배치가 찼거나, 새 레코드가 더 없을 때 반영
+        if pending:
+            db, n_chunks = index_batch(pending, db, bm25_docs, embeddings, text_splitter)
+            name = save_indexes(db, bm25_docs, offset, embeddings)
+            print(f"  -> 게시글 {len(pending)}개 ({n_chunks} chunk) 추가, 누적 {len(bm25_docs)} chunk → {name}")
+            pending, dirty = [], False
+        elif dirty and bm25_docs:
+            # 예전 chunk만 내리고 추가할 글이 없는 경우 (수정본이 중복으로 판정, 본문이 비게 된 수정 등)
+            name = save_indexes(db, bm25_docs, offset, embeddings)
+            print(f"  -> 삭제/별칭 변경 반영, 누적 {len(bm25_docs)} chunk → {name}")
+            dirty = False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--follow", action="store_true", help="articles.jsonl을 감시하며 증분 인덱싱")
+    parser.add_argument("--import-legacy", action="store_true", help="cleaned_texts/*.txt를 articles.jsonl로 변환")
+    args = parser.parse_args()
+
+    if args.import_legacy:
+        import_legacy_texts(TEXT_FILES_PATH, ARTICLES_PATH)
+    elif args.follow:
+        stream_index()
+    else:
+        create_vector_db()
@@ -0,0 +1,114 @@
+# embed_server.py (공용 쿼리 임베딩 프로세스)
+#
+# bge-m3를 이 프로세스 하나에만 올리고, 앱 워커들은 로컬 유닉스 소켓으로 벡터를 받아간다.
+#   python embed_server.py                      # 기본 소켓: /tmp/kau-embed.sock
+#   KAU_EMBED_SOCKET=/tmp/kau-embed.sock gunicorn -c gunicorn.conf.py app:server
+#
+# 프로토콜: [4바이트 길이][JSON {"texts": [...]}] → [4바이트 길이][float32 행렬 (행 수 × 차원)]
+#           응답 앞 8바이트는 (행 수, 차원) uint32 두 개
+import os
+import json
+import socket
+import struct
+import threading
+import socketserver
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+EMBED_SOCKET = os.environ.get("KAU_EMBED_SOCKET", "/tmp/kau-embed.sock")
+
+
+def _recv_exact(sock, size):
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = sock.recv(size - len(buf))
+        if not chunk:
+            raise ConnectionError("임베딩 서버 연결이 끊어졌습니다.")
+        buf.extend(chunk)
+    return bytes(buf)
+
+
+def _send_frame(sock, payload):
+    sock.sendall(struct.pack("!I", len(payload)) + payload)
+
+
+def _recv_frame(sock):
+    (size,) = struct.unpack("!I", _recv_exact(sock, 4))
+    return _recv_exact(sock, size)
+
+
+# ----------------------------
+# 클라이언트 (워커 쪽)
+# ----------------------------
+class RemoteEmbeddings(Embeddings):
+    def __init__(self, socket_path=EMBED_SOCKET, timeout=30):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()  # 스레드별 연결 재사용
+
+    def _connection(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            self._local.sock = sock
+        return sock
+
+    def _request(self, texts):
+        for attempt in range(2):
+            try:
+                sock = self._connection()
+                _send_frame(sock, json.dumps({"texts": texts}, ensure_ascii=False).encode("utf-8"))
+                payload = _recv_frame(sock)
+                rows, dim = struct.unpack("!II", payload[:8])
+                return np.frombuffer(payload[8:], dtype=np.float32).reshape(rows, dim)
+            except (OSError, ConnectionError):
+                # 서버 재시작 등으로 끊긴 연결은 한 번 다시 연결해서 재시도
+                self._local.sock = None
+                if attempt:
+                    raise
+
+    def embed_documents(self, texts):
+        return self._request(list(texts)).tolist()
+
+    def embed_query(self, text):
+        return self._request([text])[0].tolist()
+
+
+# ----------------------------
+# 서버
+# ----------------------------
+class EmbedHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        while True:
+            try:
+                request = json.loads(_recv_frame(self.request).decode("utf-8"))
+            except ConnectionError:
+                return
+            vectors = np.asarray(self.server.embed(request["texts"]), dtype=np.float32)
+            if vectors.ndim == 1:
+                vectors = vectors.reshape(1, -1)
+            _send_frame(self.request, struct.pack("!II", *vectors.shape) + vectors.tobytes())
+
+
+class EmbedServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, embeddings):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        self.embeddings = embeddings
+        super().__init__(socket_path, EmbedHandler)
+
+    def embed(self, texts):
+        return self.embeddings.embed_documents(texts)
+
+
+if __name__ == "__main__":
+    from encoders import QUERY_MAX_SEQ_LENGTH, load_encoder
+
+    server = EmbedServer(EMBED_SOCKET, load_encoder(max_seq_length=QUERY_MAX_SEQ_LENGTH))
+    print(f"임베딩 서버 대기 중: {EMBED_SOCKET}")
+    server.serve_forever()
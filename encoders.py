@@ -0,0 +1,237 @@
+# encoders.py (bge-m3 임베딩 백엔드 선택)
+#
+#   KAU_EMBED_BACKEND=torch  기본, 원본 fp32 (HuggingFaceEmbeddings)
+#   KAU_EMBED_BACKEND=int8   Linear 레이어 동적 int8 양자화 (torch, CPU)
+#   KAU_EMBED_BACKEND=onnx   ONNX Runtime (optimum 필요). 처음 한 번만 내보내고 KAU_ONNX_DIR에 저장해 재사용
+#   KAU_QUERY_MAX_SEQ_LENGTH 쿼리 인코딩 최대 토큰 수 (짧은 질문이면 64~128로 충분)
+#   KAU_EMBED_BATCH_WINDOW_MS=5 / KAU_EMBED_MAX_BATCH=16  서버 쿼리 임베딩 마이크로 배치 (BatchedQueryEmbeddings)
+#
+# 인덱스를 만들 때 probe 문장들의 벡터를 manifest에 같이 저장해 두고,
+# 서버가 다른 백엔드로 쿼리를 인코딩할 때 코사인 유사도로 호환 여부를 확인한다.
+# probe가 없는 인덱스(예전 인덱스 포함)는 torch로 만든 것으로 보고 다른 백엔드를 거부한다.
+import os
+import time
+import queue
+import shutil
+import threading
+from concurrent.futures import Future
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_community.embeddings import HuggingFaceEmbeddings
+
+import metrics
+
+EMBEDDING_MODEL = "BAAI/bge-m3"
+EMBEDDING_BACKEND = os.environ.get("KAU_EMBED_BACKEND", "torch")
+QUERY_MAX_SEQ_LENGTH = int(os.environ.get("KAU_QUERY_MAX_SEQ_LENGTH", "0")) or None
+ONNX_DIR = os.environ.get("KAU_ONNX_DIR", "onnx_bge_m3")  # 내보낸 ONNX 모델 + 토크나이저
+
+# 쿼리 임베딩 마이크로 배치 (동시 요청을 짧게 모아 한 번에 인코딩, 0이면 끔. 혼자 온 질문은 기다리지 않음)
+EMBED_BATCH_WINDOW_MS = float(os.environ.get("KAU_EMBED_BATCH_WINDOW_MS", "5"))
+EMBED_MAX_BATCH = int(os.environ.get("KAU_EMBED_MAX_BATCH", "16"))
+PARITY_THRESHOLD = 0.99  # probe 벡터 최소 코사인 유사도
+
+PROBE_TEXTS = [
+    "2학기 수강신청 기간 안내",
+    "국가장학금 2차 신청 일정",
+    "기말고사 시험 시간표 공지",
+    "휴학 및 복학 신청 방법",
+    "졸업 요건 및 학위수여식 안내",
+    "동계 계절학기 등록금 납부",
+    "교환학생 파견 모집 공고",
+    "도서관 열람실 좌석 운영 시간",
+]
+
+
+def export_onnx(model_name=EMBEDDING_MODEL, onnx_dir=ONNX_DIR):
+    # 변환은 수 분 + 모델 크기만큼 메모리가 들어서 한 번만 한다. 임시 폴더에 다 쓴 뒤 이름을 바꿔
+    # 중간에 죽어도 반쯤 쓴 폴더를 캐시로 읽지 않게 함
+    from optimum.onnxruntime import ORTModelForFeatureExtraction
+    from transformers import AutoTokenizer
+
+    if os.path.exists(os.path.join(onnx_dir, "model.onnx")):
+        return onnx_dir
+
+    print(f"ONNX 변환 중: {model_name} → {onnx_dir}")
+    tmp_dir = f"{onnx_dir}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    ORTModelForFeatureExtraction.from_pretrained(model_name, export=True).save_pretrained(tmp_dir)
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(tmp_dir)
+    shutil.rmtree(onnx_dir, ignore_errors=True)
+    os.replace(tmp_dir, onnx_dir)
+    return onnx_dir
+
+
+class OnnxEmbeddings(Embeddings):
+    def __init__(self, model_name=EMBEDDING_MODEL, max_seq_length=None, batch_size=16, onnx_dir=ONNX_DIR):
+        from optimum.onnxruntime import ORTModelForFeatureExtraction
+        from transformers import AutoTokenizer
+
+        onnx_dir = export_onnx(model_name, onnx_dir)
+        self.tokenizer = AutoTokenizer.from_pretrained(onnx_dir)
+        self.model = ORTModelForFeatureExtraction.from_pretrained(onnx_dir)
+        self.max_seq_length = max_seq_length or 8192
+        self.batch_size = batch_size
+
+    def embed_documents(self, texts):
+        vectors = []
+        for i in range(0, len(texts), self.batch_size):
+            inputs = self.tokenizer(
+                texts[i:i + self.batch_size],
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors="np",
+            )
+            hidden = self.model(**inputs).last_hidden_state
+            cls = np.asarray(hidden)[:, 0]  # bge-m3 dense 벡터 = [CLS] 토큰
+            cls = cls / np.linalg.norm(cls, axis=1, keepdims=True)
+            vectors.extend(cls.tolist())
+        return vectors
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+class BatchedQueryEmbeddings(Embeddings):
+    # embed_query 호출을 window_ms 동안(최대 max_batch개) 모아 embed_documents 한 번으로 처리
+    def __init__(self, base, window_ms=EMBED_BATCH_WINDOW_MS, max_batch=EMBED_MAX_BATCH):
+        self.base = base
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_pid = None
+        self._start_lock = threading.Lock()
+        self.batches = 0
+        self.queries = 0
+
+    def _ensure_worker(self):
+        # fork된 워커에는 스레드가 복제되지 않으므로 프로세스별로 시작
+        if self._worker_pid == os.getpid() and self._worker.is_alive():
+            return
+        with self._start_lock:
+            if self._worker_pid != os.getpid() or not self._worker.is_alive():
+                self._queue = queue.Queue()
+                self._worker = threading.Thread(target=self._run, daemon=True)
+                self._worker.start()
+                self._worker_pid = os.getpid()
+
+    def _collect(self):
+        # 이미 쌓여 있는 질문을 모두 가져옴. 혼자 온 질문은 창을 기다리지 않고 바로 인코딩하고,
+        # 다른 질문이 같이 기다리고 있을 때(= 동시 요청이 있을 때)만 window 동안 더 모음
+        batch = [self._queue.get()]
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if len(batch) == 1:
+            return batch
+
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            texts = list(dict.fromkeys(text for text, _ in batch))  # 같은 질문은 한 번만 인코딩
+            try:
+                vectors = dict(zip(texts, self.base.embed_documents(texts)))
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.queries += len(batch)
+            metrics.inc("embed_batch")
+            metrics.inc("embed_batched_query", len(batch))
+            for text, future in batch:
+                future.set_result(vectors[text])
+
+    def embed_query(self, text):
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((text, future))
+        return future.result()
+
+    def embed_documents(self, texts):
+        return self.base.embed_documents(texts)
+
+
+def _sentence_transformer(embeddings):
+    return getattr(embeddings, "client", None) or getattr(embeddings, "_client")
+
+
+def load_encoder(backend=EMBEDDING_BACKEND, max_seq_length=None):
+    if backend == "onnx":
+        return OnnxEmbeddings(EMBEDDING_MODEL, max_seq_length)
+
+    embeddings = HuggingFaceEmbeddings(
+        model_name=EMBEDDING_MODEL,
+        model_kwargs={"device": "cpu"},
+        encode_kwargs={"normalize_embeddings": True},
+    )
+    model = _sentence_transformer(embeddings)
+    if max_seq_length:
+        model.max_seq_length = max_seq_length
+
+    if backend == "int8":
+        import torch
+        torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+    elif backend != "torch":
+        raise ValueError(f"알 수 없는 임베딩 백엔드: {backend}")
+
+    return embeddings
+
+
+def encoder_manifest(embeddings, backend=EMBEDDING_BACKEND):
+    # 인덱스 manifest에 기록할 인코더 정보 + probe 벡터
+    vectors = np.asarray(embeddings.embed_documents(PROBE_TEXTS), dtype=np.float32)
+    return {
+        "embedding_model": EMBEDDING_MODEL,
+        "embedding_backend": backend,
+        "probes": {"texts": PROBE_TEXTS, "vectors": np.round(vectors, 6).tolist()},
+    }
+
+
+def parity(embeddings, probes):
+    reference = np.asarray(probes["vectors"], dtype=np.float32)
+    current = np.asarray(embeddings.embed_documents(probes["texts"]), dtype=np.float32)
+    reference /= np.linalg.norm(reference, axis=1, keepdims=True)
+    current /= np.linalg.norm(current, axis=1, keepdims=True)
+    return float((reference * current).sum(axis=1).min())
+
+
+def check_compatibility(embeddings, manifest, backend=EMBEDDING_BACKEND):
+    # 인덱스와 쿼리 인코더가 같은 벡터 공간인지 확인. 아니면 재인덱싱이 필요하다는 오류를 냄
+    model = manifest.get("embedding_model", EMBEDDING_MODEL)
+    if model != EMBEDDING_MODEL:
+        raise ValueError(f"인덱스 모델({model})과 쿼리 모델({EMBEDDING_MODEL})이 다릅니다. eee.py로 재인덱싱하세요.")
+
+    if manifest.get("embedding_backend", "torch") == backend:
+        return None
+    if "probes" not in manifest:
+        # 비교할 기준 벡터가 없으면 호환 여부를 알 수 없음 → 조용히 엉뚱한 결과를 내지 않도록 거부
+        raise ValueError(
+            f"인덱스에 probe 벡터가 없어 '{backend}' 쿼리 인코더와의 호환을 확인할 수 없습니다. "
+            f"KAU_EMBED_BACKEND=torch 로 실행하거나 eee.py로 재인덱싱하세요."
+        )
+
+    score = parity(embeddings, manifest["probes"])
+    if score < PARITY_THRESHOLD:
+        raise ValueError(
+            f"'{backend}' 쿼리 벡터가 인덱스와 맞지 않습니다 (최소 코사인 {score:.4f} < {PARITY_THRESHOLD}). "
+            f"KAU_EMBED_BACKEND={backend} 로 eee.py를 다시 실행해 재인덱싱하세요."
+        )
+    return score
@@ -0,0 +1,92 @@
+# generations.py (버전별 인덱스 디렉터리 관리)
+#
+# indexes/
+#   CURRENT                      ← 현재 서비스 중인 세대 이름 (원자적으로 교체)
+#   gen-20251217-153000-123456/
+#     faiss_index/index.faiss, faiss_index/index.pkl
+#     bm25_retriever.pkl
+#     manifest.json              ← 생성 시각, 임베딩 모델, chunk 수, 파일별 sha256
+import os
+import json
+import pickle
+import shutil
+import hashlib
+from datetime import datetime
+
+INDEXES_DIR = "indexes"
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+FAISS_DIR = "faiss_index"
+BM25_FILE = "bm25_retriever.pkl"
+KEEP_GENERATIONS = 3  # 디스크에 남겨둘 세대 수 (롤백용)
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def generation_files(gen_dir):
+    files = [os.path.join(FAISS_DIR, name) for name in sorted(os.listdir(os.path.join(gen_dir, FAISS_DIR)))]
+    return files + [BM25_FILE]
+
+
+def publish_generation(db, bm25_retriever, indexes_dir=INDEXES_DIR, **manifest_extra):
+    name = datetime.now().strftime("gen-%Y%m%d-%H%M%S-%f")
+    gen_dir = os.path.join(indexes_dir, name)
+    os.makedirs(gen_dir)
+
+    db.save_local(os.path.join(gen_dir, FAISS_DIR))
+    with open(os.path.join(gen_dir, BM25_FILE), "wb") as f:
+        pickle.dump(bm25_retriever, f)
+
+    manifest = {
+        "generation": name,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "chunks": len(bm25_retriever.docs),
+        "files": {rel: file_sha256(os.path.join(gen_dir, rel)) for rel in generation_files(gen_dir)},
+    }
+    manifest.update(manifest_extra)
+    with open(os.path.join(gen_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    # 파일이 모두 준비된 뒤에 CURRENT를 교체 → 서버는 반쯤 쓰인 세대를 보지 않음
+    tmp_path = os.path.join(indexes_dir, CURRENT_FILE + ".tmp")
+    with open(tmp_path, "w") as f:
+        f.write(name)
+    os.replace(tmp_path, os.path.join(indexes_dir, CURRENT_FILE))
+
+    prune_generations(indexes_dir, keep=name)
+    return name
+
+
+def current_generation(indexes_dir=INDEXES_DIR):
+    path = os.path.join(indexes_dir, CURRENT_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return f.read().strip() or None
+
+
+def read_manifest(name, indexes_dir=INDEXES_DIR):
+    with open(os.path.join(indexes_dir, name, MANIFEST_FILE), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def verify_generation(name, indexes_dir=INDEXES_DIR):
+    gen_dir = os.path.join(indexes_dir, name)
+    manifest = read_manifest(name, indexes_dir)
+    for rel, expected in manifest["files"].items():
+        if file_sha256(os.path.join(gen_dir, rel)) != expected:
+            raise ValueError(f"세대 {name}의 '{rel}' 체크섬이 manifest와 다릅니다.")
+    return manifest
+
+
+def prune_generations(indexes_dir=INDEXES_DIR, keep=None):
+    names = sorted(n for n in os.listdir(indexes_dir) if n.startswith("gen-"))
+    for name in names[:-KEEP_GENERATIONS]:
+        if name != keep:
+            shutil.rmtree(os.path.join(indexes_dir, name), ignore_errors=True)
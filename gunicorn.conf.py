@@ -0,0 +1,54 @@
+# gunicorn.conf.py (멀티 워커 서빙 설정)
+#
+#   python embed_server.py &
+#   KAU_EMBED_SOCKET=/tmp/kau-embed.sock KAU_FAISS_MMAP=1 gunicorn -c gunicorn.conf.py app:server
+#
+# preload_app: 마스터가 rag_core(인덱스, BM25)를 한 번만 로드한 뒤 fork
+#              → 워커들은 copy-on-write로 같은 메모리 페이지를 공유
+#
+# 새 인덱스 세대와 메모리 공유:
+#   공유되는 것은 마스터가 preload한 세대뿐이다. 워커의 인덱스 감시 스레드가 새 세대로 교체하면
+#   워커마다 BM25 pickle / docstore / 메타데이터 배열(DocMetadata)과 벡터를 따로 읽으므로 교체 후 메모리는 워커 수만큼 늘어난다.
+#   (KAU_FAISS_MMAP=1이면 FAISS 벡터는 같은 파일의 페이지 캐시라 계속 공유되고, BM25/docstore만 워커별)
+#   HUP은 preload_app에서는 앱을 다시 읽지 않아 마스터가 가진 예전 세대로 워커를 다시 fork할 뿐이다.
+#   공유를 되돌리려면 새 마스터로 교체한다:
+#     kill -USR2 <master pid>     # 새 마스터가 현재 세대를 preload하고 워커를 fork
+#     kill -WINCH <old pid>; kill -QUIT <old pid>   # 예전 워커/마스터 정리
+#   교체 직후에도 서비스는 계속되고(워커별 로드), 메모리를 줄이는 건 위 재시작으로 한다.
+import gc
+import os
+
+bind = os.environ.get("KAU_BIND", "0.0.0.0:8050")
+workers = int(os.environ.get("KAU_WORKERS", "4"))
+threads = int(os.environ.get("KAU_THREADS", "16"))
+timeout = 120
+preload_app = True
+
+# m3 재정렬은 워커마다 bge-m3를 한 벌 더 올림 (~2GB/워커, rerank.py 참고) → 멀티 워커에서는 cross만 허용
+if os.environ.get("KAU_RERANK") == "m3" and workers > 1:
+    raise RuntimeError(
+        f"KAU_RERANK=m3는 워커마다 bge-m3(~2GB)를 따로 올립니다. "
+        f"워커 {workers}개에서는 KAU_RERANK=cross를 쓰거나 KAU_WORKERS=1로 실행하세요."
+    )
+
+# 입장 제어 (admission.py): Gemini까지 가는 요청과 대기 요청이 스레드를 다 차지하지 않게 해서
+# 남은 스레드로 캐시/검색 발췌/안내 응답을 바로 돌려줄 수 있도록 함
+os.environ.setdefault("KAU_MAX_INFLIGHT", str(max(1, threads // 2)))
+os.environ.setdefault("KAU_QUEUE_SIZE", str(max(1, threads // 4)))
+
+# 마스터에서는 인덱스 감시 스레드를 띄우지 않음 (스레드는 fork로 복제되지 않음)
+os.environ["KAU_INDEX_WATCHER"] = "0"
+
+
+def when_ready(server):
+    # 로드가 끝난 객체들을 GC 추적 대상에서 빼서, GC가 워커의 공유 페이지를 건드리지 않도록 함
+    gc.collect()
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    try:
+        import rag_core
+    except ImportError:
+        return
+    rag_core.start_index_watcher()
@@ -0,0 +1,214 @@
+# metrics.py (단계별 지연 시간 측정 + Prometheus 텍스트 포맷 출력)
+#
+#   KAU_METRICS=1            수집 켜기 (기본 꺼짐 → stage()는 아무 일도 하지 않는 공용 객체를 돌려줌)
+#   KAU_SLOW_REQUEST_SEC=10  이보다 오래 걸린 요청은 단계별 시간을 slow_requests.log에 남김
+#
+# 사용:
+#   with metrics.request("chat"):
+#       with metrics.stage("faiss"):
+#           ...
+#   metrics.inc("rerank_cache_hit")
+import os
+import json
+import time
+import threading
+from contextlib import nullcontext
+from datetime import datetime
+
+METRICS_ENABLED = os.environ.get("KAU_METRICS") == "1"
+SLOW_REQUEST_SEC = float(os.environ.get("KAU_SLOW_REQUEST_SEC", "10"))
+SLOW_REQUEST_LOG = os.environ.get("KAU_SLOW_REQUEST_LOG", "slow_requests.log")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+TOKEN_BUCKETS = (250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+
+_NOOP = nullcontext()
+_local = threading.local()
+
+
+def _label_str(labelnames, values):
+    if not labelnames:
+        return ""
+    pairs = ",".join(f'{n}="{str(v)}"' for n, v in zip(labelnames, values))
+    return "{" + pairs + "}"
+
+
+class Counter:
+    def __init__(self, name, help_text, labelnames=()):
+        self.name, self.help, self.labelnames = name, help_text, tuple(labelnames)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, *labels, value=1):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            for labels, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{_label_str(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Gauge(Counter):
+    def set(self, *labels, value):
+        with self.lock:
+            self.values[labels] = value
+
+    def render(self):
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labelnames = name, help_text, tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.values = {}  # labels → [버킷별 개수..., 합계, 개수]
+        self.lock = threading.Lock()
+
+    def observe(self, *labels, value):
+        with self.lock:
+            row = self.values.get(labels)
+            if row is None:
+                row = self.values[labels] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    row[i] += 1
+                    break
+            row[-2] += value
+            row[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for labels, row in sorted(self.values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, row):
+                    cumulative += count
+                    le = _label_str(self.labelnames + ("le",), labels + (bound,))
+                    lines.append(f"{self.name}_bucket{le} {cumulative}")
+                le = _label_str(self.labelnames + ("le",), labels + ("+Inf",))
+                lines.append(f"{self.name}_bucket{le} {row[-1]}")
+                lines.append(f"{self.name}_sum{_label_str(self.labelnames, labels)} {row[-2]}")
+                lines.append(f"{self.name}_count{_label_str(self.labelnames, labels)} {row[-1]}")
+        return lines
+
+
+STAGE_SECONDS = Histogram("kau_stage_seconds", "Latency of each request stage", ["stage"])
+REQUEST_SECONDS = Histogram("kau_request_seconds", "End-to-end request latency", ["kind"])
+EVENTS = Counter("kau_events_total", "Cache hits, errors and other events", ["event"])
+PROMPT_TOKENS = Histogram("kau_prompt_tokens", "Prompt tokens sent to Gemini", buckets=TOKEN_BUCKETS)
+OUTPUT_TOKENS = Histogram("kau_output_tokens", "Tokens generated by Gemini", buckets=TOKEN_BUCKETS)
+ADMISSION = Gauge("kau_admission_requests", "RAG requests holding or waiting for a Gemini slot", ["state"])
+REJECTED = Counter("kau_admission_rejected_total", "Requests not admitted to the full RAG path", ["reason"])
+DEGRADED = Counter("kau_degraded_responses_total", "Responses served by each degradation tier", ["tier"])
+REGISTRY = [STAGE_SECONDS, REQUEST_SECONDS, EVENTS, PROMPT_TOKENS, OUTPUT_TOKENS, ADMISSION, REJECTED, DEGRADED]
+
+
+# ----------------------------
+# 측정 API
+# ----------------------------
+class _Stage:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        STAGE_SECONDS.observe(self.name, value=elapsed)
+        trace = getattr(_local, "trace", None)
+        if trace is not None:
+            trace[self.name] = trace.get(self.name, 0.0) + elapsed
+        return False
+
+
+class _Request:
+    __slots__ = ("kind", "start", "parent")
+
+    def __init__(self, kind):
+        self.kind = kind
+
+    def __enter__(self):
+        self.parent = getattr(_local, "trace", None)
+        _local.trace = {}
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        elapsed = time.perf_counter() - self.start
+        REQUEST_SECONDS.observe(self.kind, value=elapsed)
+        if exc_type is not None:
+            EVENTS.inc(f"{self.kind}_error")
+        if elapsed >= SLOW_REQUEST_SEC:
+            _log_slow(self.kind, elapsed, _local.trace)
+        _local.trace = self.parent
+        return False
+
+
+def stage(name):
+    return _Stage(name) if METRICS_ENABLED else _NOOP
+
+
+def request(kind):
+    return _Request(kind) if METRICS_ENABLED else _NOOP
+
+
+def inc(event, value=1):
+    if METRICS_ENABLED:
+        EVENTS.inc(event, value=value)
+
+
+def observe_tokens(prompt_tokens=None, output_tokens=None):
+    if not METRICS_ENABLED:
+        return
+    if prompt_tokens is not None:
+        PROMPT_TOKENS.observe(value=prompt_tokens)
+    if output_tokens is not None:
+        OUTPUT_TOKENS.observe(value=output_tokens)
+
+
+def set_admission(inflight, waiting):
+    if METRICS_ENABLED:
+        ADMISSION.set("inflight", value=inflight)
+        ADMISSION.set("waiting", value=waiting)
+
+
+def reject(reason):
+    if METRICS_ENABLED:
+        REJECTED.inc(reason)
+
+
+def degraded(tier):
+    if METRICS_ENABLED:
+        DEGRADED.inc(tier)
+
+
+_slow_lock = threading.Lock()
+
+
+def _log_slow(kind, elapsed, trace):
+    EVENTS.inc("slow_request")
+    entry = {
+        "time": datetime.now().isoformat(timespec="seconds"),
+        "kind": kind,
+        "seconds": round(elapsed, 3),
+        "stages": {k: round(v, 3) for k, v in (trace or {}).items()},
+    }
+    with _slow_lock:
+        with open(SLOW_REQUEST_LOG, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+def render():
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -1,184 +1,632 @@
-# rag_core.py (AI 두뇌 전용 파일)
-import os
-import re
-import pickle
-import google.generativeai as genai
-
-from langchain_community.vectorstores import FAISS
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_community.retrievers import BM25Retriever
-
-# 1. 경로 설정 (상대 경로 적용!)
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DB_FAISS_PATH = os.path.join(BASE_DIR, "faiss_index")
-DB_BM25_PATH = os.path.join(BASE_DIR, "bm25_retriever.pkl")
-EMBEDDING_MODEL = "BAAI/bge-m3"
-
-# 2. API 키 설정
-if "GOOGLE_API_KEY" in os.environ:
-    genai.configure(api_key=os.environ["GOOGLE_API_KEY"])
-else:
-    pass
-
-# 3. DB 로더
-def load_resources():
-    print("Loading Vector DB & BM25...")
-    embeddings = HuggingFaceEmbeddings(
-        model_name=EMBEDDING_MODEL,
-        model_kwargs={"device": "cpu"},
-        encode_kwargs={"normalize_embeddings": True},
-    )
-    
-    vector_db = None
-    bm25_retriever = None
-
-    if os.path.exists(DB_FAISS_PATH):
-        vector_db = FAISS.load_local(DB_FAISS_PATH, embeddings, allow_dangerous_deserialization=True)
-    
-    if os.path.exists(DB_BM25_PATH):
-        with open(DB_BM25_PATH, "rb") as f:
-            bm25_retriever = pickle.load(f)
-            bm25_retriever.k = 10
-            
-    return vector_db, bm25_retriever
-
-vector_db, bm25_retriever = load_resources()
-
-if vector_db:
-    faiss_retriever = vector_db.as_retriever(search_kwargs={"k": 10})
-else:
-    faiss_retriever = None
-
-
-# 4. 앙상블 검색기
-class EnsembleRetriever:
-    def __init__(self, retrievers, weights=None, k=3):
-        self.retrievers = retrievers
-        self.weights = weights or [1.0] * len(retrievers)
-        self.k = k
-
-    def invoke(self, query):
-        scored = {}
-        seen_docs = {}
-
-        for retriever, weight in zip(self.retrievers, self.weights):
-            if retriever is None:
-                continue
-            try:
-                if hasattr(retriever, "invoke"):
-                    docs = retriever.invoke(query)
-                else:
-                    docs = retriever.get_relevant_documents(query)
-            except:
-                docs = []
-
-            docs = docs[:10]
-            for rank, doc in enumerate(docs):
-                key = (doc.page_content, tuple(sorted(doc.metadata.items())))
-                score = weight * (10 - rank)
-                if key not in scored:
-                    scored[key] = score
-                    seen_docs[key] = doc
-                else:
-                    scored[key] += score
-        
-        sorted_keys = sorted(scored.keys(), key=lambda k: -scored[k])
-        return [seen_docs[key] for key in sorted_keys[: self.k]]
-
-# 초기화
-ensemble = None
-if vector_db and bm25_retriever:
-    ensemble = EnsembleRetriever(
-        retrievers=[bm25_retriever, faiss_retriever],
-        weights=[0.3, 0.7],
-        k=5,
-    )
-
-
-# 5. 핵심 질문 처리 함수
-def get_ai_response(user_input):
-    if not ensemble:
-        return "죄송합니다. 데이터베이스가 로드되지 않았습니다."
-
-    # (1) 검색
-    docs = ensemble.invoke(user_input)
-
-    final_seen = set()
-    unique_docs = []
-    for d in docs:
-        key = f"{d.metadata.get('source','')}_{d.metadata.get('title','')}"
-        if key not in final_seen:
-            final_seen.add(key)
-            unique_docs.append(d)
-
-    # (2) 프롬프트 구성
-    context = ""
-    for i, d in enumerate(unique_docs):
-        context += f"--- 문서 {i+1} ---\n"
-        context += f"제목: {d.metadata.get('title')}\n"
-        context += f"출처: {d.metadata.get('source')}\n"
-        context += d.metadata.get("raw_content", d.page_content) + "\n\n"
-
-    system_message = """
-    항공대와 관련된 공식 문서, 공지사항, 학사 일정, 규정 등의 내용을 기반으로 정확하게 답변하세요.
-
-    [답변 원칙]
-    1. 답변은 반드시 제공된 문서와 데이터에 근거해야 합니다.
-    2. 문서에 없거나 불확실한 내용은 임의로 지어내지 말고, "해당 내용은 문서에서 확인되지 않습니다."라고 말하세요.
-    3. 학생들이 이해하기 쉽도록 짧고 명확하게 설명하세요.
-    4. 답변 마지막에 참고한 문서 번호를 [근거: 1, 3] 형태로 붙이세요.
-    5. 문서 간 내용 충돌이 있을 경우, 최신 문서(번호가 가장 큰 것)를 우선합니다.
-    - 학사일정, 수업, 시험, 장학금, 등록금 등 학생 관련 질문에 친절하고 정확하게 답합니다.
-    - 개인 정보, 민감한 조언(법률, 의학 등), 사실이 아닌 내용은 제공하지 않습니다.
-    - 질문이 모호하면 명확한 답변을 위해 추가 질문을 요청하세요.
-    - 답변에는 어떤 형태의 URL, 링크, 출처 링크도 포함하지 마세요.
-    """
-
-    final_prompt = f"{system_message}\n\n[Context]\n{context}\n\n[질문]\n{user_input}\n\n[답변]"
-
-    # (3) Gemini 호출
-    try:
-        model = genai.GenerativeModel("gemini-2.5-pro")
-        response = model.generate_content(final_prompt)
-        full_text = response.text
-    except Exception as e:
-        return f"AI 응답 생성 중 오류가 발생했습니다: {e}"
-
-    # (4) 출처 태그 제거
-    source_matches = re.findall(r"\[근거:\s*([\d,\s]+)\]", full_text)
-    final_content = re.sub(r"\[근거:[^\]]*\]", "", full_text).strip()
-
-    footer_items = []
-    used_indexes = set()
-
-    if source_matches:
-        for match in source_matches:
-            indexes = match.replace(" ", "").split(",")
-            for idx in indexes:
-                if idx.isdigit():
-                    num = int(idx)
-                    if num not in used_indexes:
-                        used_indexes.add(num)
-                        doc_index = num - 1
-                        if 0 <= doc_index < len(unique_docs):
-                            doc = unique_docs[doc_index]
-
-                            title = doc.metadata.get("title", "제목 없음")
-                            url = doc.metadata.get("source", "")
-                            if url:
-                                footer_items.append(f"- [{title}]({url})")
-
-                            # ★ 첨부파일 추가
-                            attach_raw = doc.metadata.get("attachments")
-                            if attach_raw:
-                                for item in attach_raw.split(";"):
-                                    parts = item.split("|")
-                                    if len(parts) == 2:
-                                        fname, furl = parts
-                                        footer_items.append(f"- 📁 [{fname}]({furl})")
-
-    if footer_items:
-        final_content += "\n\n---\n**참고한 출처:**\n" + "\n".join(footer_items)
-
-    return final_content
-
+# rag_core.py (AI 두뇌 전용 파일)
+import gc
+import os
+import re
+import time
+import pickle
+import threading
+from collections import OrderedDict
+from datetime import date
+from functools import lru_cache
+import faiss
+import numpy as np
+import google.generativeai as genai
+
+from langchain_community.vectorstores import FAISS
+
+import metrics
+from articles import board_regex, citation_entry
+from encoders import QUERY_MAX_SEQ_LENGTH, EMBED_BATCH_WINDOW_MS, BatchedQueryEmbeddings, load_encoder, check_compatibility
+from rerank import RERANK_CANDIDATES, RERANK_TOP_K, load_reranker
+from rewrite import rewrite_query, conversation_context
+from generations import FAISS_DIR, BM25_FILE, current_generation, verify_generation
+
+# 1. 경로 설정 (상대 경로 적용!)
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+INDEXES_DIR = os.path.join(BASE_DIR, "indexes")  # eee.py가 세대별로 저장하는 위치
+DB_FAISS_PATH = os.path.join(BASE_DIR, "faiss_index")  # 세대가 없을 때 쓰는 예전 위치
+DB_BM25_PATH = os.path.join(BASE_DIR, "bm25_retriever.pkl")
+INDEX_POLL_INTERVAL = 30  # 새 세대 확인 주기(초)
+
+# 멀티 워커 서빙 설정
+EMBED_SOCKET = os.environ.get("KAU_EMBED_SOCKET")  # 설정 시 embed_server.py 프로세스에 임베딩 위임
+FAISS_MMAP = os.environ.get("KAU_FAISS_MMAP") == "1"  # FAISS 벡터를 mmap으로 읽어 워커 간 페이지 공유
+
+# 2. API 키 설정
+if "GOOGLE_API_KEY" in os.environ:
+    genai.configure(api_key=os.environ["GOOGLE_API_KEY"])
+else:
+    pass
+
+# 3. DB 로더
+def load_embeddings():
+    if EMBED_SOCKET:
+        from embed_server import RemoteEmbeddings
+        print(f"임베딩 서버 사용: {EMBED_SOCKET}")
+        base = RemoteEmbeddings(EMBED_SOCKET)
+    else:
+        # 쿼리 전용이므로 짧은 최대 길이를 써도 됨 (KAU_QUERY_MAX_SEQ_LENGTH)
+        base = load_encoder(max_seq_length=QUERY_MAX_SEQ_LENGTH)
+
+    if EMBED_BATCH_WINDOW_MS > 0:
+        return BatchedQueryEmbeddings(base)
+    return base
+
+
+def load_faiss(faiss_path, embeddings):
+    if not FAISS_MMAP:
+        return FAISS.load_local(faiss_path, embeddings, allow_dangerous_deserialization=True)
+
+    # 인덱스 파일을 페이지 캐시에 mmap → 여러 워커가 같은 물리 페이지를 읽음
+    # IndexFlat 벡터까지 mmap하는 건 IO_FLAG_MMAP_IFC뿐 (IO_FLAG_MMAP은 Flat 코드를 메모리로 복사함)
+    if not hasattr(faiss, "IO_FLAG_MMAP_IFC"):
+        print(f"⚠️ KAU_FAISS_MMAP=1이지만 faiss {faiss.__version__}에 IO_FLAG_MMAP_IFC가 없어 "
+              f"워커별로 벡터를 메모리에 읽습니다. (공유하려면 faiss 1.8 이상)")
+        return FAISS.load_local(faiss_path, embeddings, allow_dangerous_deserialization=True)
+    flags = faiss.IO_FLAG_READ_ONLY | faiss.IO_FLAG_MMAP_IFC
+    index = faiss.read_index(os.path.join(faiss_path, "index.faiss"), flags)
+    with open(os.path.join(faiss_path, "index.pkl"), "rb") as f:
+        docstore, index_to_docstore_id = pickle.load(f)
+    return FAISS(embeddings, index, docstore, index_to_docstore_id)
+
+
+def load_resources(embeddings, generation=None):
+    if generation:
+        manifest = verify_generation(generation, INDEXES_DIR)
+        # 양자화/ONNX 쿼리 인코더가 인덱스 벡터와 호환되는지 확인 (아니면 재인덱싱 필요)
+        score = check_compatibility(getattr(embeddings, "base", embeddings), manifest)
+        if score is not None:
+            print(f"쿼리 인코더 호환 확인: 최소 코사인 {score:.4f}")
+        faiss_path = os.path.join(INDEXES_DIR, generation, FAISS_DIR)
+        bm25_path = os.path.join(INDEXES_DIR, generation, BM25_FILE)
+    else:
+        faiss_path, bm25_path = DB_FAISS_PATH, DB_BM25_PATH
+        if os.path.exists(faiss_path):
+            # 예전 인덱스는 manifest가 없음 = torch로 만든 벡터. 다른 백엔드면 여기서 거부됨
+            check_compatibility(getattr(embeddings, "base", embeddings), {})
+
+    print(f"Loading Vector DB & BM25... ({generation or 'legacy'})")
+    vector_db = None
+    bm25_retriever = None
+
+    if os.path.exists(faiss_path):
+        vector_db = load_faiss(faiss_path, embeddings)
+    
+    if os.path.exists(bm25_path):
+        with open(bm25_path, "rb") as f:
+            bm25_retriever = pickle.load(f)
+            bm25_retriever.k = 10
+            
+    return vector_db, bm25_retriever
+
+
+# 4. 앙상블 검색기
+RECENCY_WEIGHT = 2.0          # 최신 공지 가산점 최대치 (순위 점수 최대 10점 기준)
+RECENCY_HALF_LIFE_DAYS = 180  # 가산점이 절반이 되는 기간
+
+
+def posted_ordinal(doc):
+    posted_at = doc.metadata.get("posted_at")
+    if not posted_at:
+        return -1
+    try:
+        return date.fromisoformat(posted_at).toordinal()
+    except ValueError:
+        return -1
+
+
+def doc_board(doc):
+    board = doc.metadata.get("board")
+    if board:
+        return board
+    match = board_regex.search(doc.metadata.get("source", ""))
+    return match.group(1) if match else ""
+
+
+def semester_start(today=None):
+    # 1학기: 3월~8월, 2학기: 9월~다음해 2월
+    today = today or date.today()
+    if 3 <= today.month <= 8:
+        return date(today.year, 3, 1)
+    year = today.year if today.month >= 9 else today.year - 1
+    return date(year, 9, 1)
+
+
+def this_semester_filter(today=None, keep_undated=False):
+    return {"since": semester_start(today), "keep_undated": keep_undated}
+
+
+def infer_filters(user_input):
+    # 질문에 "이번 학기"가 들어가면 이번 학기 공지로 한정
+    # 게시일이 없는 chunk(예전 인덱스 등)는 판단할 수 없으므로 남겨 둠 → 최신순 가산점으로만 정렬
+    if re.search(r"이번\s*학기", user_input):
+        return this_semester_filter(keep_undated=True)
+    return None
+
+
+class DocMetadata:
+    # 검색기 내부 순서(FAISS 행 번호 / BM25 문서 번호)와 같은 순서의 메타데이터 배열
+    def __init__(self, docs):
+        self.posted = np.array([posted_ordinal(d) for d in docs], dtype=np.int64)
+        self.board = np.array([doc_board(d) for d in docs], dtype=object)
+
+    def mask(self, filters):
+        # filters: {"board": "s1201" 또는 ["s1201", ...], "since": date, "until": date,
+        #           "keep_undated": 게시일 없는 행도 날짜 조건을 통과시킬지}
+        if not filters:
+            return None
+        mask = np.ones(len(self.posted), dtype=bool)
+        if filters.get("board"):
+            boards = filters["board"]
+            boards = [boards] if isinstance(boards, str) else list(boards)
+            mask &= np.isin(self.board, boards)
+        undated = self.posted < 0 if filters.get("keep_undated") else False
+        if filters.get("since"):
+            mask &= (self.posted >= filters["since"].toordinal()) | undated
+        if filters.get("until"):
+            mask &= ((self.posted >= 0) & (self.posted <= filters["until"].toordinal())) | undated
+        return mask
+
+
+class FaissSearcher:
+    def __init__(self, vector_db, k=10):
+        self.vector_db = vector_db
+        self.k = k
+        ids = vector_db.index_to_docstore_id
+        self.docs = [vector_db.docstore.search(ids[i]) for i in range(len(ids))]
+        self.metadata = DocMetadata(self.docs)
+
+    def invoke(self, query, filters=None):
+        embed = self.vector_db.embedding_function
+        with metrics.stage("embed_query"):
+            query_vector = embed.embed_query(query) if hasattr(embed, "embed_query") else embed(query)
+        return self.search_vectors(np.asarray([query_vector], dtype=np.float32), filters)[0]
+
+    def search_vectors(self, vectors, filters=None):
+        # 질문 벡터 행렬 (질문 수 × 차원)을 한 번에 검색 → 질문별 문서 목록
+        mask = self.metadata.mask(filters)
+
+        if mask is None:
+            _, rows = self.vector_db.index.search(vectors, self.k)
+        else:
+            # 조건에 맞는 행만 대상으로 검색 (검색 후 거르는 게 아니라 검색 전에 제한)
+            allowed = np.flatnonzero(mask).astype(np.int64)
+            if not len(allowed):
+                return [[] for _ in range(len(vectors))]
+            params = faiss.SearchParameters(sel=faiss.IDSelectorBatch(allowed))
+            _, rows = self.vector_db.index.search(vectors, self.k, params=params)
+
+        return [[self.docs[row] for row in row_ids if row >= 0] for row_ids in rows]
+
+
+class BM25Searcher:
+    def __init__(self, bm25_retriever, k=10):
+        self.bm25_retriever = bm25_retriever
+        self.k = k
+        self.metadata = DocMetadata(bm25_retriever.docs)
+
+    def invoke(self, query, filters=None):
+        tokens = self.bm25_retriever.preprocess_func(query)
+        scores = np.asarray(self.bm25_retriever.vectorizer.get_scores(tokens), dtype=np.float64)
+        mask = self.metadata.mask(filters)
+        if mask is not None:
+            scores = np.where(mask, scores, -np.inf)
+
+        top = np.argsort(scores)[::-1][: self.k]
+        return [self.bm25_retriever.docs[i] for i in top if scores[i] != -np.inf]
+
+
+def fusion_key(doc):
+    # 같은 chunk = 같은 내용 + 같은 게시글 + 같은 위치 (예전 인덱스는 chunk_start가 없어 None)
+    return (doc.page_content, doc.metadata.get("source"), doc.metadata.get("chunk_start"))
+
+
+class EnsembleRetriever:
+    def __init__(self, retrievers, weights=None, k=3, recency_weight=RECENCY_WEIGHT, depth=10):
+        self.retrievers = retrievers
+        self.weights = weights or [1.0] * len(retrievers)
+        self.k = k
+        self.recency_weight = recency_weight
+        self.depth = depth  # 검색기별로 융합에 쓰는 상위 결과 수
+
+    def recency_boost(self, doc, today_ordinal):
+        posted = posted_ordinal(doc)
+        if posted < 0 or not self.recency_weight:
+            return 0.0
+        age = max(0, today_ordinal - posted)
+        return self.recency_weight * 0.5 ** (age / RECENCY_HALF_LIFE_DAYS)
+
+    def invoke(self, query, filters=None):
+        results = []
+        for retriever in self.retrievers:
+            if retriever is None:
+                results.append([])
+                continue
+            stage_name = {FaissSearcher: "faiss", BM25Searcher: "bm25"}.get(type(retriever), "retriever")
+            try:
+                with metrics.stage(stage_name):
+                    if isinstance(retriever, (FaissSearcher, BM25Searcher)):
+                        docs = retriever.invoke(query, filters)
+                    elif hasattr(retriever, "invoke"):
+                        docs = retriever.invoke(query)
+                    else:
+                        docs = retriever.get_relevant_documents(query)
+            except:
+                metrics.inc(f"{stage_name}_error")
+                docs = []
+            results.append(docs)
+        return self.fuse(results)
+
+    def fuse(self, results):
+        # results: self.retrievers와 같은 순서의 검색기별 문서 목록
+        with metrics.stage("fusion"):
+            scored = {}
+            seen_docs = {}
+
+            for docs, weight in zip(results, self.weights):
+                docs = docs[: self.depth]
+                for rank, doc in enumerate(docs):
+                    # metadata에는 dict(citation) 등 해시할 수 없는 값이 있으므로 chunk 식별 정보만 키로 사용
+                    key = fusion_key(doc)
+                    score = weight * (self.depth - rank) * 10 / self.depth
+                    if key not in scored:
+                        scored[key] = score
+                        seen_docs[key] = doc
+                    else:
+                        scored[key] += score
+
+            # 최신 공지 가산점 (융합 단계에서 반영 → 오래된 공지가 컨텍스트를 차지하지 않음)
+            today_ordinal = date.today().toordinal()
+            for key, doc in seen_docs.items():
+                scored[key] += self.recency_boost(doc, today_ordinal)
+
+            sorted_keys = sorted(scored.keys(), key=lambda k: -scored[k])
+            return [seen_docs[key] for key in sorted_keys[: self.k]]
+
+# 인덱스 세대: 검색기 묶음 하나. 요청은 시작 시점의 세대를 끝까지 사용함
+class IndexGeneration:
+    def __init__(self, name, vector_db, bm25_retriever):
+        self.name = name
+        self.vector_db = vector_db
+        self.bm25_retriever = bm25_retriever
+        # 재정렬을 쓰면 후보를 넓게(~30개) 가져오고, 아니면 융합 top 5를 바로 사용
+        depth = RERANK_CANDIDATES if reranker else 10
+        self.faiss_retriever = FaissSearcher(vector_db, k=depth) if vector_db else None
+        self.bm25_searcher = BM25Searcher(bm25_retriever, k=depth) if bm25_retriever else None
+
+        self.ensemble = None
+        if vector_db and bm25_retriever:
+            self.ensemble = EnsembleRetriever(
+                retrievers=[self.bm25_searcher, self.faiss_retriever],
+                weights=[0.3, 0.7],
+                k=RERANK_CANDIDATES if reranker else 5,
+                depth=depth,
+            )
+
+
+# 초기화 (임베딩 모델/재정렬 모델은 세대가 바뀌어도 재사용)
+embeddings = load_embeddings()
+reranker = load_reranker()
+_reload_lock = threading.Lock()
+
+
+def load_generation(name):
+    vector_db, bm25_retriever = load_resources(embeddings, name)
+    return IndexGeneration(name, vector_db, bm25_retriever)
+
+
+_failed_generation = None
+
+
+def _load_initial_generation():
+    global _failed_generation
+    name = current_generation(INDEXES_DIR)
+    if name:
+        try:
+            return load_generation(name)
+        except Exception as e:
+            print(f"세대 {name} 로드 실패 ({e}), 예전 인덱스로 시작합니다.")
+            _failed_generation = name
+    return load_generation(None)
+
+
+active = _load_initial_generation()
+
+
+def _swap_generation(force=False):
+    # _reload_lock을 잡은 상태에서 호출. 새 세대를 다 읽은 뒤 참조만 교체하고, 교체했으면 True
+    global active, _failed_generation
+    name = current_generation(INDEXES_DIR)
+    if not name or (name in (active.name, _failed_generation) and not force):
+        return False
+
+    try:
+        new_generation = load_generation(name)
+    except Exception as e:
+        _failed_generation = name
+        raise RuntimeError(f"세대 {name} 로드 실패, 기존 세대 유지: {e}") from e
+
+    if not new_generation.ensemble:
+        _failed_generation = name
+        print(f"세대 {name} 로드 실패, 기존 세대 유지")
+        return False
+
+    old_generation, active = active, new_generation
+    print(f"인덱스 교체: {old_generation.name or 'legacy'} → {name}")
+
+    # 예전 세대는 마지막 요청이 끝나면 참조가 사라져 해제됨
+    del old_generation
+    gc.collect()
+    return True
+
+
+def reload_indexes(force=False):
+    # 진행 중인 요청은 예전 세대로 마무리됨. 다른 재로드가 진행 중이면 끝날 때까지 기다림
+    with _reload_lock:
+        return _swap_generation(force)
+
+
+def start_reload(force=False):
+    # 관리자 요청용: 이미 재로드 중이면 바로 False, 아니면 백그라운드에서 시작하고 True
+    if not _reload_lock.acquire(blocking=False):
+        return False
+
+    def run():
+        try:
+            _swap_generation(force)
+        except Exception as e:
+            print(f"인덱스 재로드 오류: {e}")
+        finally:
+            _reload_lock.release()
+
+    threading.Thread(target=run, daemon=True).start()
+    return True
+
+
+def _watch_indexes(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            reload_indexes()
+        except Exception as e:
+            print(f"인덱스 재로드 오류: {e}")
+
+
+_watcher = None
+
+
+def start_index_watcher(interval=INDEX_POLL_INTERVAL):
+    global _watcher
+    if _watcher is None or not _watcher.is_alive():
+        _watcher = threading.Thread(target=_watch_indexes, args=(interval,), daemon=True)
+        _watcher.start()
+    return _watcher
+
+
+# 5. 핵심 질문 처리 함수
+def unique_by_article(docs):
+    final_seen = set()
+    unique_docs = []
+    for d in docs:
+        key = f"{d.metadata.get('source','')}_{d.metadata.get('title','')}"
+        if key not in final_seen:
+            final_seen.add(key)
+            unique_docs.append(d)
+    return unique_docs
+
+
+def retrieve(user_input, filters=None, generation=None):
+    generation = generation or active
+
+    # filters 예: {"board": "s1201"}, this_semester_filter()
+    if filters is None:
+        filters = infer_filters(user_input)
+    with metrics.stage("retrieve"):
+        docs = generation.ensemble.invoke(user_input, filters)
+    return select_context(user_input, docs)
+
+
+def select_context(user_input, docs):
+    # 융합 결과 → (재정렬) → 게시글 단위 중복 제거 → LLM에 보낼 문서
+    if reranker:
+        with metrics.stage("rerank"):
+            docs = reranker.rerank(user_input, docs, top_k=len(docs))
+
+    unique_docs = unique_by_article(docs)
+    if reranker:
+        unique_docs = unique_docs[:RERANK_TOP_K]  # 더 적고 정확한 문서만 LLM에 전달
+    return unique_docs
+
+
+# 직전 대화의 검색 결과 (후속 질문의 주제가 같으면 다시 검색하지 않고 재사용)
+RETRIEVAL_CACHE_SIZE = 256
+
+
+class RetrievalCache:
+    def __init__(self, size=RETRIEVAL_CACHE_SIZE):
+        self.size = size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(generation, query, filters):
+        return (generation.name, query, repr(sorted(filters.items())) if filters else None)
+
+    def get(self, key):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key]
+        return None
+
+    def put(self, key, docs):
+        with self.lock:
+            self.entries[key] = docs
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+
+retrieval_cache = RetrievalCache()
+
+
+def retrieve_in_context(user_input, history=None, filters=None, generation=None):
+    # 대화 맥락으로 검색 질의를 다시 쓰고, 주제가 그대로면 직전 검색 결과를 재사용. (질의, 문서)
+    generation = generation or active
+    with metrics.stage("rewrite"):
+        query, previous, same_topic = rewrite_query(user_input, history)
+    if previous is not None:
+        metrics.inc("query_rewritten")
+
+    unique_docs = None
+    if same_topic:
+        unique_docs = retrieval_cache.get(RetrievalCache.key(generation, previous, filters))
+        if unique_docs is not None:
+            metrics.inc("retrieval_reused")
+    if unique_docs is None:
+        unique_docs = retrieve(query, filters, generation)
+
+    retrieval_cache.put(RetrievalCache.key(generation, query, filters), unique_docs)
+    return query, unique_docs
+
+
+SYSTEM_MESSAGE = """
+    항공대와 관련된 공식 문서, 공지사항, 학사 일정, 규정 등의 내용을 기반으로 정확하게 답변하세요.
+
+    [답변 원칙]
+    1. 답변은 반드시 제공된 문서와 데이터에 근거해야 합니다.
+    2. 문서에 없거나 불확실한 내용은 임의로 지어내지 말고, "해당 내용은 문서에서 확인되지 않습니다."라고 말하세요.
+    3. 학생들이 이해하기 쉽도록 짧고 명확하게 설명하세요.
+    4. 답변 마지막에 참고한 문서 번호를 [근거: 1, 3] 형태로 붙이세요.
+    5. 문서 간 내용 충돌이 있을 경우, 최신 문서(번호가 가장 큰 것)를 우선합니다.
+    - 학사일정, 수업, 시험, 장학금, 등록금 등 학생 관련 질문에 친절하고 정확하게 답합니다.
+    - 개인 정보, 민감한 조언(법률, 의학 등), 사실이 아닌 내용은 제공하지 않습니다.
+    - 질문이 모호하면 명확한 답변을 위해 추가 질문을 요청하세요.
+    - 답변에는 어떤 형태의 URL, 링크, 출처 링크도 포함하지 마세요.
+    """
+
+
+def build_prompt(user_input, unique_docs, conversation=""):
+    context = ""
+    for i, d in enumerate(unique_docs):
+        context += f"--- 문서 {i+1} ---\n"
+        context += f"제목: {d.metadata.get('title')}\n"
+        context += f"출처: {d.metadata.get('source')}\n"
+        context += d.metadata.get("raw_content", d.page_content) + "\n\n"
+
+    if conversation:
+        # 후속 질문의 "그거", "거기"가 무엇인지 알 수 있도록 최근 대화를 같이 보냄
+        context += f"[이전 대화]\n{conversation}\n"
+
+    return f"{SYSTEM_MESSAGE}\n\n[Context]\n{context}\n\n[질문]\n{user_input}\n\n[답변]"
+
+
+def generate(final_prompt):
+    model = genai.GenerativeModel("gemini-2.5-pro")
+    response = model.generate_content(final_prompt)
+
+    usage = getattr(response, "usage_metadata", None)
+    if usage is not None:
+        metrics.observe_tokens(
+            getattr(usage, "prompt_token_count", None),
+            getattr(usage, "candidates_token_count", None),
+        )
+    return response.text
+
+
+citation_regex = re.compile(r"\[근거:([^\]]*)\]")
+
+
+@lru_cache(maxsize=4096)
+def _legacy_citation(title, url, attach_raw):
+    # citation 메타데이터가 없는 예전 인덱스용: attachments 문자열을 게시글당 한 번만 파싱
+    attachments = []
+    for item in attach_raw.split(";"):
+        parts = item.split("|")
+        if len(parts) == 2:
+            attachments.append(parts)
+    return citation_entry(title, url, attachments)
+
+
+def doc_citation(doc):
+    citation = doc.metadata.get("citation")
+    if citation is None:
+        citation = _legacy_citation(
+            doc.metadata.get("title", "제목 없음"),
+            doc.metadata.get("source", ""),
+            doc.metadata.get("attachments", ""),
+        )
+    return citation
+
+
+def parse_citations(full_text, unique_docs):
+    # [근거: 1, 3] 태그를 한 번에 찾아 지우면서 인용된 문서 번호를 순서대로 모음
+    cited = []
+
+    def collect(match):
+        for idx in match.group(1).split(","):
+            idx = idx.strip()
+            if idx.isdigit() and int(idx) not in cited:
+                cited.append(int(idx))
+        return ""
+
+    content = citation_regex.sub(collect, full_text).strip()
+    citations = [doc_citation(unique_docs[num - 1]) for num in cited if 0 < num <= len(unique_docs)]
+    return content, citations
+
+
+def citation_footer(citations):
+    # 구조화된 출처 → 예전 Markdown 꼬리말
+    footer_items = []
+    for citation in citations:
+        if citation["url"]:
+            footer_items.append(f"- [{citation['title']}]({citation['url']})")
+        footer_items.extend(f"- 📁 [{fname}]({furl})" for fname, furl in citation["attachments"])
+
+    if not footer_items:
+        return ""
+    return "\n\n---\n**참고한 출처:**\n" + "\n".join(footer_items)
+
+
+def attach_sources(full_text, unique_docs):
+    # 출처 태그 제거 후 참고한 문서/첨부파일 링크를 붙임
+    content, citations = parse_citations(full_text, unique_docs)
+    return content + citation_footer(citations)
+
+
+def get_ai_response(user_input, filters=None, history=None):
+    # Markdown 한 덩어리로 받는 예전 방식 (출처 꼬리말 포함)
+    answer = answer_question(user_input, filters, history)
+    return answer["content"] + citation_footer(answer["citations"])
+
+
+def answer_question(user_input, filters=None, history=None):
+    # {"content": 출처 태그를 뺀 답변, "citations": [{"title", "url", "attachments"}, ...], "query": 검색 질의}
+    # history: chat-history-store 형식의 이전 대화 (이번 질문 제외)
+    with metrics.request("rag"):
+        generation = active
+        if not generation.ensemble:
+            metrics.inc("db_not_loaded")
+            return {"content": "죄송합니다. 데이터베이스가 로드되지 않았습니다.", "citations": [], "error": "db_not_loaded"}
+
+        # (1) 검색 (후속 질문이면 이전 대화로 질의를 보완)
+        query, unique_docs = retrieve_in_context(user_input, history, filters, generation)
+
+        # (2) 프롬프트 구성
+        # 이전 대화는 후속 질문(= 질의를 다시 쓴 경우)에만 붙임. 단독 질문에는 프롬프트 토큰만 늘어남
+        with metrics.stage("prompt"):
+            conversation = conversation_context(history) if query != user_input else ""
+            final_prompt = build_prompt(user_input, unique_docs, conversation)
+
+        # (3) Gemini 호출
+        try:
+            with metrics.stage("llm"):
+                full_text = generate(final_prompt)
+        except Exception as e:
+            metrics.inc("llm_error")
+            return {"content": f"AI 응답 생성 중 오류가 발생했습니다: {e}", "citations": [], "query": query, "error": str(e)}
+
+        # (4) 출처 태그 제거
+        with metrics.stage("postprocess"):
+            content, citations = parse_citations(full_text, unique_docs)
+        return {"content": content, "citations": citations, "query": query}
@@ -0,0 +1,39 @@
+# ratelimit.py (호출 속도 제한 유틸)
+import threading
+import time
+
+
+# ----------------------------
+# 토큰 버킷
+# ----------------------------
+class TokenBucket:
+    def __init__(self, rate, capacity=None):
+        self.rate = rate  # 초당 충전되는 토큰 수
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, tokens=1):
+        with self.lock:
+            self._refill()
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens=1):
+        # 토큰이 생길 때까지 대기 (고정 sleep 대신 필요한 만큼만 기다림)
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
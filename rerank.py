@@ -0,0 +1,115 @@
+# rerank.py (융합 후보 재정렬)
+#
+#   KAU_RERANK=off    기본, 융합 top 5를 그대로 사용
+#   KAU_RERANK=cross  작은 다국어 cross-encoder (sentence-transformers)
+#   KAU_RERANK=m3     bge-m3 sparse + multi-vector(ColBERT) 재채점 (FlagEmbedding)
+#
+# 메모리: m3는 쿼리 임베딩용 bge-m3와 별개로 bge-m3(fp32 약 2.2GB)를 한 벌 더 올린다.
+#   FlagEmbedding 모델은 sentence-transformers 인코더와 가중치를 공유하지 못하므로 프로세스마다 ~2GB가 늘어남.
+#   단일 프로세스(python app.py) 평가/소규모 서비스용이고, gunicorn 멀티 워커에서는 gunicorn.conf.py가 거부한다.
+#   멀티 워커에서는 cross(약 0.5GB)를 쓴다.
+#
+# 융합 후보 ~30개를 배치로 채점하되 지연 예산을 넘기면 남은 후보는 융합 순서대로 뒤에 붙인다.
+# (질문, chunk) 점수는 LRU 캐시에 보관한다.
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+import metrics
+
+RERANK_MODE = os.environ.get("KAU_RERANK", "off")
+RERANK_CROSS_MODEL = os.environ.get("KAU_RERANK_MODEL", "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1")
+RERANK_M3_MODEL = "BAAI/bge-m3"
+RERANK_CANDIDATES = int(os.environ.get("KAU_RERANK_CANDIDATES", "30"))  # 재정렬할 융합 후보 수
+RERANK_TOP_K = int(os.environ.get("KAU_RERANK_TOP_K", "3"))  # LLM에 보낼 chunk 수
+RERANK_BUDGET_MS = float(os.environ.get("KAU_RERANK_BUDGET_MS", "300"))
+RERANK_BATCH_SIZE = 8
+RERANK_CACHE_SIZE = 4096
+
+
+class Reranker:
+    def __init__(self, mode=RERANK_MODE, budget_ms=RERANK_BUDGET_MS, batch_size=RERANK_BATCH_SIZE,
+                 cache_size=RERANK_CACHE_SIZE):
+        self.mode = mode
+        self.budget = budget_ms / 1000
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {"scored": 0, "cache_hits": 0, "budget_cut": 0}
+
+        if mode == "cross":
+            from sentence_transformers import CrossEncoder
+            self.model = CrossEncoder(RERANK_CROSS_MODEL, device="cpu")
+        elif mode == "m3":
+            from FlagEmbedding import BGEM3FlagModel
+            self.model = BGEM3FlagModel(RERANK_M3_MODEL, use_fp16=False, device="cpu")
+        else:
+            raise ValueError(f"알 수 없는 재정렬 모드: {mode}")
+
+    def score_batch(self, query, texts):
+        pairs = [(query, text) for text in texts]
+        if self.mode == "cross":
+            return [float(s) for s in self.model.predict(pairs, batch_size=self.batch_size)]
+
+        scores = self.model.compute_score(
+            pairs,
+            batch_size=self.batch_size,
+            max_passage_length=512,
+            weights_for_different_modes=[0.4, 0.2, 0.4],  # dense, sparse, colbert
+        )
+        return [float(s) for s in scores["colbert+sparse+dense"]]
+
+    def _cache_get(self, key):
+        with self.lock:
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                return self.cache[key]
+        return None
+
+    def _cache_put(self, key, score):
+        with self.lock:
+            self.cache[key] = score
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+    def rerank(self, query, docs, top_k=RERANK_TOP_K):
+        deadline = time.perf_counter() + self.budget
+        keys = [(query, hashlib.sha1(d.page_content.encode("utf-8")).hexdigest()) for d in docs]
+
+        scores = {}
+        pending = []
+        for i, key in enumerate(keys):
+            cached = self._cache_get(key)
+            if cached is None:
+                pending.append(i)
+            else:
+                scores[i] = cached
+                self.stats["cache_hits"] += 1
+                metrics.inc("rerank_cache_hit")
+
+        # 융합 순위가 높은 후보부터 배치로 채점, 예산을 넘기면 중단
+        for start in range(0, len(pending), self.batch_size):
+            if time.perf_counter() > deadline:
+                self.stats["budget_cut"] += 1
+                metrics.inc("rerank_budget_cut")
+                break
+            batch = pending[start:start + self.batch_size]
+            for i, score in zip(batch, self.score_batch(query, [docs[i].page_content for i in batch])):
+                scores[i] = score
+                self._cache_put(keys[i], score)
+            self.stats["scored"] += len(batch)
+
+        ranked = sorted(scores, key=lambda i: -scores[i])
+        ranked += [i for i in range(len(docs)) if i not in scores]
+        return [docs[i] for i in ranked[:top_k]]
+
+
+def load_reranker(mode=RERANK_MODE):
+    if mode == "off":
+        return None
+    print(f"Loading reranker... ({mode})")
+    return Reranker(mode)
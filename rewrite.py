@@ -0,0 +1,153 @@
+# rewrite.py (대화 맥락 → 단독 검색 질의, 규칙 기반)
+#
+#   KAU_CONTEXT_TURNS=3  참고할 이전 대화 수 (0이면 끔 → 질문을 그대로 검색)
+#
+# "그럼 그거 신청은 언제야?" 같은 후속 질문은 지시어/생략 때문에 그대로 검색하면 엉뚱한 문서가 나온다.
+# 최근 질문들(사용자 원문)을 오래된 것부터 훑어 대화의 주제어/관점어를 정한 뒤, 질문 종류에 따라 질의를 만든다.
+#   지시어 ("그거", "거기", "그날", "똑같아")        → 주제 유지 + 새 단어 추가  "그날 주차 돼?" → "학위수여식 주차"
+#   새 내용어 없음 ("마감은?") / 생략형 ("X는?")     → 주제 유지 (새 내용어가 없으면 직전 검색 결과 재사용)
+#   "그리고", "그래서", "또" + 새 내용어              → 주제 유지 + 새 단어 추가
+#   "그럼/그러면/아니면" + 새 내용어 (지시어 없음)    → 주제를 새 단어로 바꾸고 관점어만 이어 받음  "그럼 휴학은?" → "휴학 신청 일정"
+#   그 밖의 질문                                     → 단독 질문, 그대로 검색
+# 다시 쓴 질의를 다음 재작성에 쓰지 않고 최근 KAU_CONTEXT_TURNS개 원문에서 매번 다시 계산하므로 질의가 계속 길어지지 않는다.
+# LLM을 부르지 않으므로 지연은 마이크로초 단위.
+import os
+import re
+from functools import lru_cache
+
+CONTEXT_TURNS = int(os.environ.get("KAU_CONTEXT_TURNS", "3"))
+
+# 앞 질문을 가리키는 지시어
+demonstrative_regex = re.compile(r"그거|그건|그게|그걸|그것|거기|그때|그\s*날|똑같|마찬가지")
+# 접속어로 시작 (주제를 잇는 후속 질문)
+followup_regex = re.compile(r"^(그럼|그러면|그리고|그래서|아니면|또)\b")
+# 주제 전환: "그럼 휴학은?" (지시어 없이 새 내용어가 올 때만)
+shift_regex = re.compile(r"^(그럼|그러면|아니면)\b")
+# 서술어가 생략된 "X는?", "X은요?"
+ellipsis_regex = re.compile(r"^\S+(은|는)요?\s*[?？]*$")
+# 질의에서 빼도 되는 말: 지시어, 요청 어미
+filler_regex = re.compile(
+    r"(그럼|그러면|그리고|그래서|아니면|그거|그건|그게|그걸|그것|거기|그때|그\s*날|이거|이건|저거|해당|똑같|마찬가지)"
+    r"|(알려\s*줘|알려\s*주세요|뭐야|뭐예요|인가요|있어|있나요|\S+야\s*(돼|되나요|해|하나요)|하면\s*돼|어떻게\s*돼)"
+    r"|[?!.,~]"
+)
+# 조사 / 끝말 ("신청은" → "신청", "언제야" → "언제", "확인해" → "확인")
+josa_regex = re.compile(r"(은|는|이|가|을|를|에|에서|으로|로|도|만|요|의|랑|이랑|하고|야|해|나요|까|죠)$")
+
+# 의문사 (직전 질의에서 주제로 넘기지 않음)
+QUESTION_WORDS = {"언제", "언제까지", "어디", "어디서", "얼마", "누구", "어떻게", "왜", "뭐", "무엇", "몇"}
+# 주제를 바꾸지 않는 말 (이것만 새로 나오면 같은 공지에서 답을 찾을 수 있음)
+ASPECT_WORDS = QUESTION_WORDS | {
+    "신청", "기간", "일정", "날짜", "시간", "장소", "방법", "마감", "대상", "자격",
+    "서류", "금액", "조건", "절차", "문의", "연락처", "결과", "발표", "접수", "제출",
+    "지원", "환불", "정정", "취소", "변경", "연장",
+    "주말", "평일", "방학", "공휴일",
+}
+
+
+def content_tokens(text):
+    tokens = []
+    for token in filler_regex.sub(" ", text).split():
+        for _ in range(2):  # "기간에도" → "기간에" → "기간"
+            stripped = josa_regex.sub("", token)
+            if len(stripped) < 2:
+                break
+            token = stripped
+        if len(token) > 1 or token.isdigit():
+            tokens.append(token)
+    return tokens
+
+
+def followup_kind(text, new_tokens):
+    # "keep" (주제 유지) / "shift" (주제 전환) / None (단독 질문)
+    text = text.strip()
+    if demonstrative_regex.search(text) or not new_tokens:
+        return "keep"
+    if shift_regex.search(text):
+        return "shift"
+    if followup_regex.search(text) or ellipsis_regex.search(text):
+        return "keep"
+    return None
+
+
+def is_followup(text, history=None, turns=CONTEXT_TURNS):
+    # 재작성 대상인 후속 질문인지 (history를 주면 앞에 주제가 있는지도 확인)
+    if history is None:
+        return followup_kind(text, [t for t in content_tokens(text) if t not in ASPECT_WORDS]) is not None
+    return rewrite_query(text, history, turns)[0] != text
+
+
+def recent_questions(history, turns=CONTEXT_TURNS):
+    # 최근 turns 번의 대화 중 텍스트 답변을 받은 사용자 질문, 최신순 (카드 응답은 건너뜀)
+    if not history or turns <= 0:
+        return []
+    questions = []
+    exchanges = 0
+    for i in range(len(history) - 1, -1, -1):
+        msg = history[i]
+        if msg.get("speaker") != "user":
+            continue
+        exchanges += 1
+        if exchanges > turns:
+            break
+        reply = history[i + 1] if i + 1 < len(history) else {}
+        if reply.get("type", "text") == "text":
+            questions.append(msg)
+    return questions
+
+
+def _step(text, topic, aspects):
+    # 질문 하나를 반영한 (주제어, 관점어, 종류, 새 내용어)
+    words = [t for t in content_tokens(text) if t not in QUESTION_WORDS]
+    new_tokens = [t for t in words if t not in ASPECT_WORDS and t not in topic]
+    own_aspects = [t for t in words if t in ASPECT_WORDS]
+    kind = followup_kind(text, new_tokens) if topic else None
+    if kind is None:
+        return [t for t in words if t not in ASPECT_WORDS], own_aspects, None, new_tokens
+    aspects = list(dict.fromkeys(aspects + own_aspects))
+    if kind == "shift":
+        return new_tokens, aspects, kind, new_tokens
+    return topic + new_tokens, aspects, kind, new_tokens
+
+
+@lru_cache(maxsize=2048)
+def _rewrite(user_input, previous_texts):
+    # previous_texts: 최근 질문 원문, 오래된 것부터 → (검색 질의 또는 None, 주제 유지 여부)
+    topic, aspects = [], []
+    for text in previous_texts:
+        topic, aspects, _, _ = _step(text, topic, aspects)
+
+    new_topic, _, kind, new_tokens = _step(user_input, topic, aspects)
+    if kind is None:
+        return None, False
+    carried = [t for t in aspects if t not in new_topic]
+    query = " ".join(dict.fromkeys(new_topic + carried + content_tokens(user_input)))
+    return query, kind == "keep" and not new_tokens
+
+
+def rewrite_query(user_input, history=None, turns=CONTEXT_TURNS):
+    # (검색 질의, 직전 턴의 검색 질의 또는 None, 주제 유지 여부)
+    # 주제어는 항상 사용자 원문에서 가져옴 (다시 쓴 질의는 직전 검색 결과를 찾는 키로만 사용)
+    questions = recent_questions(history, turns)
+    if not questions:
+        return user_input, None, False
+
+    previous_texts = tuple(q.get("content", "") for q in reversed(questions))
+    query, same_topic = _rewrite(user_input, previous_texts)
+    if query is None:
+        return user_input, None, False
+    previous = questions[0].get("query") or questions[0].get("content")
+    return query, previous, same_topic
+
+
+def conversation_context(history, turns=CONTEXT_TURNS, max_chars=300):
+    # LLM 프롬프트에 넣을 최근 대화 (답변은 앞부분만)
+    if not history or turns <= 0:
+        return ""
+    lines = []
+    for msg in history[-2 * turns:]:
+        if msg.get("speaker") == "user":
+            lines.append(f"사용자: {msg.get('content', '')}")
+        elif msg.get("type", "text") == "text":
+            lines.append(f"마하: {str(msg.get('content', ''))[:max_chars]}")
+    return "\n".join(lines)